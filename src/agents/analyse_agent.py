@@ -22,7 +22,8 @@ from autogen_agentchat.base import Response
 from autogen_core import CancellationToken, RoutedAgent
 from src.agents.sub_analyse_agent.cluster_agent import PaperClusterAgent
 from src.agents.sub_analyse_agent.deep_analyse_agent import DeepAnalyseAgent
-from src.agents.sub_analyse_agent.global_analyse_agent import GlobalanalyseAgent
+from src.agents.sub_analyse_agent.global_analyse_agent import GlobalanalyseAgent, Synthesis
+from src.core.config import config
 from src.core.model_client import create_default_client
 from src.core.state_models import BackToFrontData
 import json
@@ -35,9 +36,9 @@ logger = setup_logger(__name__)
 class AnalyseAgent(BaseChatAgent):
     """基于AutoGen框架的论文分析智能体"""
     
-    def __init__(self, name: str = "analyse_agent", state_queue: asyncio.Queue = None):
+    def __init__(self, name: str = "analyse_agent", state_queue: asyncio.Queue = None, paper_embeddings=None):
         super().__init__(name, "A simple agent that counts down.")
-        """初始化论文分析系列智能体"""
+        """初始化论文分析系列智能体（paper_embeddings为阅读阶段生成的论文嵌入矩阵，可为None）"""
         # 创建聚类智能体
         self.cluster_agent = PaperClusterAgent()
         # 创建深度分析智能体
@@ -47,6 +48,7 @@ class AnalyseAgent(BaseChatAgent):
     
         self.model_client = create_default_client()
         self.state_queue = state_queue
+        self.paper_embeddings = paper_embeddings
     
     @property
     def produced_message_types(self) -> Sequence[type[BaseChatMessage]]:
@@ -87,19 +89,32 @@ class AnalyseAgent(BaseChatAgent):
         """
         # 1. 调用聚类智能体进行论文聚类
         await self.state_queue.put(BackToFrontData(step=ExecutionState.ANALYZING,state="thinking",data="正在进行论文聚类分析\n"))
-        cluster_results = await self.cluster_agent.run(message)
-        await self.state_queue.put(BackToFrontData(step=ExecutionState.ANALYZING,state="thinking",data=f"论文聚类分析完成，共形成 {len(cluster_results)} 个聚类\n"))
+        cluster_results = await self.cluster_agent.run(message, embeddings=self.paper_embeddings)
+        # 层次聚类时顶层主题只用于组织叶子主题，深度分析只针对叶子主题（大小受预算限制，可并行处理）
+        leaf_clusters = [cluster for cluster in cluster_results if not cluster.children_ids]
+        if len(leaf_clusters) < len(cluster_results):
+            top_count = sum(1 for cluster in cluster_results if cluster.parent_id is None)
+            summary = f"论文聚类分析完成，共形成 {top_count} 个主题、{len(leaf_clusters)} 个子主题\n"
+        else:
+            summary = f"论文聚类分析完成，共形成 {len(cluster_results)} 个聚类\n"
+        await self.state_queue.put(BackToFrontData(step=ExecutionState.ANALYZING,state="thinking",data=summary))
 
         # 2. 调用深度分析智能体分析每个聚类的论文
         deep_analysis_results = []
         await self.state_queue.put(BackToFrontData(step=ExecutionState.ANALYZING,state="thinking",data="正在进行论文深度分析\n"))
-        deep_analysis_results = await asyncio.gather(*[self.deep_analyse_agent.run(cluster) for cluster in cluster_results])
+        syntheses = None
+        if config.get_bool("analysis.global.progressive", True):
+            # 渐进式：深度分析边完成边两两合并为阶段性综合，不必等待最慢的聚类，最终的全局分析只需合并少量综合
+            deep_tasks = [asyncio.create_task(self.deep_analyse_agent.run(cluster)) for cluster in leaf_clusters]
+            deep_analysis_results, syntheses = await self.global_analyse_agent.progressive_reduce(deep_tasks, self.report_synthesis)
+        else:
+            deep_analysis_results = await asyncio.gather(*[self.deep_analyse_agent.run(cluster) for cluster in leaf_clusters])
         await self.state_queue.put(BackToFrontData(step=ExecutionState.ANALYZING,state="thinking",data="论文深度分析完成\n"))
         
         # 3. 调用全局分析智能体生成整体分析报告
         await self.state_queue.put(BackToFrontData(step=ExecutionState.ANALYZING,state="thinking",data="等待全局分析\n"))
         is_thinking = None
-        async for chunk in self.global_analyse_agent.run(deep_analysis_results):
+        async for chunk in self.global_analyse_agent.run(deep_analysis_results, syntheses):
             if isinstance(chunk, Dict):
                 if not chunk.get("isSuccess", False):
                     await self.state_queue.put(BackToFrontData(step=ExecutionState.ANALYZING,state="error",data=chunk.get("global_analyse", "Unknown error")))
@@ -118,6 +133,11 @@ class AnalyseAgent(BaseChatAgent):
             )
         )
 
+    async def report_synthesis(self, synthesis: Synthesis) -> None:
+        """把渐进式合并得到的阶段性综合推送给前端"""
+        themes = "、".join(synthesis.themes)
+        await self.state_queue.put(BackToFrontData(step=ExecutionState.ANALYZING,state="thinking",data=f"阶段性综合（{themes}，共 {synthesis.paper_count} 篇论文）：\n{synthesis.content}\n"))
+
     async def on_reset(self, cancellation_token: CancellationToken) -> None:
         pass
    
@@ -130,7 +150,7 @@ async def analyse_node(state: State) -> State:
         await state_queue.put(BackToFrontData(step=ExecutionState.ANALYZING,state="initializing",data=None))
         extracted_papers = current_state.extracted_data
 
-        analyse_agent = AnalyseAgent(state_queue=state_queue)
+        analyse_agent = AnalyseAgent(state_queue=state_queue, paper_embeddings=current_state.paper_embeddings)
         task = StructuredMessage(content=extracted_papers, source="User")
         # task = TextMessage(content=json.dumps(extracted_papers.model_dump(),ensure_ascii=False), source="User")
         response = await analyse_agent.run(task=task)
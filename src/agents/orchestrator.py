@@ -18,6 +18,7 @@ from src.agents.report_agent import report_node
 from typing import Dict, Any
 from src.core.state_models import BackToFrontData
 from src.core.state_models import State,ConfigSchema
+from src.services.pdf_store import pdf_store_session
 
 
 import asyncio
@@ -105,7 +106,9 @@ class PaperAgentOrchestrator:
         )
 
         # 运行图
-        await self.graph.ainvoke({"state_queue": self.state_queue, "value": initial_state})
+        # 共享的PDF下载会话在所有并发运行都结束后才关闭，下次运行时重新创建
+        async with pdf_store_session():
+            await self.graph.ainvoke({"state_queue": self.state_queue, "value": initial_state})
         await self.state_queue.put(BackToFrontData(step=ExecutionState.FINISHED,state="finished",data=None))
 
     
@@ -1,15 +1,24 @@
 from autogen_agentchat.agents import AssistantAgent
 # from pydantic import BaseModel, Field
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional,Dict,Any
+from typing import AsyncIterator, List, Optional,Dict,Any,Tuple
 from src.utils.log_utils import setup_logger
-from src.core.prompts import reading_agent_prompt
-from src.core.model_client import create_default_client, create_reading_model_client
+from src.core.prompts import reading_agent_prompt, reading_agent_batch_prompt
+from src.core.model_client import create_default_client, create_reading_model_client, get_model_name
 from src.core.state_models import BackToFrontData
 from src.core.state_models import State,ExecutionState
 from src.services.chroma_client import ChromaClient
 from src.knowledge.knowledge import knowledge_base
+from src.knowledge.knowledge.utils.kb_utils import get_kb_embedding_service
 from src.core.config import config
+from src.tasks.paper_dedup import PaperDeduplicator, split_version
+from src.tasks.relevance_ranker import RelevanceRanker, format_dropped_papers
+from src.tasks.extraction_cache import get_extraction_cache
+from src.tasks.kb_writer import KnowledgeBaseWriter
+from src.tasks.fulltext_reader import FulltextReader
+from src.utils.adaptive_scheduler import AdaptiveScheduler
+from src.utils import hashstr
+from src.utils.token_utils import BudgetPacker, estimate_tokens
 import re, json, ast
 import asyncio
 
@@ -55,13 +64,41 @@ class ExtractedPapersData(BaseModel):
 
 model_client = create_reading_model_client()
 
-read_agent = AssistantAgent(
-    name="read_agent",
-    model_client=model_client,
-    system_message=reading_agent_prompt,
-    output_content_type=ExtractedPaperData,
-    model_client_stream=True
-)
+def create_read_agent() -> AssistantAgent:
+    """创建单篇阅读用的read_agent实例，以ExtractedPaperData结构化输出，流式返回"""
+    return AssistantAgent(
+        name="read_agent",
+        model_client=model_client,
+        system_message=reading_agent_prompt,
+        output_content_type=ExtractedPaperData,
+        model_client_stream=True
+    )
+
+read_agent = create_read_agent()
+
+def create_batch_read_agent() -> AssistantAgent:
+    """创建批量抽取用的read_agent实例
+
+    不使用结构化输出：整批一起校验时一篇出错会导致整批失败，
+    这里返回JSON文本，由parse_batch_result逐篇校验，只有出错的论文回退为单篇阅读。
+    """
+    return AssistantAgent(
+        name="batch_read_agent",
+        model_client=model_client,
+        system_message=reading_agent_batch_prompt,
+        model_client_stream=True
+    )
+
+# 抽取结果缓存（get_extraction_cache）的键中包含模型标识和提示词（含输出结构）的哈希，任一变化时旧缓存自动失效
+reading_model_name = get_model_name("reading-model")
+reading_prompt_hash = hashstr(reading_agent_prompt + reading_agent_batch_prompt + json.dumps(ExtractedPaperData.model_json_schema(), sort_keys=True))
+
+def extraction_prompt_hash() -> str:
+    """抽取结果缓存键中的提示词哈希，全文模式的输入不同，单独缓存"""
+    if config.get_bool("reading.fulltext.enabled", False):
+        fulltext_key = f"fulltext:{config.get_int('reading.fulltext.token_budget', 3000)}:{config.get_int('reading.fulltext.section_tokens', 800)}"
+        return hashstr(reading_prompt_hash + fulltext_key)
+    return reading_prompt_hash
 
 def sanitize_metadata(paper: Dict[str, Any]) -> Dict[str, Any]:
     new_meta = {}
@@ -77,59 +114,372 @@ def sanitize_metadata(paper: Dict[str, Any]) -> Dict[str, Any]:
     return new_meta
 
 
-async def add_papers_to_kb(papers:Optional[List[Dict[str, Any]]], extracted_papers: ExtractedPapersData):
-    """将提取的论文数据添加到知识库"""
+def temp_kb_embed_info() -> Dict[str, Any]:
+    """临时知识库使用的嵌入模型信息（embedding-model配置）"""
     embedding_dic = config.get("embedding-model")
     embedding_provider = embedding_dic.get("model-provider")
     provider_dic = config.get(embedding_provider)
     
-    embed_info = {
+    return {
         "name": embedding_dic.get("model"),
         "dimension": embedding_dic.get("dimension"),
         "base_url": provider_dic.get("base_url"),
         "api_key": provider_dic.get("api_key"),
     }
+
+
+def create_kb_writer(db_id: str) -> KnowledgeBaseWriter:
+    """创建临时知识库的写入器；reading.kb_writer.embed开启时由写入器生成嵌入，供知识库和聚类共用"""
+    embedding_service = None
+    if config.get_bool("reading.kb_writer.embed", True):
+        embedding_service = get_kb_embedding_service(temp_kb_embed_info())
+    return KnowledgeBaseWriter(db_id, embedding_service=embedding_service)
+
+
+async def create_temp_kb() -> str:
+    """创建本次报告使用的临时知识库，返回db_id"""
+    embed_info = temp_kb_embed_info()
     kb_type = config.get("KB_TYPE")
     database_info = await knowledge_base.create_database(
         "临时知识库", "用于存储临时提取的论文数据，仅用于本次报告的生成，用完即删", kb_type=kb_type, embed_info=embed_info, llm_info=None,
     )
     db_id = database_info["db_id"]
     config.set("tmp_db_id", db_id) # 记录临时知识库的db_id，后面retrieval_agent中使用
-    
-    # 注释掉原本的代码，因为papers中包含了一些None值，导致报错
-    # documents = [json.dumps(paper.model_dump(), ensure_ascii=False) for paper in extracted_papers.papers],
-    # metadatas = [paper for paper in papers],
-    # ids = [str(i) for i in range(len(papers))]
-    
-    documents=[json.dumps(paper.model_dump(),ensure_ascii=False) for paper in extracted_papers.papers]
-    sanitized_metadatas = []
-    if papers:
-        for paper in papers:
-           # new_meta = {}
-           # for k, v in paper.items():
-            #     if isinstance(v, list):
-            #         new_meta[k] = ", ".join(str(x) for x in v)
-            #     else:
-            #         new_meta[k] = v
-            # sanitized_metadatas.append(new_meta)
-            sanitized_metadatas.append(sanitize_metadata(paper))          
-    metadatas = sanitized_metadatas
-    
-    # # 确保 ids, metadatas 和 documents 长度一致
-    # # 注意：这里假设 extracted_papers.papers 和 papers 是一一对应的
-    # min_len = min(len(documents), len(metadatas))
-    # documents = documents[:min_len]
-    # metadatas = metadatas[:min_len]
-    # ids = [str(i) for i in range(min_len)]
-    ids = [str(i) for i in range(len(documents))] 
-    
-    data = {
-        "documents": documents,
-        "metadatas": metadatas,
-        "ids": ids,
-    }
+    return db_id
+
+
+async def triage_papers(ranker: RelevanceRanker, user_request: str, papers: List[Dict], state_queue, limit: Optional[int] = None, fallback: bool = True) -> List[Dict]:
+    """阅读前按与用户需求的相关度筛选论文，剔除的论文推送给前端；嵌入服务失败时不做筛选"""
+    if limit is not None and limit <= 0:
+        dropped = papers
+        kept = []
+    else:
+        try:
+            scores = await ranker.score(user_request, papers)
+        except Exception as e:
+            logger.warning(f"相关度预筛选失败，跳过筛选: {e}")
+            return papers
+        kept, dropped = ranker.select(papers, scores, limit=limit, fallback=fallback)
+    if dropped:
+        logger.info(f"相关度预筛选：保留 {len(kept)} 篇，剔除 {len(dropped)} 篇")
+        await state_queue.put(BackToFrontData(step=ExecutionState.READING,state="thinking",data=format_dropped_papers(dropped)))
+    return kept
+
+
+def load_json_content(raw_content: str) -> Any:
+    """解析模型输出的JSON文本，兼容Markdown代码块、思考过程和Python字面量，失败时返回None"""
+    clean_content = re.sub(r"<think>.*?</think>", "", raw_content, flags=re.S).strip()
+    if clean_content.startswith("```"):
+        clean_content = re.sub(r"^```(?:json)?\s*", "", clean_content)
+        clean_content = re.sub(r"\s*```$", "", clean_content)
+    try:
+        return json.loads(clean_content)
+    except json.JSONDecodeError:
+        try:
+            return ast.literal_eval(clean_content)
+        except Exception:
+            logger.error(f"Failed to parse content as JSON or Python dict: {clean_content}")
+            return None
+
+
+async def report_progress(scheduler: AdaptiveScheduler, state_queue) -> None:
+    """每完成若干次调用向前端推送一次进度和吞吐量"""
+    if scheduler.completed % config.get_int("reading.progress_interval", 5) == 0:
+        stats = scheduler.stats()
+        await state_queue.put(BackToFrontData(step=ExecutionState.READING,state="thinking",data=f"已完成 {stats['completed']} 次阅读调用，吞吐 {stats['throughput']} 次/分钟，当前并发 {stats['concurrency']}\n"))
+
+
+def parse_read_result(result) -> Optional[ExtractedPaperData]:
+    """将read_agent的输出解析并校验为ExtractedPaperData，失败返回None"""
+    if isinstance(result, BaseException):
+        # 重试耗尽的论文已在调度器中记录日志，这里直接跳过
+        return None
+    if isinstance(result, ExtractedPaperData):
+        return result
+    raw_content = result.messages[-1].content
+    # logger.info(f"Reading Agent Raw Output: {raw_content}") # 打印原始输出
+
+    if isinstance(raw_content, ExtractedPaperData):
+        return raw_content
+    if isinstance(raw_content, dict):
+        data = raw_content
+    elif isinstance(raw_content, str):
+        data = load_json_content(raw_content)
+        if data is None:
+            return None
+    else:
+        logger.error(f"Unsupported content type: {type(raw_content)}")
+        return None
+
+    # 数据结构修正（处理列表包裹或 {"papers": ...} 包裹）
+    if isinstance(data, list):
+        if len(data) > 0:
+            data = data[0] # 取第一个
+        else:
+            logger.warning("Parsed content is an empty list.")
+            return None
+
+    if isinstance(data, dict):
+        # 如果被包裹在 "papers" 键中
+        if "papers" in data and isinstance(data["papers"], list):
+            if len(data["papers"]) > 0:
+                data = data["papers"][0]
+        # 如果被包裹在 "paper" 键中
+        elif "paper" in data and isinstance(data["paper"], dict):
+            data = data["paper"]
+
+    try:
+        # 验证并转换
+        return ExtractedPaperData.model_validate(data)
+    except Exception as e:
+        logger.error(f"Validation failed for data: {data}. Error: {e}")
+        return None
+
+
+class ReadingCollector:
+    """汇总阅读结果：每篇论文读完立即解析校验，校验通过的结果交给知识库写入器，并向前端推送进度"""
+
+    def __init__(self, writer: Optional[KnowledgeBaseWriter], state_queue):
+        self.writer = writer
+        self.state_queue = state_queue
+        self.total = 0  # 已安排阅读的论文数量（流式模式下逐页增长）
+        self.finished = 0
+        self.cache_hits = 0
+        self.new_extractions = []  # 本次新抽取、需要写入缓存的结果
+        self._results: Dict[int, Tuple[Dict[str, Any], ExtractedPaperData]] = {}
+
+    async def accept(self, index: int, paper: Dict[str, Any], result, from_cache: bool = False) -> None:
+        """
+        接收单篇论文的阅读结果
+
+        参数:
+            index: 论文在本次阅读中的序号，用于最终按检索顺序输出
+            result: ExtractedPaperData、read_agent的TaskResult或异常
+            from_cache: 是否来自抽取结果缓存
+        """
+        self.finished += 1
+        extracted_paper = parse_read_result(result)
+        title = paper.get("title", paper.get("paper_id"))
+        if extracted_paper is None:
+            await self.state_queue.put(BackToFrontData(step=ExecutionState.READING,state="thinking",data=f"[{self.finished}/{self.total}] 阅读失败：{title}\n"))
+            return
+
+        self._results[index] = (paper, extracted_paper)
+        if from_cache:
+            self.cache_hits += 1
+        else:
+            self.new_extractions.append((paper.get("paper_id"), extracted_paper.model_dump()))
+        if self.writer is not None:
+            await self.writer.add(json.dumps(extracted_paper.model_dump(), ensure_ascii=False), sanitize_metadata(paper), key=index)
+        await self.state_queue.put(BackToFrontData(step=ExecutionState.READING,state="thinking",data=f"[{self.finished}/{self.total}] 已读完：{title}\n"))
+
+    def ordered_keys(self) -> List[int]:
+        """阅读成功的论文序号（检索顺序），与ordered()的结果一一对应"""
+        return sorted(self._results)
+
+    def ordered(self) -> Tuple[List[Dict[str, Any]], ExtractedPapersData]:
+        """按检索顺序返回(阅读成功的论文, 对应的抽取结果)"""
+        items = [self._results[index] for index in sorted(self._results)]
+        return [paper for paper, _ in items], ExtractedPapersData(papers=[extracted for _, extracted in items])
+
+
+async def read_paper(scheduler: AdaptiveScheduler, paper: Dict[str, Any], state_queue):
+    """通过调度器阅读单篇论文"""
+    result = await scheduler.submit(lambda: create_read_agent().run(task=str(paper)), label=paper.get("paper_id", ""))
+    await report_progress(scheduler, state_queue)
+    return result
+
+
+async def read_and_collect(scheduler: AdaptiveScheduler, index: int, paper: Dict[str, Any], payload: Dict[str, Any], state_queue, collector: ReadingCollector) -> None:
+    """单篇阅读并把结果交给collector，失败同样上报
+
+    参数:
+        payload: 发送给read_agent的论文信息（全文模式下附带正文摘录），paper为写入知识库的原始元数据
+    """
+    try:
+        result = await read_paper(scheduler, payload, state_queue)
+    except Exception as e:
+        result = e
+    await collector.accept(index, paper, result)
 
-    await knowledge_base.add_processed_content(db_id, data)
+
+def paper_tokens(paper: Dict[str, Any]) -> int:
+    """单篇论文在批量请求中占用的token数：输入 + 预留的输出"""
+    return estimate_tokens(json.dumps(paper, ensure_ascii=False)) + config.get_int("reading.batch.output_tokens_per_paper", 600)
+
+
+def parse_batch_result(result, batch: List[Dict[str, Any]]) -> Dict[str, ExtractedPaperData]:
+    """按paper_id解析批量抽取结果，逐篇校验，返回校验通过的 paper_id -> 抽取结果"""
+    data = load_json_content(result.messages[-1].content) if isinstance(result.messages[-1].content, str) else None
+    if isinstance(data, dict):
+        data = data.get("papers")
+    if not isinstance(data, list):
+        return {}
+
+    # 模型可能省略版本号，按不含版本号的ID兜底匹配
+    base_ids = {split_version(paper["paper_id"])[0]: paper["paper_id"] for paper in batch}
+    parsed = {}
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        paper_id = str(item.pop("paper_id", ""))
+        paper_id = paper_id if paper_id in base_ids.values() else base_ids.get(split_version(paper_id)[0])
+        if paper_id is None or paper_id in parsed:
+            continue
+        try:
+            parsed[paper_id] = ExtractedPaperData.model_validate(item)
+        except Exception as e:
+            logger.warning(f"批量抽取结果中论文 {paper_id} 校验失败，改为单篇阅读: {e}")
+    return parsed
+
+
+async def read_batch(scheduler: AdaptiveScheduler, batch: List[Tuple[int, Dict[str, Any], Dict[str, Any]]], state_queue, collector: ReadingCollector) -> None:
+    """一次请求阅读多篇论文，缺失或校验失败的论文单独回退为单篇阅读
+
+    参数:
+        batch: (序号, 论文, 发送给模型的论文信息) 列表
+    """
+    if len(batch) == 1:
+        await read_and_collect(scheduler, *batch[0], state_queue, collector)
+        return
+
+    papers = [paper for _, paper, _ in batch]
+    payloads = [payload for _, _, payload in batch]
+    task = f"请抽取以下{len(papers)}篇论文的信息：\n{json.dumps(payloads, ensure_ascii=False)}"
+    label = f"{papers[0].get('paper_id')}等{len(papers)}篇"
+    try:
+        result = await scheduler.submit(lambda: create_batch_read_agent().run(task=task), label=label)
+        await report_progress(scheduler, state_queue)
+        parsed = parse_batch_result(result, papers)
+    except Exception as e:
+        logger.warning(f"批量阅读 {label} 失败，全部改为单篇阅读: {e!r}")
+        parsed = {}
+
+    fallback = []
+    for index, paper, payload in batch:
+        if paper["paper_id"] in parsed:
+            await collector.accept(index, paper, parsed[paper["paper_id"]])
+        else:
+            fallback.append(read_and_collect(scheduler, index, paper, payload, state_queue, collector))
+    await asyncio.gather(*fallback)
+
+
+# 检索阶段写入论文字典的簿记字段，只用于记录和展示，不随论文信息发送给大模型
+BOOKKEEPING_KEYS = ("collapsed_ids", "relevance_score")
+
+
+def llm_payload(paper: Dict[str, Any]) -> Dict[str, Any]:
+    """发送给阅读智能体的论文信息：去掉簿记字段，原始论文字典（写入知识库的元数据）保持不变"""
+    return {key: value for key, value in paper.items() if key not in BOOKKEEPING_KEYS}
+
+
+async def prepare_payloads(misses: List[Tuple[int, Dict[str, Any]]]) -> AsyncIterator[Tuple[int, Dict[str, Any], Dict[str, Any]]]:
+    """按准备完成的先后逐篇产出 (序号, 论文, 发送给模型的论文信息)
+
+    全文模式下为每篇论文附加按字段挑选、受token预算约束的正文章节，PDF不可用时仅使用摘要；
+    下载和解析并发进行，哪篇先完成就先产出哪篇。
+    """
+    if not config.get_bool("reading.fulltext.enabled", False) or not misses:
+        for index, paper in misses:
+            yield index, paper, llm_payload(paper)
+        return
+
+    reader = FulltextReader()
+
+    async def prepare(index: int, paper: Dict[str, Any]) -> Tuple[int, Dict[str, Any], Dict[str, Any]]:
+        excerpt = await reader.read(paper)
+        payload = llm_payload(paper)
+        return index, paper, {**payload, "full_text_excerpt": excerpt} if excerpt else payload
+
+    pending = [asyncio.create_task(prepare(index, paper)) for index, paper in misses]
+    with_text = 0
+    try:
+        for future in asyncio.as_completed(pending):
+            item = await future
+            with_text += "full_text_excerpt" in item[2]
+            yield item
+    finally:
+        for task in pending:
+            task.cancel()
+    logger.info(f"全文模式：{with_text}/{len(misses)} 篇论文获取到正文")
+
+
+async def read_papers(scheduler: AdaptiveScheduler, papers: List[Dict[str, Any]], state_queue, collector: ReadingCollector, offset: int = 0) -> None:
+    """阅读一组论文：先查抽取缓存，未命中的论文按配置单篇或批量交给大模型，结果逐篇交给collector
+
+    参数:
+        offset: 第一篇论文在本次阅读中的序号
+    """
+    collector.total += len(papers)
+    cached = {}
+    extraction_cache = get_extraction_cache()
+    if extraction_cache is not None and papers:
+        cached_data = await asyncio.to_thread(extraction_cache.get_many, [paper.get("paper_id", "") for paper in papers], reading_model_name, extraction_prompt_hash())
+        for paper_id, data in cached_data.items():
+            try:
+                cached[paper_id] = ExtractedPaperData.model_validate(data)
+            except Exception as e:
+                logger.warning(f"论文 {paper_id} 的缓存抽取结果无效，重新阅读: {e}")
+
+    misses = []
+    for index, paper in enumerate(papers, start=offset):
+        if paper.get("paper_id") in cached:
+            await collector.accept(index, paper, cached[paper["paper_id"]], from_cache=True)
+        else:
+            misses.append((index, paper))
+
+    # 每篇论文准备好（全文模式下下载并截取正文）就立即开始阅读，不等待其余论文的下载
+    # 批量模式：按token预算把多篇论文打包进一次请求，系统提示词只发送一次，每装满一批就发送
+    batch_mode = config.get_bool("reading.batch.enabled", False)
+    packer = BudgetPacker(lambda item: paper_tokens(item[2]),
+                          token_budget=config.get_int("reading.batch.token_budget", 8000),
+                          max_items=config.get_int("reading.batch.max_papers", 8))
+    tasks = []
+    try:
+        async for item in prepare_payloads(misses):
+            if batch_mode:
+                tasks.extend(asyncio.create_task(read_batch(scheduler, batch, state_queue, collector)) for batch in packer.add(item))
+            else:
+                tasks.append(asyncio.create_task(read_and_collect(scheduler, *item, state_queue, collector)))
+        tasks.extend(asyncio.create_task(read_batch(scheduler, batch, state_queue, collector)) for batch in packer.flush())
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    await asyncio.gather(*tasks)
+
+
+async def read_search_stream(search_stream, state_queue, scheduler: AdaptiveScheduler, collector: ReadingCollector, user_request: str = "") -> List[Dict[str, Any]]:
+    """消费流式检索结果，每到达一页论文就立即启动该页的阅读任务
+
+    返回:
+        检索到的全部论文列表
+    """
+    papers = []
+    tasks = []
+    # 流式模式下逐页增量去重，已开始阅读的论文不会被后到的新版本替换
+    deduplicator = PaperDeduplicator() if config.get_bool("dedup.enabled", True) else None
+    ranker = RelevanceRanker() if config.get_bool("triage.enabled", False) else None
+    try:
+        async for page in search_stream:
+            if deduplicator is not None:
+                page = deduplicator.add(page)
+            if ranker is not None and page:
+                # 逐页筛选只按阈值剔除，top_n作为整个流的累计上限
+                limit = ranker.top_n - len(papers) if ranker.top_n > 0 else None
+                page = await triage_papers(ranker, user_request, page, state_queue, limit=limit, fallback=False)
+            if not page:
+                continue
+            tasks.append(asyncio.create_task(read_papers(scheduler, page, state_queue, collector, offset=len(papers))))
+            papers.extend(page)
+            await state_queue.put(BackToFrontData(step=ExecutionState.READING,state="thinking",data=f"已检索到 {len(papers)} 篇论文，正在阅读\n"))
+    except Exception:
+        # 检索中途失败时取消已启动的阅读任务
+        for task in tasks:
+            task.cancel()
+        raise
+    await asyncio.gather(*tasks)
+    return papers
 
 
 async def reading_node(state: State) -> State:
@@ -139,82 +489,52 @@ async def reading_node(state: State) -> State:
     current_state.current_step = ExecutionState.READING
     await state_queue.put(BackToFrontData(step=ExecutionState.READING,state="initializing",data=None))
 
-    papers = current_state.search_results
-
-    # 将papers合理分割成多个任务，交给多个read_agent并行执行，最后合并结果
-    # 并行执行任务，使用asyncio.gather
-    results = await asyncio.gather(*[read_agent.run(task=str(paper)) for paper in papers])
+    # 自适应并发调度：按限流和延迟自动调整同时阅读的论文数量，单篇失败不影响整体
+    scheduler = AdaptiveScheduler(name="reading")
+    if current_state.search_stream is None:
+        papers = current_state.search_results
+        if config.get_bool("triage.enabled", False) and papers:
+            # 阅读前剔除与用户需求无关的论文，减少LLM抽取的调用次数
+            papers = await triage_papers(RelevanceRanker(), current_state.user_request, papers, state_queue)
+            current_state.search_results = papers
 
-    # 合并结果
-    extracted_papers = ExtractedPapersData()
-    # 注释掉原本的代码，防止数据格式导致报错
-    # for result in results:
-    #     if result.messages[-1].content:
-    #         parsed_paper = result.messages[-1].content
-    #         extracted_papers.papers.append(parsed_paper)   
-    
-    # 清洗和预处理获取的数据    
-    successful_papers = []
-    for i, result in enumerate(results):
-        raw_content = result.messages[-1].content
-        # logger.info(f"Reading Agent Raw Output: {raw_content}") # 打印原始输出
-        
-        if isinstance(raw_content, ExtractedPaperData):
-            extracted_papers.papers.append(raw_content)
-            successful_papers.append(papers[i])
-            continue
-        if isinstance(raw_content, dict):
-            data = raw_content
-        elif isinstance(raw_content, str):
-            clean_content = raw_content.strip()
-            if clean_content.startswith("```"):
-                clean_content = re.sub(r"^```(?:json)?\s*", "", clean_content)
-                clean_content = re.sub(r"\s*```$", "", clean_content)
+    # 先创建临时知识库，每篇论文读完后由写入器微批写入，嵌入与阅读并行进行
+    db_id = await create_temp_kb()
+    async with create_kb_writer(db_id) as writer:
+        collector = ReadingCollector(writer, state_queue)
+        if current_state.search_stream is not None:
+            # 流式模式：每检索到一页论文就立即开始阅读，与后续页面的下载重叠
             try:
-                data = json.loads(clean_content)
-            except json.JSONDecodeError:
-                try:
-                    data = ast.literal_eval(clean_content)
-                except Exception:
-                    logger.error(f"Failed to parse content as JSON or Python dict: {clean_content}")
-                    continue
+                papers = await read_search_stream(current_state.search_stream, state_queue, scheduler, collector, current_state.user_request)
+            except Exception as e:
+                err_msg = f"Reading failed: {str(e)}"
+                current_state.error.reading_node_error = err_msg
+                await state_queue.put(BackToFrontData(step=ExecutionState.READING,state="error",data=err_msg))
+                return {"value": current_state}
+            finally:
+                current_state.search_stream = None
+            current_state.search_results = papers
+            if not papers:
+                current_state.error.reading_node_error = "没有找到相关论文,请尝试其他查询条件"
+                await state_queue.put(BackToFrontData(step=ExecutionState.READING,state="error",data="没有找到相关论文,请尝试其他查询条件"))
+                return {"value": current_state}
         else:
-            logger.error(f"Unsupported content type: {type(raw_content)}")
-            continue
-
-        # 清理 Markdown 代码块
-        # 3. 数据结构修正（处理列表包裹或 {"papers": ...} 包裹）
-        if isinstance(data, list):
-            if len(data) > 0:
-                data = data[0] # 取第一个
-            else:
-                logger.warning("Parsed content is an empty list.")
-                continue
-        
-        if isinstance(data, dict):
-            # 如果被包裹在 "papers" 键中
-            if "papers" in data and isinstance(data["papers"], list):
-                if len(data["papers"]) > 0:
-                    data = data["papers"][0]
-            # 如果被包裹在 "paper" 键中
-            elif "paper" in data and isinstance(data["paper"], dict):
-                data = data["paper"]
-        
-        try:
-            # 4. 验证并转换
-            parsed_paper = ExtractedPaperData.model_validate(data)
-            extracted_papers.papers.append(parsed_paper)
-            successful_papers.append(papers[i])
-        except Exception as e:
-            logger.error(f"Validation failed for data: {data}. Error: {e}")
-            # extracted_papers.papers.append(ExtractedPaperData()) 
+            # 将papers交给多个read_agent并行执行，每篇读完立即写入知识库
+            await read_papers(scheduler, papers, state_queue, collector)
+    scheduler.log_summary()
 
+    # 按检索顺序合并结果
+    _, extracted_papers = collector.ordered()
+    if collector.cache_hits:
+        logger.info(f"抽取结果缓存命中 {collector.cache_hits} 篇论文，跳过了对应的大模型调用")
+    extraction_cache = get_extraction_cache()
+    if extraction_cache is not None:
+        await asyncio.to_thread(extraction_cache.put_many, reading_model_name, extraction_prompt_hash(),
+                                [(paper_id, data) for paper_id, data in collector.new_extractions if paper_id])
 
-     # 还得存入向量数据库中
-    # await add_papers_to_kb(papers,extracted_papers)
-    await add_papers_to_kb(successful_papers,extracted_papers)
-        
     current_state.extracted_data = extracted_papers
+    # 写入知识库时生成的嵌入（与extracted_papers顺序一致），聚类阶段直接复用
+    current_state.paper_embeddings = writer.embedding_matrix(collector.ordered_keys())
     await state_queue.put(BackToFrontData(step=ExecutionState.READING,state="completed",data=f"论文阅读完成，共阅读 {len(extracted_papers.papers)} 篇论文"))
     return {"value": current_state}
 
@@ -9,9 +9,11 @@ import ast
 
 from src.utils.log_utils import setup_logger
 from src.tasks.paper_search import PaperSearcher
+from src.tasks.paper_dedup import PaperDeduplicator
 from src.core.state_models import State,ExecutionState
 from src.core.prompts import search_agent_prompt
 from src.core.state_models import BackToFrontData
+from src.core.config import config
 
 from src.core.model_client import create_search_model_client
 
@@ -79,15 +81,32 @@ async def search_node(state: State) -> State:
 
         # 调用检索服务
         paper_searcher = PaperSearcher()
+        if config.get_bool("paper_search.streaming", False):
+            # 流式模式：只启动检索，由reading_node边下载边阅读
+            current_state.search_stream = paper_searcher.stream_papers(
+                querys = search_query.querys,
+                start_date = search_query.start_date,
+                end_date = search_query.end_date,
+            )
+            await state_queue.put(BackToFrontData(step=ExecutionState.SEARCHING,state="completed",data="论文检索已启动，将边检索边阅读"))
+            return {"value": current_state}
+
         results = await paper_searcher.search_papers(
             querys = search_query.querys,
             start_date = search_query.start_date,
             end_date = search_query.end_date,
         )
         # [{'paper_id': '2411.11607v2', 'title': 'Performance evaluation of a ROS2 based Automated Driving System', 'authors': [...], 'summary': 'Automated driving is currently a prominent area of scientific work. In the\nfuture, highly automated driving and new Advanced Driver Assistance Systems\nwill become reality. While Advanced Driver Assistance Systems and automated\ndriving functions for certain domains are already commercially available,\nubiquitous automated driving in complex scenarios remains a subject of ongoing\nresearch. Contrarily to single-purpose Electronic Control Units, the software\nfor automated driving is often executed on high performance PCs. The Robot\nOperating System 2 (ROS2) is commonly used to connect components in an\nautomated driving system. Due to the time critical nature of automated driving\nsystems, the performance of the framework is especially important. In this\npaper, a thorough performance evaluation of ROS2 is conducted, both in terms of\ntimeliness and error rate. The results show that ROS2 is a suitable framework\nfor automated driving systems.', 'published': 2024, 'published_date': '2024-11-18T14:29:22+00:00', 'url': 'http://arxiv.org/abs/2411.11607v2', 'pdf_url': 'http://arxiv.org/pdf/2411.11607v2', 'primary_category': 'cs.RO', 'categories': [...], 'doi': '10.5220/0012556800003702'}, {'paper_id': '2307.06258v1', 'title': 'Connected Dependability Cage Approach for Safe Automated Driving', 'authors': [...], 'summary': "Automated driving systems can be helpful in a wide range of societal\nchallenges, e.g., mobility-on-demand and transportation logistics for last-mile\ndelivery, by aiding the vehicle driver or taking over the responsibility for\nthe dynamic driving task partially or completely. Ensuring the safety of\nautomated driving systems is no trivial task, even more so for those systems of\nSAE Level 3 or above. To achieve this, mechanisms are needed that can\ncontinuously monitor the system's operating conditions, also denoted as the\nsystem's operational design domain. This paper presents a safety concept for\nautomated driving systems which uses a combination of onboard runtime\nmonitoring via connected dependability cage and off-board runtime monitoring\nvia a remote command control center, to continuously monitor the system's ODD.\nOn one side, the connected dependability cage fulfills a double functionality:\n(1) to monitor continuously the operational design domain of the automated\ndriving system, and (2) to transfer the responsibility in a smooth and safe\nmanner between the automated driving system and the off-board remote safety\ndriver, who is present in the remote command control center. On the other side,\nthe remote command control center enables the remote safety driver the\nmonitoring and takeover of the vehicle's control. We evaluate our safety\nconcept for automated driving systems in a lab environment and on a test field\ntrack and report on results and lessons learned.", 'published': 2023, 'published_date': '2023-07-12T15:55:48+00:00', 'url': 'http://arxiv.org/abs/2307.06258v1', 'pdf_url': 'http://arxiv.org/pdf/2307.06258v1', 'primary_category': 'cs.RO', 'categories': [...], 'doi': None}]
+        # 合并同一论文的多个版本及近似重复的论文，避免重复阅读
+        collapsed_msg = ""
+        if config.get_bool("dedup.enabled", True):
+            deduplicator = PaperDeduplicator()
+            results = deduplicator.dedup(results)
+            if deduplicator.collapsed_count:
+                collapsed_msg = f"（已合并 {deduplicator.collapsed_count} 篇重复论文）"
         current_state.search_results = results
         if len(results) > 0:
-            await state_queue.put(BackToFrontData(step=ExecutionState.SEARCHING,state="completed",data=f"论文搜索完成，共找到 {len(results)} 篇论文"))
+            await state_queue.put(BackToFrontData(step=ExecutionState.SEARCHING,state="completed",data=f"论文搜索完成，共找到 {len(results)} 篇论文{collapsed_msg}"))
         else:
             await state_queue.put(BackToFrontData(step=ExecutionState.SEARCHING,state="error",data="没有找到相关论文,请尝试其他查询条件"))
             current_state.error.search_node_error = "没有找到相关论文,请尝试其他查询条件"
@@ -7,17 +7,23 @@
 import asyncio
 import json
 from autogen_agentchat.agents import AssistantAgent
-from src.core.model_client import create_default_client, create_subanalyse_cluster_model_client, create_cluster_embedding_client
+from src.core.model_client import create_default_client, create_subanalyse_cluster_model_client
 from src.core.prompts import clustering_agent_prompt
 from src.agents.reading_agent import ExtractedPaperData, ExtractedPapersData
 import numpy as np
-from typing import List, Dict, Any, Tuple, Union
-from sklearn.cluster import KMeans
+from typing import List, Dict, Any, Optional, Tuple, Union
 # from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from openai import OpenAI
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from src.utils.log_utils import setup_logger
+from src.services.embedding_store import get_embedding_store
+from src.services.embedding_service import create_embedding_service
+from src.tasks.cluster_selection import select_clusters
+from src.tasks.topic_tree import build_topic_tree
+from src.tasks.cluster_keywords import cluster_themes
+from src.utils.token_utils import estimate_tokens
+from src.core.config import config
 
 # 配置日志
 logger = setup_logger(__name__)
@@ -31,31 +37,25 @@ class PaperCluster:
     theme_description: str
     keywords: List[str]
     centroid_vector: np.ndarray = None
+    # 层次聚类时的主题树链接：叶子主题指向所属的顶层主题，顶层主题列出其叶子主题
+    parent_id: Optional[int] = None
+    children_ids: List[int] = field(default_factory=list)
 
 class PaperClusterAgent:
     """论文聚类智能体"""
+
+    embedding_dimension = 1024
     
     def __init__(self, model_client=None):
         """初始化聚类智能体"""
         self.model_client = create_subanalyse_cluster_model_client()
-        self.clustering_agent = AssistantAgent(
-            name="clustering_agent",
-            model_client= self.model_client,
-            system_message = clustering_agent_prompt
-        )
+        # 共享的嵌入服务：与知识库等其他组件的并发请求合并成批
+        self.embedding_service = create_embedding_service("cluster-embedding-model", self.embedding_dimension)
 
 
     def get_embedding(self, text: Union[str, List[str]]) -> list[float]:
-        client = create_cluster_embedding_client()
-        response = client.embeddings.create(
-            model=client.default_headers["X-Model"],
-            input=text,
-            dimensions=1024
-        )
-        res = []
-        for tmp in response.data:
-            res.append(tmp.embedding)
-        return res
+        texts = [text] if isinstance(text, str) else list(text)
+        return self.embedding_service.embed(texts)
 
     def prepare_text_for_embedding(self, paper: Dict[str, Any]) -> str:
         """准备用于生成嵌入向量的文本"""
@@ -86,49 +86,69 @@ class PaperClusterAgent:
         return " ".join(text_parts)
     
     def generate_embeddings(self, papers: List[Dict[str, Any]]) -> np.ndarray:
-       
+        """生成论文的嵌入矩阵，已缓存的文本直接从嵌入向量存储中读取，只为未命中的文本请求嵌入服务"""
         texts = [self.prepare_text_for_embedding(paper) for paper in papers]
         
-        embeddings = self.get_embedding(texts)
-        
-        return np.array(embeddings)
-        
-    def determine_optimal_clusters(self, embeddings: np.ndarray, max_k: int = 5) -> int:
-        """使用肘部法则确定最佳聚类数量"""
-        if len(embeddings) <= 2:
-            return 1
-            
-        max_clusters = min(max_k, len(embeddings) - 1)
-        if max_clusters == 1:
-            return 1
-            
-        inertias = []
-        k_range = range(1, max_clusters + 1)
-        
-        for k in k_range:
-            if k <= len(embeddings):
-                kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-                kmeans.fit(embeddings)
-                inertias.append(kmeans.inertia_)
+        return get_embedding_store().get_or_embed(
+            texts, self.embedding_service.model_key, self.embedding_dimension, self.get_embedding
+        )
         
-        # 简单的肘部法则实现
-        if len(inertias) >= 3:
-            differences = [inertias[i-1] - inertias[i] for i in range(1, len(inertias))]
-            optimal_k = differences.index(max(differences)) + 2
-            return min(optimal_k, max_clusters)
-        else:
-            return min(2, max_clusters)
+    def determine_optimal_clusters(self, embeddings: np.ndarray, max_k: int = None) -> int:
+        """确定最佳聚类数量（PCA降维 + 并行拟合各k值 + 抽样轮廓系数，见clustering配置）"""
+        return select_clusters(embeddings, max_k=max_k).k
     
-    def cluster_papers(self, papers: List[Dict[str, Any]]) -> List[PaperCluster]:
-        """对论文进行聚类"""
+    def use_hierarchical(self, paper_count: int) -> bool:
+        """clustering.mode为auto时，论文数达到hierarchical.min_total_papers才使用层次聚类"""
+        mode = config.get("clustering.mode", "auto")
+        if mode == "auto":
+            return paper_count >= config.get_int("clustering.hierarchical.min_total_papers", 200)
+        return mode == "hierarchical"
+
+    def cluster_papers_hierarchical(self, papers: List[Dict[str, Any]], embeddings: np.ndarray) -> List[PaperCluster]:
+        """层次聚类：返回顶层主题和叶子主题，每个叶子主题的论文数和token数都在深度分析的预算以内"""
+        # 与深度分析提示词中的论文数据格式一致
+        costs = [estimate_tokens(json.dumps(paper, ensure_ascii=False, indent=2)) for paper in papers]
+        tree = build_topic_tree(embeddings, costs)
+
+        clusters = []
+        for top in tree:
+            node = PaperCluster(
+                cluster_id=len(clusters),
+                papers=[papers[i] for i in top.indices],
+                theme_description="",
+                keywords=[],
+                centroid_vector=np.mean(embeddings[top.indices], axis=0)
+            )
+            clusters.append(node)
+            for child in top.children:
+                leaf = PaperCluster(
+                    cluster_id=len(clusters),
+                    papers=[papers[i] for i in child.indices],
+                    theme_description="",
+                    keywords=[],
+                    centroid_vector=np.mean(embeddings[child.indices], axis=0),
+                    parent_id=node.cluster_id
+                )
+                node.children_ids.append(leaf.cluster_id)
+                clusters.append(leaf)
+        return clusters
+
+    def cluster_papers(self, papers: List[Dict[str, Any]], embeddings: Optional[np.ndarray] = None) -> List[PaperCluster]:
+        """对论文进行聚类，embeddings为阅读阶段已生成的嵌入矩阵（行与papers一一对应），没有时现场生成"""
         if not papers:
             return []
             
-        # 生成嵌入向量
-        embeddings = self.generate_embeddings(papers)
+        if embeddings is None or len(embeddings) != len(papers):
+            embeddings = self.generate_embeddings(papers)
+        else:
+            logger.info(f"复用阅读阶段生成的 {len(papers)} 条论文嵌入")
+
+        if self.use_hierarchical(len(papers)):
+            return self.cluster_papers_hierarchical(papers, embeddings)
         
-        # 确定聚类数量
-        n_clusters = self.determine_optimal_clusters(embeddings)
+        # 确定聚类数量，同时得到该聚类数量下已拟合的聚类结果
+        selection = select_clusters(embeddings)
+        n_clusters = selection.k
         
         if n_clusters == 1 or len(papers) <= n_clusters:
             # 所有论文在一个聚类中
@@ -140,9 +160,7 @@ class PaperClusterAgent:
                 centroid_vector=np.mean(embeddings, axis=0)
             )]
         
-        # 执行KMeans聚类
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        cluster_labels = kmeans.fit_predict(embeddings)
+        cluster_labels = selection.labels
         
         # 构建聚类结果
         clusters = []
@@ -243,8 +261,16 @@ class PaperClusterAgent:
             logger.error(f"解析LLM响应时出错:\n {e}")
             return "未分类研究主题", ["research"]
     
-    async def generate_cluster_theme(self, cluster: PaperCluster) -> str:
-        """使用LLM为聚类生成主题描述和关键词"""
+    def create_clustering_agent(self) -> AssistantAgent:
+        """创建为单个聚类生成主题描述和关键词的智能体"""
+        return AssistantAgent(
+            name="clustering_agent",
+            model_client= self.model_client,
+            system_message = clustering_agent_prompt
+        )
+
+    async def generate_cluster_theme(self, cluster: PaperCluster) -> Tuple[str, List[str]]:
+        """使用LLM为聚类生成主题描述和关键词，失败时返回聚类中已有的（本地提取的）主题和关键词"""
         try:
             # 准备聚类中的论文摘要
             paper_summaries = []
@@ -270,7 +296,9 @@ class PaperClusterAgent:
                 主题描述：[主题描述]
                 关键词：[关键词1, 关键词2, 关键词3]
             """
-            response = await self.clustering_agent.run(task=prompt)
+            if cluster.keywords:
+                prompt += f"\n可参考从该类全部论文中统计出的高频特征词：{', '.join(cluster.keywords)}\n"
+            response = await self.create_clustering_agent().run(task=prompt)
             
             # 解析LLM响应
             theme_description, keywords = self.parse_llm_response(response.messages[-1].content)
@@ -278,10 +306,33 @@ class PaperClusterAgent:
                 
         except Exception as e:
             logger.error(f"生成聚类主题时出错: \n{e}")
-            return "未分类研究主题"
+            return cluster.theme_description or "未分类研究主题", cluster.keywords or ["research"]
+
+    def extract_cluster_themes(self, clusters: List[PaperCluster]) -> None:
+        """用c-TF-IDF在本地为聚类生成主题描述和关键词（毫秒级，不调用LLM）
+
+        叶子主题与顶层主题分别作为一组类别计算，保证关键词在同一层级内有区分度。
+        """
+        levels = [[c for c in clusters if not c.children_ids], [c for c in clusters if c.children_ids]]
+        for level in levels:
+            if not level:
+                continue
+            for cluster, (theme, keywords) in zip(level, cluster_themes([c.papers for c in level])):
+                cluster.theme_description = theme
+                cluster.keywords = keywords
+
+    async def refine_cluster_themes(self, clusters: List[PaperCluster]) -> None:
+        """用LLM并发改写各聚类的主题描述和关键词，并发数由clustering.theme_concurrency控制"""
+        semaphore = asyncio.Semaphore(config.get_int("clustering.theme_concurrency", 8))
+
+        async def refine(cluster: PaperCluster) -> None:
+            async with semaphore:
+                cluster.theme_description, cluster.keywords = await self.generate_cluster_theme(cluster)
+
+        await asyncio.gather(*[refine(cluster) for cluster in clusters])
     
 
-    async def run_clustering_analyse(self, papers_data: Dict[str, Any]) -> List[PaperCluster]:
+    async def run_clustering_analyse(self, papers_data: Dict[str, Any], embeddings: Optional[np.ndarray] = None) -> List[PaperCluster]:
         """运行完整的聚类分析"""
         papers = papers_data.get("papers", [])
         
@@ -290,25 +341,30 @@ class PaperClusterAgent:
         
         logger.info(f"开始对 {len(papers)} 篇论文进行聚类分析...")
         
-        # 执行聚类
-        clusters = self.cluster_papers(papers)
+        # 执行聚类（嵌入请求和模型拟合都是同步计算，放到线程中避免阻塞事件循环）
+        clusters = await asyncio.to_thread(self.cluster_papers, papers, embeddings)
         
-        # 为每个聚类生成主题和关键词
+        # 为每个聚类生成主题和关键词：本地c-TF-IDF，可选用LLM并发改写
+        self.extract_cluster_themes(clusters)
+        if config.get_bool("clustering.llm_theme", False):
+            await self.refine_cluster_themes(clusters)
+
         results = []
         for cluster in clusters:
-            theme_description, keywords = await self.generate_cluster_theme(cluster)
             paperCluster = PaperCluster(
                 cluster_id=cluster.cluster_id,
                 papers=cluster.papers,
-                theme_description=theme_description,
-                keywords=keywords)  
+                theme_description=cluster.theme_description,
+                keywords=cluster.keywords,
+                parent_id=cluster.parent_id,
+                children_ids=cluster.children_ids)  
             results.append(paperCluster)
         
         return results
-    def run(self, papers_data: ExtractedPapersData):
+    def run(self, papers_data: ExtractedPapersData, embeddings: Optional[np.ndarray] = None):
         """统一接口方法"""
         papers = papers_data.model_dump()
-        return self.run_clustering_analyse(papers)
+        return self.run_clustering_analyse(papers, embeddings)
 
 async def main():
     """主测试函数"""
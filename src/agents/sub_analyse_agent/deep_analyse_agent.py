@@ -10,11 +10,13 @@ import os
 import json
 from typing import Dict, Any, List
 from dataclasses import dataclass
-from src.core.prompts import deep_analyse_agent_prompt
+from src.core.prompts import deep_analyse_agent_prompt, deep_analyse_reduce_prompt
+from src.core.config import config
 from src.core.model_client import create_default_client, create_subanalyse_deep_analyse_model_client
 from autogen_agentchat.agents import AssistantAgent
 from src.agents.sub_analyse_agent.cluster_agent import PaperCluster
 from src.utils.log_utils import setup_logger
+from src.utils.token_utils import estimate_tokens, pack_by_budget
 
 logger = setup_logger(__name__)
 
@@ -48,16 +50,32 @@ class DeepAnalyseAgent:
     def __init__(self, model_client=None):
         """初始化聚类智能体"""
         self.model_client = create_subanalyse_deep_analyse_model_client()
-        self.deep_analyse_agent = AssistantAgent(
+        self.map_reduce_threshold = config.get_int("analysis.deep.map_reduce_threshold", 24000)
+        self.batch_tokens = config.get_int("analysis.deep.batch_tokens", 12000)
+        self.max_batch_papers = config.get_int("analysis.deep.max_batch_papers", 20)
+        # 所有聚类共享的并发上限（各聚类的深度分析由上层并发执行）
+        self.semaphore = asyncio.Semaphore(config.get_int("analysis.deep.concurrency", 4))
+
+    def create_agent(self, system_message: str = deep_analyse_agent_prompt) -> AssistantAgent:
+        """创建深度分析智能体，合并各批分析时传入deep_analyse_reduce_prompt作为系统提示词"""
+        return AssistantAgent(
             name="deep_analyse_agent",
             model_client= self.model_client,
-            system_message = deep_analyse_agent_prompt
+            system_message = system_message
         )
-    async def deep_analyze_cluster(self, cluster: PaperCluster) -> DeepAnalyseResult:
-        """对单个聚类进行深入分析"""
-        try:
-            
-            prompt = f"""
+
+    async def ask(self, prompt: str, system_message: str = deep_analyse_agent_prompt) -> str:
+        async with self.semaphore:
+            response = await self.create_agent(system_message).run(task=prompt)
+        return response.messages[-1].content
+
+    @staticmethod
+    def papers_json(papers: List[Dict[str, Any]]) -> str:
+        return json.dumps(papers, ensure_ascii=False, indent=2)
+
+    async def analyze_single(self, cluster: PaperCluster) -> str:
+        """单次调用分析整个聚类"""
+        prompt = f"""
                 基于以下聚类信息和详细的论文内容，进行深入的学术分析：
 
                 ## 基本信息
@@ -66,13 +84,75 @@ class DeepAnalyseAgent:
                 - **论文数量**：{len(cluster.papers)}
 
                 ## 详细论文数据
-                {json.dumps(cluster.papers, ensure_ascii=False, indent=2)}
+                {self.papers_json(cluster.papers)}
 
                 请以结构化的方式组织你的分析结果。
 """
-            
-            response = await self.deep_analyse_agent.run(task=prompt)
-            analyse_content = response.messages[-1].content
+        return await self.ask(prompt)
+
+    async def analyze_batch(self, cluster: PaperCluster, batch: List[Dict[str, Any]], index: int, total: int) -> str:
+        """map：分析聚类中的一批论文"""
+        prompt = f"""
+                以下是一个论文聚类中的第 {index}/{total} 批论文，请基于这批论文进行深入的学术分析：
+
+                ## 基本信息
+                - **聚类主题**：{cluster.theme_description}
+                - **核心关键词**：{', '.join(cluster.keywords)}
+                - **聚类论文总数**：{len(cluster.papers)}，本批 {len(batch)} 篇
+
+                ## 本批论文数据
+                {self.papers_json(batch)}
+
+                请以结构化的方式组织你的分析结果，引用具体论文的方法、数据集和数值结果，便于之后与其他批次的分析合并。
+"""
+        return await self.ask(prompt)
+
+    async def reduce_analyses(self, cluster: PaperCluster, partials: List[str]) -> str:
+        """reduce：合并各批分析；合并内容超出预算时先分组合并，直到只剩一份"""
+        while len(partials) > 1:
+            groups = pack_by_budget(partials, estimate_tokens, self.map_reduce_threshold, len(partials))
+            if len(groups) == len(partials):
+                # 每份都已接近预算，两两合并以保证收敛
+                groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+            partials = await asyncio.gather(*[self.merge_group(cluster, group) for group in groups])
+        return partials[0]
+
+    async def merge_group(self, cluster: PaperCluster, group: List[str]) -> str:
+        if len(group) == 1:
+            return group[0]
+        sections = "\n\n".join(f"### 第 {i} 份分析\n{text}" for i, text in enumerate(group, start=1))
+        prompt = f"""
+                以下是同一论文聚类中不同批次论文的分析结果，请合并为一份完整的聚类分析：
+
+                ## 基本信息
+                - **聚类主题**：{cluster.theme_description}
+                - **核心关键词**：{', '.join(cluster.keywords)}
+                - **论文数量**：{len(cluster.papers)}
+
+                ## 各批次分析结果
+                {sections}
+
+                请以结构化的方式组织你的分析结果。
+"""
+        return await self.ask(prompt, deep_analyse_reduce_prompt)
+
+    async def analyze_map_reduce(self, cluster: PaperCluster) -> str:
+        """按token预算把聚类拆成若干批并发分析，再合并各批结果"""
+        cost = lambda paper: estimate_tokens(self.papers_json([paper]))
+        batches = pack_by_budget(cluster.papers, cost, self.batch_tokens, self.max_batch_papers)
+        logger.info(f"聚类 {cluster.cluster_id}（{len(cluster.papers)} 篇论文）分 {len(batches)} 批分析后合并")
+        partials = await asyncio.gather(*[
+            self.analyze_batch(cluster, batch, index, len(batches)) for index, batch in enumerate(batches, start=1)
+        ])
+        return await self.reduce_analyses(cluster, list(partials))
+
+    async def deep_analyze_cluster(self, cluster: PaperCluster) -> DeepAnalyseResult:
+        """对单个聚类进行深入分析：论文数据在预算内时单次调用，否则分批分析再合并"""
+        try:
+            if estimate_tokens(self.papers_json(cluster.papers)) <= self.map_reduce_threshold:
+                analyse_content = await self.analyze_single(cluster)
+            else:
+                analyse_content = await self.analyze_map_reduce(cluster)
             
             return DeepAnalyseResult(
                 cluster_id=cluster.cluster_id,
@@ -6,8 +6,10 @@ import asyncio
 import sys
 import os
 import json
-from typing import Dict, Any, List
-from src.core.prompts import global_analyse_agent_prompt
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+from src.core.prompts import global_analyse_agent_prompt, global_synthesis_prompt
+from src.core.config import config
 from src.core.model_client import create_default_client, create_subanalyse_global_analyse_model_client
 from autogen_agentchat.agents import AssistantAgent
 from src.agents.sub_analyse_agent.deep_analyse_agent import DeepAnalyseResult
@@ -15,10 +17,26 @@ from src.utils.log_utils import setup_logger
 
 logger = setup_logger(__name__)
 
+
+@dataclass
+class Synthesis:
+    """渐进式全局分析中的一份阶段性综合，覆盖一个或多个聚类主题"""
+    themes: List[str]
+    paper_count: int
+    content: str
+
+    @classmethod
+    def from_result(cls, result: DeepAnalyseResult) -> "Synthesis":
+        return cls(themes=[result.theme], paper_count=result.paper_count, content=result.deep_analyse)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"themes": self.themes, "paper_count": self.paper_count, "synthesis": self.content}
+
+
 class GlobalanalyseAgent:
-    async def run(self, cluster_results: List[DeepAnalyseResult]):
+    async def run(self, cluster_results: List[DeepAnalyseResult], syntheses: Optional[List[Synthesis]] = None):
         """统一接口方法"""
-        async for chunk in self.generate_global_analyse(cluster_results):
+        async for chunk in self.generate_global_analyse(cluster_results, syntheses):
             yield chunk
         
     def __init__(self, model_client=None):
@@ -30,9 +48,80 @@ class GlobalanalyseAgent:
             system_message = global_analyse_agent_prompt,
             model_client_stream=True
         )
+        # 渐进式合并：阶段性综合剩余fan_in份时停止合并，交给最终的全局分析
+        self.fan_in = config.get_int("analysis.global.fan_in", 4)
+        self.synthesis_words = config.get_int("analysis.global.synthesis_words", 2000)
+
+    async def merge_pair(self, left: Synthesis, right: Synthesis) -> Synthesis:
+        """把两份材料合并为一份阶段性综合，主题列表和论文数累加，篇幅受synthesis_words限制"""
+        agent = AssistantAgent(
+            name="global_synthesis_agent",
+            model_client=self.model_client,
+            system_message=global_synthesis_prompt.format(max_words=self.synthesis_words),
+        )
+        prompt = "\n\n".join(
+            f"## 材料{i}（主题：{'、'.join(item.themes)}，共 {item.paper_count} 篇论文）\n{item.content}"
+            for i, item in enumerate((left, right), start=1)
+        )
+        response = await agent.run(task=prompt)
+        return Synthesis(themes=left.themes + right.themes,
+                         paper_count=left.paper_count + right.paper_count,
+                         content=response.messages[-1].content)
+
+    async def progressive_reduce(self,
+                                 deep_tasks: List[asyncio.Task],
+                                 on_synthesis: Optional[Callable[[Synthesis], Awaitable[None]]] = None
+                                 ) -> Tuple[List[DeepAnalyseResult], List[Synthesis]]:
+        """
+        渐进式树形合并：深度分析每完成一个就进入待合并池，池中有两份即并发合并，
+        合并结果回到池中继续参与合并，直到剩余份数不超过fan_in
+
+        参数:
+            deep_tasks: 各聚类的深度分析任务
+            on_synthesis: 每产生一份阶段性综合时的回调（用于推送给前端）
+
+        返回:
+            (按任务顺序排列的深度分析结果, 剩余的阶段性综合)
+        """
+        results: Dict[asyncio.Task, DeepAnalyseResult] = {}
+        ready: List[Synthesis] = []
+        unmerged: List[Synthesis] = []  # 合并失败的材料，原样交给最终的全局分析
+        running = set(deep_tasks)
+        merging: Dict[asyncio.Task, Tuple[Synthesis, Synthesis]] = {}  # 合并任务 -> 参与合并的两份材料
+
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                running.discard(task)
+                if task in merging:
+                    sources = merging.pop(task)
+                    try:
+                        synthesis = task.result()
+                    except Exception as e:
+                        # 合并失败时保留两份原材料，不再继续合并它们
+                        logger.error(f"阶段性综合失败: {e}")
+                        unmerged.extend(sources)
+                        continue
+                    if on_synthesis is not None:
+                        await on_synthesis(synthesis)
+                    ready.append(synthesis)
+                else:
+                    result = task.result()
+                    results[task] = result
+                    if not result.deep_analyse.startswith("分析失败"):
+                        ready.append(Synthesis.from_result(result))
+
+            # 剩余份数（待完成的深度分析 + 合并中 + 待合并）超过fan_in时继续两两合并
+            while len(ready) >= 2 and len(running) + len(ready) > self.fan_in:
+                left, right = ready.pop(0), ready.pop(0)
+                task = asyncio.create_task(self.merge_pair(left, right))
+                merging[task] = (left, right)
+                running.add(task)
+
+        return [results[task] for task in deep_tasks], ready + unmerged
     
-    async def generate_global_analyse(self, analyse_results: List[DeepAnalyseResult]) -> Dict[str, Any]:
-        """生成全局分析草稿 - 汇总各主题分析结果"""
+    async def generate_global_analyse(self, analyse_results: List[DeepAnalyseResult], syntheses: Optional[List[Synthesis]] = None) -> Dict[str, Any]:
+        """生成全局分析草稿 - 汇总各主题分析结果；提供syntheses时基于渐进式合并得到的阶段性综合生成"""
         try:
             # 准备所有聚类的分析内容
             cluster_summaries = []
@@ -45,9 +134,10 @@ class GlobalanalyseAgent:
                     "analyse_summary": result.deep_analyse[:1000] + "..." if len(result.deep_analyse) > 10000 else result.deep_analyse
                 })
             
+            prompt_data = [synthesis.to_dict() for synthesis in syntheses] if syntheses else cluster_summaries
             prompt = f"""
 基于以下多主题聚类分析结果（见下方 JSON 数据），生成一份逻辑严谨、内容详实的全局分析草稿，需严格覆盖以下 6 大核心模块，且各模块内容需紧密关联主题数据，避免脱离分析基础：
-{json.dumps(cluster_summaries, ensure_ascii=False, indent=2)}
+{json.dumps(prompt_data, ensure_ascii=False, indent=2)}
 
 # 全局分析核心模块要求（需逐项满足）
 
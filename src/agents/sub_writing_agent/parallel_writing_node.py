@@ -1,11 +1,27 @@
 from src.agents.sub_writing_agent.writing_state_models import WritingState, SectionState
 from typing import Dict, Any
 from src.agents.sub_writing_agent.writing_chatGroup import create_writing_group
+from src.agents.sub_writing_agent.writing_budget import SectionBudgetUsage
 from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, TextMessage,StructuredMessage,ModelClientStreamingChunkEvent,ThoughtEvent,ToolCallSummaryMessage,ToolCallExecutionEvent
 from autogen_agentchat.base import TaskResult
 from src.core.state_models import BackToFrontData,ExecutionState
+from src.core.config import config
+from src.tasks.context_compression import compress_context
+from src.utils.log_utils import setup_logger
+from src.utils.token_utils import estimate_tokens
 import asyncio
 
+logger = setup_logger(__name__)
+
+
+def build_shared_context(user_request: str, global_analyse: str) -> str:
+    """各章节共享的写作上下文（用户请求 + 全局分析），放在任务提示词的最前面"""
+    return f"""请根据以下内容完成写作任务：
+用户的请求是：{user_request}
+论文全局分析:
+{global_analyse}
+"""
+
 
 async def parallel_writing_node(state: WritingState) -> Dict[str, Any]:
         """并行执行所有子任务"""
@@ -13,62 +29,83 @@ async def parallel_writing_node(state: WritingState) -> Dict[str, Any]:
         async def run_single_subtask(task: Dict):
             nonlocal state
             """执行单个子任务"""            
-            task_prompt = f"""请根据以下内容完成写作任务：
-                用户的请求是：{task['user_request']}
-                当前写作子任务: {task['section']}
-                论文全局分析: {task['global_analyse']}
-
-                请开始写作：
-            """
+            references = ""
+            if task["retrieved_docs"]:
+                references = "已检索到的参考资料:\n" + "\n".join(str(doc) for doc in task["retrieved_docs"]) + "\n"
+            # 共享的大段上下文在前、各章节不同的内容在后，未压缩时各章节提示词的前缀逐字节相同，可命中服务端的前缀缓存
+            task_prompt = task["context"] + f"""
+当前写作子任务: {task['section']}
+{references}
+请根据以上内容完成当前写作子任务，请开始写作：
+"""
             is_thinking = False
             cur_source = "user"
             # 过滤掉非 writing_agent 的消息，保持界面整洁
             agent_sources = {"writing_agent", "retrieval_agent"}
+            usage = SectionBudgetUsage()
             try:
-                task_group = create_writing_group()
+                # 已预取到资料时跳过开头的检索轮次
+                task_group = create_writing_group(retrieve_first=False if task["retrieved_docs"] else None)
                 task_group.reset()
-                async for chunk in task_group.run_stream(task=task_prompt):  # type: ignore
-                    if isinstance(chunk, TaskResult):
-                        continue
-                    if chunk.source == "user":
-                        continue
-                    if chunk.type == "TextMessage" and chunk.source == "writing_agent":
-                        # 写作结果不应覆盖任务列表 sections ，应写入 writted_sections ，与后续汇总逻辑一致，避免结构被污染。
-                        # state["sections"][task["index"]] = chunk.content
-                        state["writted_sections"][task["index"]].content = chunk.content
-                        continue
-                    # if cur_source != chunk.source:
-                    if cur_source != chunk.source and chunk.source in agent_sources:
-                        cur_source = chunk.source
-                        # self.name未定义，消息来源应来自 chunk.source ，并维持前端展示用的 1-based step 编号，确保显示一致
-                        # str1,str2,str3 = "="*40, self.name, "="*40
-                        str1,str2,str3 = "="*40, chunk.source, "="*40
-                        splitStr = str1+str2+str3+"\n"
-                        # await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"]),state="generating",data=splitStr))
-                        await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"] + 1),state="generating",data=splitStr))
-                    if chunk.type == "ModelClientStreamingChunkEvent":
-                        if '<think>' in chunk.content:
-                            is_thinking = True
-                        elif '</think>' in chunk.content:
-                            is_thinking = False
-                            continue
-                        if not is_thinking:
-                            print(chunk.content,end="")
-                            # 统一前端显示索引为 1-based，避免分段进度显示错位。
-                            # await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"]),state="generating",data=chunk.content))
-                            await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"] + 1),state="generating",data=chunk.content))
-                    if chunk.type == "ToolCallSummaryMessage":
-                        # await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"]),state="generating",data=chunk.content))
-                        await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"] + 1),state="generating",data=chunk.content))
+                # 硬性耗时上限：TimeoutTermination只在新消息到达时检查，单轮调用卡住时由这里中断；
+                # 各稿件到达时已写入writted_sections，超时后保留最新一稿
+                timeout = config.get_float("writing.budget.timeout", 600)
+                try:
+                    async with asyncio.timeout(timeout if timeout > 0 else None):
+                        async for chunk in task_group.run_stream(task=task_prompt):  # type: ignore
+                            if isinstance(chunk, TaskResult):
+                                usage.finish(chunk.stop_reason)
+                                continue
+                            usage.record(chunk)
+                            if chunk.source == "user":
+                                continue
+                            if chunk.type == "TextMessage" and chunk.source == "writing_agent":
+                                # 写作结果不应覆盖任务列表 sections ，应写入 writted_sections ，与后续汇总逻辑一致，避免结构被污染。
+                                # state["sections"][task["index"]] = chunk.content
+                                state["writted_sections"][task["index"]].content = chunk.content
+                                continue
+                            # if cur_source != chunk.source:
+                            if cur_source != chunk.source and chunk.source in agent_sources:
+                                cur_source = chunk.source
+                                # self.name未定义，消息来源应来自 chunk.source ，并维持前端展示用的 1-based step 编号，确保显示一致
+                                # str1,str2,str3 = "="*40, self.name, "="*40
+                                str1,str2,str3 = "="*40, chunk.source, "="*40
+                                splitStr = str1+str2+str3+"\n"
+                                # await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"]),state="generating",data=splitStr))
+                                await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"] + 1),state="generating",data=splitStr))
+                            if chunk.type == "ModelClientStreamingChunkEvent":
+                                if '<think>' in chunk.content:
+                                    is_thinking = True
+                                elif '</think>' in chunk.content:
+                                    is_thinking = False
+                                    continue
+                                if not is_thinking:
+                                    print(chunk.content,end="")
+                                    # 统一前端显示索引为 1-based，避免分段进度显示错位。
+                                    # await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"]),state="generating",data=chunk.content))
+                                    await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"] + 1),state="generating",data=chunk.content))
+                            if chunk.type == "ToolCallSummaryMessage":
+                                # await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"]),state="generating",data=chunk.content))
+                                await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"] + 1),state="generating",data=chunk.content))
+
+                except TimeoutError:
+                    usage.finish(f"写作耗时超过 {timeout:.0f}s，采用最新稿件")
+                    logger.warning(f"章节 {task['index'] + 1} 写作超时，采用最新稿件")
 
+                # 上报本节的预算使用情况
+                logger.info(f"章节 {task['index'] + 1} 写作结束: {usage.summary()}")
+                await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"] + 1),state="generating",data=f"\n本节预算使用：{usage.summary()}\n"))
                 # 补发completed结束撰写部分
                 await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"] + 1),state="completed",data=None))
             except Exception as e:
+                usage.finish(f"异常：{e}")
+                logger.error(f"章节 {task['index'] + 1} 写作失败: {usage.summary()}")
                 # 此处应该有重试机制
                 # 异常上报使用 1-based step，避免 UI 误标分段编号。
                 # await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"]),state="error",data=f"Section writing failed: {str(e)}"))
                 await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(task["index"] + 1),state="error",data=f"Section writing failed: {str(e)}"))
                 # return state
+            return usage
         
         # 并行执行所有子任务
         # 预先初始化写作结果槽位，避免并行写入时访问不存在的索引导致越界。
@@ -76,22 +113,43 @@ async def parallel_writing_node(state: WritingState) -> Dict[str, Any]:
         global_analyse = state["global_analysis"]
         user_request = state["user_request"]
         sections = state["sections"]
+        retrieved_docs = state.get("retrieved_docs") or []
         if state.get("writted_sections") is None or len(state["writted_sections"]) != len(sections):
             # state["writted_sections"] = [None for _ in sections]
             state["writted_sections"] = [SectionState() for _ in sections]
+        # 可选的上下文压缩：每个章节只保留全局分析中与小节相关的段落
+        compress = config.get_bool("writing.context_compression.enabled", False)
+        max_context_tokens = config.get_int("writing.context_compression.max_tokens", 3000)
+        shared_context = build_shared_context(user_request, global_analyse)
+        full_tokens = estimate_tokens(shared_context)
         subtasks = []
         for i in range(len(sections)):
+            context = shared_context
+            if compress:
+                context = build_shared_context(user_request, compress_context(global_analyse or "", sections[i], max_context_tokens))
             await state_queue.put(BackToFrontData(step=ExecutionState.SECTION_WRITING+"_"+str(i+1),state="initializing",data=None))
             dic = {
                 "user_request": user_request,
                 "global_analyse": global_analyse,
                 "section": sections[i],
+                "context": context,
+                "retrieved_docs": retrieved_docs[i] if i < len(retrieved_docs) else [],
                 # 列表下标为 0-based，使用 i+1 会导致 list assignment index out of range
                 # "index": i+1
                 "index": i
             }
             subtasks.append(dic)
         tasks = [run_single_subtask(task) for task in subtasks]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        usages = await asyncio.gather(*tasks, return_exceptions=True)
+
+        if compress:
+            # 任务消息在每一轮智能体发言时都会随对话历史发送给模型，节省量 = 每个章节少发送的token数 × 该章节的发言轮数
+            saved_tokens = 0
+            for task, usage in zip(subtasks, usages):
+                turns = max(usage.messages - 1, 1) if isinstance(usage, SectionBudgetUsage) else 1
+                saved_tokens += (full_tokens - estimate_tokens(task["context"])) * turns
+            logger.info(f"上下文压缩: 共享上下文 {full_tokens} tokens，本次写作共节省约 {saved_tokens} 个提示词tokens")
+        else:
+            logger.info(f"共享上下文 {full_tokens} tokens 位于 {len(sections)} 个章节提示词的开头，前缀逐字节相同")
         
         return state
@@ -0,0 +1,47 @@
+import asyncio
+import re
+from typing import Any, Dict, List
+
+from src.agents.sub_writing_agent.writing_state_models import WritingState
+from src.core.config import config
+from src.services.retrieval_cache import retrieval_cache
+from src.services.retrieval_tool import retrieval_tool
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 小节格式为"[序号] [小节标题] ([详细描述和写作要点])"
+SECTION_PATTERN = re.compile(r"^\s*(?:\d+(?:\.\d+)*\.?\s*)?(?P<title>[^(（]*)(?:[(（](?P<desc>.*)[)）])?", re.S)
+
+
+def section_queries(section: str) -> List[str]:
+    """由小节标题和写作要点生成检索查询：标题一条，标题加写作要点一条"""
+    match = SECTION_PATTERN.match(section)
+    title = (match.group("title") or "").strip()
+    description = (match.group("desc") or "").strip()
+    queries = [title, f"{title} {description}".strip()] if description else [title or section.strip()]
+    return [query for query in dict.fromkeys(queries) if query]
+
+
+async def retrieval_prefetch_node(state: WritingState) -> Dict[str, Any]:
+    """检索预取节点：在各章节写作开始前一次性并发检索所有小节的资料，注入写作任务
+
+    各章节的查询经过共享的检索缓存，重复查询只检索一次；写作过程中检索智能体的临时查询也会命中该缓存。
+    """
+    sections = state.get("sections") or []
+    if not config.get_bool("writing.prefetch.enabled", True) or not sections:
+        return {"retrieved_docs": [[] for _ in sections]}
+    max_docs = config.get_int("writing.prefetch.max_docs", 8)
+
+    async def prefetch(section: str) -> List[Any]:
+        try:
+            results = await retrieval_tool(section_queries(section))
+            return results[:max_docs] if isinstance(results, list) else []
+        except Exception as e:
+            logger.error(f"小节资料预取失败（{section[:30]}）: {e}")
+            return []
+
+    retrieved_docs = await asyncio.gather(*[prefetch(section) for section in sections])
+    logger.info(f"检索预取完成: {len(sections)} 个小节，共 {sum(len(docs) for docs in retrieved_docs)} 条资料，"
+                f"检索缓存 {retrieval_cache.stats()}")
+    return {"retrieved_docs": list(retrieved_docs)}
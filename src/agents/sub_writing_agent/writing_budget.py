@@ -0,0 +1,106 @@
+import difflib
+import operator
+import time
+from dataclasses import dataclass
+from functools import reduce
+from typing import List, Optional, Sequence
+
+from autogen_agentchat.base import TerminatedException, TerminationCondition
+from autogen_agentchat.conditions import MaxMessageTermination, TimeoutTermination, TokenUsageTermination
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, StopMessage, TextMessage
+
+from src.core.config import config
+
+
+class MinImprovementTermination(TerminationCondition):
+    """
+    修改收敛时终止：写作智能体相邻两稿的改动比例低于min_change时结束对话，采用最新一稿
+
+    改动比例 = 1 - difflib.SequenceMatcher相似度，只比较source为writer的TextMessage。
+    """
+
+    def __init__(self, min_change: float, writer: str = "writing_agent") -> None:
+        self.min_change = min_change
+        self.writer = writer
+        self._last_draft: Optional[str] = None
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> StopMessage | None:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if not isinstance(message, TextMessage) or message.source != self.writer:
+                continue
+            previous, self._last_draft = self._last_draft, message.content
+            if previous is None:
+                continue
+            change = 1 - difflib.SequenceMatcher(None, previous, message.content).ratio()
+            if change < self.min_change:
+                self._terminated = True
+                return StopMessage(content=f"修改幅度 {change:.1%} 低于 {self.min_change:.0%}，采用当前稿件",
+                                   source="MinImprovementTermination")
+        return None
+
+    async def reset(self) -> None:
+        self._last_draft = None
+        self._terminated = False
+
+
+def create_budget_termination() -> Optional[TerminationCondition]:
+    """
+    按writing.budget配置构建单个章节写作的预算终止条件：消息数、token数、耗时、修改收敛，任一达到即结束
+
+    值为0的项不限制，全部为0时返回None。
+    """
+    conditions: List[TerminationCondition] = []
+    max_messages = config.get_int("writing.budget.max_messages", 12)
+    if max_messages > 0:
+        conditions.append(MaxMessageTermination(max_messages))
+    max_tokens = config.get_int("writing.budget.max_tokens", 60000)
+    if max_tokens > 0:
+        conditions.append(TokenUsageTermination(max_total_token=max_tokens))
+    timeout = config.get_float("writing.budget.timeout", 600)
+    if timeout > 0:
+        conditions.append(TimeoutTermination(timeout))
+    min_improvement = config.get_float("writing.budget.min_improvement", 0.05)
+    if min_improvement > 0:
+        conditions.append(MinImprovementTermination(min_improvement))
+    return reduce(operator.or_, conditions) if conditions else None
+
+
+@dataclass
+class SectionBudgetUsage:
+    """单个章节写作的预算使用情况"""
+    messages: int = 0
+    drafts: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    started: float = 0.0
+    elapsed: float = 0.0
+    stop_reason: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        self.started = self.started or time.monotonic()
+
+    def record(self, message: BaseAgentEvent | BaseChatMessage) -> None:
+        if isinstance(message, BaseChatMessage):
+            self.messages += 1
+            if isinstance(message, TextMessage) and message.source == "writing_agent":
+                self.drafts += 1
+        usage = getattr(message, "models_usage", None)
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens
+
+    def finish(self, stop_reason: Optional[str]) -> None:
+        self.elapsed = time.monotonic() - self.started
+        self.stop_reason = stop_reason
+
+    def summary(self) -> str:
+        return (f"消息 {self.messages} 条，稿件 {self.drafts} 版，"
+                f"token {self.prompt_tokens + self.completion_tokens}（输入 {self.prompt_tokens}，输出 {self.completion_tokens}），"
+                f"用时 {self.elapsed:.1f}s，结束原因：{self.stop_reason or '未知'}")
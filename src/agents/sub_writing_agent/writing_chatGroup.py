@@ -1,24 +1,82 @@
+from typing import Optional, Sequence
 from src.core.model_client import create_default_client
 from autogen_agentchat.teams import SelectorGroupChat
-from autogen_agentchat.conditions import TextMentionTermination
+from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage
 from src.agents.sub_writing_agent.writing_agent import create_writing_agent
 from src.agents.sub_writing_agent.retrieval_agent import create_retrieval_agent
 from src.agents.sub_writing_agent.review_agent import create_review_agent
+from src.agents.sub_writing_agent.writing_budget import create_budget_termination
+from src.core.config import config
 from src.core.prompts import selector_prompt
 
-def create_writing_group():
+# 固定发言协议中每个发言者之后的下一位：检索 → 写作 → 审查 → 写作（修改）→ 审查 ...
+PROTOCOL_TRANSITIONS = {
+    "retrieval_agent": "writing_agent",
+    "writing_agent": "review_agent",
+    "review_agent": "writing_agent",
+}
+
+
+def protocol_selector(retrieve_first: bool = True):
+    """
+    返回按固定协议选择下一位发言者的selector_func，不调用大模型
+
+    任务消息之后先检索（retrieve_first为False时直接写作），之后按PROTOCOL_TRANSITIONS轮转；
+    审查通过（APPROVE）或修改次数用尽由终止条件结束对话。
+    """
+    def select(messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> Optional[str]:
+        # 只看对话消息，忽略工具调用等事件
+        speakers = [message.source for message in messages if isinstance(message, BaseChatMessage)]
+        last = speakers[-1] if speakers else "user"
+        if last not in PROTOCOL_TRANSITIONS:
+            return "retrieval_agent" if retrieve_first else "writing_agent"
+        return PROTOCOL_TRANSITIONS[last]
+    return select
+
+
+def protocol_max_messages(max_rewrites: int, retrieve_first: bool = True) -> int:
+    """固定协议下对话的消息数上限：任务 + 检索 + 初稿 + 每次修改的(审查 + 修改)，最后一次修改后不再审查"""
+    return 1 + int(retrieve_first) + 1 + 2 * max_rewrites
+
+
+def create_writing_group(retrieve_first: Optional[bool] = None):
+    """
+    创建单个章节的写作小组
+
+    参数:
+        retrieve_first: 固定协议下写作前是否先检索，None时读取writing.team.retrieve_first配置
+                        （已预取到资料的章节传False，跳过开头的检索轮次）
+    """
     model_client = create_default_client()
 
-    text_termination = TextMentionTermination("APPROVE")
-    
+    # 审查通过或章节预算（消息数、token数、耗时、修改收敛）耗尽时结束
+    termination = TextMentionTermination("APPROVE")
+    budget = create_budget_termination()
+    if budget is not None:
+        termination = termination | budget
+
     writing_agent = create_writing_agent()
     review_agent = create_review_agent()
     retrieval_agent = create_retrieval_agent()
 
+    if config.get("writing.team.mode", "protocol") == "protocol":
+        # 固定协议：发言顺序确定，省去每轮一次选择发言者的大模型调用
+        if retrieve_first is None:
+            retrieve_first = config.get_bool("writing.team.retrieve_first", True)
+        max_rewrites = config.get_int("writing.team.max_rewrites", 2)
+        return SelectorGroupChat(
+            [writing_agent,retrieval_agent,review_agent],
+            model_client=model_client,
+            termination_condition=termination | MaxMessageTermination(protocol_max_messages(max_rewrites, retrieve_first)),
+            selector_func=protocol_selector(retrieve_first),
+            allow_repeated_speaker=False,
+        )
+
     task_group = SelectorGroupChat(
         [writing_agent,retrieval_agent,review_agent],
         model_client=model_client,
-        termination_condition=text_termination,
+        termination_condition=termination,
         selector_prompt=selector_prompt,
         allow_repeated_speaker=False,  # Allow an agent to speak multiple turns in a row.
     )
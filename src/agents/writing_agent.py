@@ -11,6 +11,7 @@ from src.core.state_models import State
 # from src.agents.sub_writing_agent import writing_director_agent, parallel_writing_node
 from src.agents.sub_writing_agent.parallel_writing_node import parallel_writing_node
 from src.agents.sub_writing_agent.writing_director_agent import writing_director_node
+from src.agents.sub_writing_agent.retrieval_prefetch_node import retrieval_prefetch_node
 # from src.agents.sub_writing_agent.writing_agent import section_writing_node
 from src.agents.sub_writing_agent.writing_agent import create_writing_agent
 # from src.agents.sub_writing_agent.retrieval_agent import retrieval_node
@@ -31,13 +32,15 @@ class WritingWorkflow:
 
         # 添加节点
         builder.add_node("writing_director_node", writing_director_node)
+        builder.add_node("retrieval_prefetch_node", retrieval_prefetch_node)
         builder.add_node("parallel_writing_node", parallel_writing_node)
 
         # 设置入口点
         builder.set_entry_point("writing_director_node")
 
         # 添加边
-        builder.add_edge("writing_director_node", "parallel_writing_node")
+        builder.add_edge("writing_director_node", "retrieval_prefetch_node")
+        builder.add_edge("retrieval_prefetch_node", "parallel_writing_node")
         builder.add_edge("parallel_writing_node", END)
 
         # 编译图
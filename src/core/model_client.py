@@ -121,6 +121,13 @@ def create_model_client(client_type: str) -> OpenAIChatCompletionClient:
         print(f"创建阅读模型客户端失败: {e}，使用默认模型代替")
         return create_default_client()
 
+def get_model_name(client_type: str) -> str:
+    """返回指定模块实际使用的模型标识（提供商/模型名），未配置时为默认模型"""
+    model_config = config.get(client_type, {}) or {}
+    if not model_config.get("model-provider") or not model_config.get("model"):
+        model_config = config.get("default-model", {}) or {}
+    return f"{model_config.get('model-provider', 'siliconflow')}/{model_config.get('model', 'Qwen/Qwen3-32B')}"
+
 def create_embedding_client(client_type: str) -> OpenAI:
     try:
         model_config = config.get(client_type, {})
@@ -202,7 +209,6 @@ def create_cluster_embedding_client() -> OpenAI:
     """创建用于聚类嵌入的模型客户端实例"""
     return create_embedding_client("cluster-embedding-model")
 
-
 # ===================重排序模型===================
 # import json
 
@@ -41,6 +41,14 @@ reading_agent_prompt = """
 
 """
 
+# 批量抽取模式：一次请求包含多篇论文，输出需按paper_id对齐
+reading_agent_batch_prompt = reading_agent_prompt + """【批量抽取要求】
+- 用户一次提供多篇论文（JSON列表），每篇论文都有paper_id字段。
+- 输出格式为 {"papers": [...]}，每篇输入论文对应一个对象，并在对象中原样填写该论文的paper_id字段。
+- 每篇论文只依据其自身的信息抽取，不得混用其他论文的内容；无法抽取的论文也要输出包含paper_id的对象。
+
+"""
+
 clustering_agent_prompt = """
 你是一个专业的学术研究助手，擅长从多篇论文中总结核心主题和关键词。请基于提供的论文信息，生成简洁准确的主题描述和相关性强的关键词。
 """
@@ -71,6 +79,15 @@ deep_analyse_agent_prompt = """
 - 展望未来的改进方向和研究机会
 """
 
+# 分批（map-reduce）深度分析时的合并阶段：把同一聚类各批论文的分析结果整合为一份完整分析
+deep_analyse_reduce_prompt = deep_analyse_agent_prompt + """
+# 合并要求
+你收到的是同一聚类中不同批次论文的分析结果，每份只覆盖该聚类的一部分论文。请将它们整合为一份完整的聚类分析：
+- 仍按上述四个维度组织，不要按批次罗列
+- 合并重复的结论，保留各批次中的具体论文、方法名称、数据集和数值结果
+- 各批次结论存在差异或矛盾时，进行对比说明而不是简单取舍
+"""
+
 global_analyse_agent_prompt = """
 # 角色定位​
 你是一名具备跨领域技术分析能力的专家，擅长基于多主题聚类数据进行全局整合分析，能够精准提炼技术关联、对比方法差异、预判发展趋势，且输出内容逻辑严谨、专业详实。​
@@ -91,6 +108,16 @@ global_analyse_agent_prompt = """
                 
 """
 
+# 渐进式全局分析：把两份主题分析（或阶段性综合）合并为一份精炼的跨主题综合
+global_synthesis_prompt = """
+你是一名跨领域技术分析专家。你会收到两份研究分析材料，每份覆盖一个或多个论文聚类主题（可能是单个主题的深度分析，也可能是之前合并得到的阶段性综合）。
+请将它们合并为一份精炼的跨主题综合，供后续的全局分析使用：
+- 保留每个主题的核心问题、代表性方法（含方法名称）、关键数据集与数值结果、主要局限性
+- 明确指出主题之间的技术交叉点、方法差异和演进关系
+- 不要逐段复述原文，合并重复内容，只保留有分析价值的信息
+- 篇幅控制在 {max_words} 字以内，使用Markdown小标题组织
+"""
+
 retrieval_agent_prompt = """
 您是一位专业的研究助理，擅长生成精确的文献检索查询条件。
 
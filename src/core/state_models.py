@@ -79,8 +79,10 @@ class PaperAgentState(BaseModel):
     # 数据流
     # search_results: List[PaperMetadata] = Field(default_factory=list, description="检索到的论文元数据列表")
     search_results: Optional[List[Dict[str, Any]]] = Field(default_factory=list, description="检索到的论文元数据列表")
+    search_stream: Any = Field(default=None, description="流式检索模式下的论文异步生成器，由阅读节点消费", exclude=True)  # 排除序列化
     paper_contents: Optional[Dict[str, str]] = Field(default_factory=dict, description="解析后的论文全文字典, key: paper_id, value: 文本内容")
     extracted_data: Optional[ExtractedPapersData] = Field(default_factory=list, description="提取后的结构化信息列表")
+    paper_embeddings: Any = Field(default=None, description="阅读阶段生成的论文嵌入矩阵(float32, 与extracted_data.papers一一对应)", exclude=True)  # 排除序列化
     analyse_results: Optional[str] = Field(default=None, description="分析洞察结果")
     outline: Optional[str] = Field(default=None, description="报告大纲")
     writted_sections: Optional[List[str]] = Field(default=None, description="已写章节内容")
@@ -6,7 +6,6 @@ from pathlib import Path
 
 import chromadb
 from chromadb.config import Settings
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 from chromadb.api.types import (
     Embedding,
     PyEmbedding,
@@ -15,12 +14,13 @@ from chromadb.api.types import (
 from src.knowledge.knowledge.base import KnowledgeBase
 from src.knowledge.knowledge.indexing import process_file_to_markdown, process_file_to_json, process_url_to_markdown
 from src.knowledge.knowledge.utils.kb_utils import (
-    get_embedding_config,
+    get_kb_embedding_service,
     prepare_item_metadata,
     split_text_into_chunks,
     split_text_into_qa_chunks,
     validate_img_embedding_file,
 )
+from src.services.embedding_service import ServiceEmbeddingFunction
 from src.utils.datetime_utils import utc_isoformat
 from src.utils.log_utils import setup_logger
 from src.core.config import config
@@ -73,12 +73,7 @@ class ChromaKB(KnowledgeBase):
         if db_id not in self.databases_meta:
             raise ValueError(f"Database {db_id} not found")
 
-        # embed_info = self.databases_meta[db_id].get("embed_info", {})
-        # 先获取原始值（可能是 None、具体值或不存在）
-        embed_info = self.databases_meta[db_id].get("embed_info")
-        # 确保最终值为 {}（如果是 None 或不存在）
-        embed_info = embed_info if embed_info is not None else {}
-
+        embed_info = self._embed_info(db_id)
         embedding_function = self._get_embedding_function(embed_info)
 
         # 创建或获取集合
@@ -109,15 +104,13 @@ class ChromaKB(KnowledgeBase):
         """初始化向量数据库集合（无需特殊初始化）"""
         pass
 
-    def _get_embedding_function(self, embed_info: dict):
-        """获取 embedding 函数"""
-        config_dict = get_embedding_config(embed_info)
+    def _embed_info(self, db_id: str) -> dict:
+        """知识库的嵌入模型信息，未设置时为 {}"""
+        return self.databases_meta[db_id].get("embed_info") or {}
 
-        return OpenAIEmbeddingFunction(
-            model_name=config_dict["model"],
-            api_key=config_dict["api_key"],
-            api_base=config_dict["base_url"].replace("/embeddings", ""),
-        )
+    def _get_embedding_function(self, embed_info: dict):
+        """获取 embedding 函数（所有集合共享同一模型的嵌入服务，并发写入和查询的请求会合并成批）"""
+        return ServiceEmbeddingFunction(get_kb_embedding_service(embed_info))
 
     async def _get_chroma_collection(self, db_id: str):
         """获取或创建 ChromaDB 集合"""
@@ -327,6 +320,7 @@ class ChromaKB(KnowledgeBase):
             logger.info(f"成功将 {len(batch_ids)} 个项 插入到临时知识库中")
         except Exception as e:
             logger.error(f"错误处理{len(batch_ids)} 个项 插入到临时知识库中，失败: {e}, {traceback.format_exc()}")
+            raise
 
     async def add_content(self, db_id: str, items: list[str], params: dict | None) -> list[dict]:
         """添加内容（文件/URL）"""
@@ -512,8 +506,12 @@ class ChromaKB(KnowledgeBase):
             else:
                 # 一行完成类型转换：如果是字符串转列表，否则保留列表（空值则转空列表）
                 query_texts = [query_text] if isinstance(query_text, str) else (query_text or [])
-                text_query_results = collection.query(           
-                    query_texts=query_texts, n_results=top_k, include=["documents", "metadatas", "distances"]
+                # 查询文本在事件循环中异步嵌入，与其他并发查询的嵌入合并成批；
+                # 同步的向量检索放到工作线程中执行，避免阻塞事件循环
+                query_embeddings = await self._get_embedding_function(self._embed_info(db_id)).aembed(query_texts)
+                text_query_results = await asyncio.to_thread(
+                    collection.query,
+                    query_embeddings=query_embeddings, n_results=top_k, include=["documents", "metadatas", "distances"]
                 )
 
             documents = []
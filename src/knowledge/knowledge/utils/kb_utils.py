@@ -7,6 +7,7 @@ import json
 from langchain_text_splitters import MarkdownTextSplitter
 
 from src.core.config import config
+from src.services.embedding_service import EmbeddingService, get_embedding_service
 from src.utils import hashstr
 from src.utils.datetime_utils import utc_isoformat
 from src.utils.log_utils import setup_logger
@@ -236,6 +237,19 @@ def get_embedding_config(embed_info: dict) -> dict:
     logger.debug(f"Embedding config: {config_dict}")
     return config_dict
 
+def get_kb_embedding_service(embed_info: dict) -> EmbeddingService:
+    """
+    获取知识库集合使用的共享嵌入服务
+
+    集合的嵌入函数与在写入前预先计算嵌入的调用方都通过该函数获取服务，保证向量来自同一模型。
+    """
+    config_dict = get_embedding_config(embed_info)
+    return get_embedding_service(
+        model=config_dict["model"],
+        api_key=config_dict["api_key"],
+        base_url=config_dict["base_url"].replace("/embeddings", ""),
+    )
+
 def validate_img_embedding_file(file_path: str) -> bool:
                 
     # 校验文件格式
@@ -0,0 +1,256 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List, Optional
+
+import arxiv
+import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from src.core.config import config
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 可重试的HTTP状态码：限流(429)和服务端临时故障
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ArxivAPIError(Exception):
+    """arXiv API请求失败"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code is None or self.status_code in RETRYABLE_STATUS
+
+
+class TokenBucket:
+    """线程安全的令牌桶限速器
+
+    令牌允许透支：每个调用方预约一个令牌后在锁外等待，多个线程按预约顺序依次放行。
+    """
+
+    def __init__(self, interval: float, capacity: int = 1):
+        """
+        参数:
+            interval: 每生成一个令牌的间隔秒数
+            capacity: 桶容量，即允许的突发请求数
+        """
+        self.interval = interval
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) / self.interval)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """取得一个令牌，必要时阻塞等待，返回等待的秒数"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            wait = -self._tokens * self.interval if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def defer(self, seconds: float) -> None:
+        """服务端要求退避时，推迟所有调用方的下一次请求"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds / self.interval
+
+
+def result_from_entry(entry: feedparser.FeedParserDict) -> arxiv.Result:
+    """
+    把Atom feed中的一条检索结果转换为arxiv.Result（只使用arxiv库的公开构造函数）
+
+    缺少id、时间或作者等必需字段时抛出ValueError。
+    """
+    missing = [name for name in ("id", "updated_parsed", "published_parsed", "authors") if not entry.get(name)]
+    if missing:
+        raise ValueError(f"缺少字段 {', '.join(missing)}")
+    return arxiv.Result(
+        entry_id=entry.id,
+        updated=datetime(*entry.updated_parsed[:6], tzinfo=timezone.utc),
+        published=datetime(*entry.published_parsed[:6], tzinfo=timezone.utc),
+        title=" ".join(entry.get("title", "0").split()),
+        authors=[arxiv.Result.Author(author.get("name", "")) for author in entry.authors],
+        summary=entry.get("summary", ""),
+        comment=entry.get("arxiv_comment"),
+        journal_ref=entry.get("arxiv_journal_ref"),
+        doi=entry.get("arxiv_doi"),
+        primary_category=(entry.get("arxiv_primary_category") or {}).get("term"),
+        categories=[tag.get("term") for tag in entry.get("tags", [])],
+        links=[arxiv.Result.Link(href=link.href, title=link.get("title"), rel=link.get("rel") or "",
+                                 content_type=link.get("type"))
+               for link in entry.get("links", [])],
+    )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头，支持秒数和HTTP日期两种格式"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class ArxivClient:
+    """进程内共享的arXiv API客户端
+
+    所有检索会话共用同一个令牌桶和连接池，保证整个进程的请求间隔符合arXiv的要求；
+    遇到429/503等错误时按指数退避加随机抖动重试，并遵循服务端返回的Retry-After。
+    重试以页为单位，翻页过程中某一页失败不会导致前面的页重新下载。
+    """
+
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 delay_seconds: Optional[float] = None,
+                 num_retries: Optional[int] = None,
+                 backoff_max: Optional[float] = None,
+                 timeout: Optional[float] = None,
+                 pool_maxsize: Optional[int] = None):
+        """
+        初始化arXiv客户端
+
+        参数:
+            base_url: API地址，默认读取paper_search.api_url配置
+            delay_seconds: 相邻请求的最小间隔，默认读取paper_search.delay_seconds配置（arXiv要求不低于3秒）
+            num_retries: 单页请求失败后的最大重试次数，默认读取paper_search.num_retries配置
+            backoff_max: 单次退避的最长等待秒数，默认读取paper_search.backoff_max配置
+            timeout: 单次请求超时秒数，默认读取paper_search.request_timeout配置
+            pool_maxsize: 连接池大小，默认读取paper_search.pool_maxsize配置
+        """
+        self.base_url = base_url or config.get("paper_search.api_url", "https://export.arxiv.org/api/query")
+        delay_seconds = delay_seconds if delay_seconds is not None else config.get_float("paper_search.delay_seconds", 3.0)
+        self.num_retries = num_retries if num_retries is not None else config.get_int("paper_search.num_retries", 3)
+        self.backoff_max = backoff_max if backoff_max is not None else config.get_float("paper_search.backoff_max", 60.0)
+        self.timeout = timeout if timeout is not None else config.get_float("paper_search.request_timeout", 30.0)
+        pool_maxsize = pool_maxsize if pool_maxsize is not None else config.get_int("paper_search.pool_maxsize", 4)
+
+        self.bucket = TokenBucket(delay_seconds) if delay_seconds > 0 else None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @staticmethod
+    def _should_retry(error: BaseException) -> bool:
+        if isinstance(error, ArxivAPIError):
+            return error.retryable
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    def _wait(self, retry_state) -> float:
+        """指数退避加随机抖动，服务端给出Retry-After时至少等待该时长"""
+        wait = wait_random_exponential(multiplier=1, max=self.backoff_max)(retry_state)
+        error = retry_state.outcome.exception()
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            wait = max(wait, min(retry_after, self.backoff_max))
+        return wait
+
+    @staticmethod
+    def _log_retry(retry_state) -> None:
+        logger.warning(f"arXiv请求失败，{retry_state.next_action.sleep:.1f}秒后进行第{retry_state.attempt_number}次重试: "
+                       f"{retry_state.outcome.exception()}")
+
+    def _request_page(self, params: Dict, first_page: bool) -> feedparser.FeedParserDict:
+        if self.bucket is not None:
+            self.bucket.acquire()
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        if response.status_code != requests.codes.ok:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code in (429, 503) and self.bucket is not None:
+                # 限流对整个进程生效，让其他会话的请求一起退避
+                self.bucket.defer(retry_after if retry_after is not None else self.bucket.interval)
+            raise ArxivAPIError(f"HTTP {response.status_code}: {response.url}", response.status_code, retry_after)
+
+        feed = feedparser.parse(response.content)
+        if not feed.entries and not first_page:
+            # arXiv偶尔在翻页时返回空页，按临时故障重试
+            raise ArxivAPIError(f"意外的空页: {response.url}")
+        return feed
+
+    def fetch_page(self, params: Dict, first_page: bool = True) -> feedparser.FeedParserDict:
+        """请求一页检索结果，失败时按页重试"""
+        retrying = Retrying(
+            stop=stop_after_attempt(self.num_retries + 1),
+            wait=self._wait,
+            retry=retry_if_exception(self._should_retry),
+            before_sleep=self._log_retry,
+            reraise=True,
+        )
+        return retrying(self._request_page, params, first_page)
+
+    def iter_pages(self,
+                   search_query: str,
+                   max_results: int,
+                   page_size: int,
+                   sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+                   sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending,
+                   stop_event: Optional[threading.Event] = None) -> Iterator[List[arxiv.Result]]:
+        """
+        逐页检索，每下载完一页就产出该页的结果
+
+        参数:
+            search_query: arXiv检索语句
+            max_results: 最大返回结果数量
+            page_size: 每页请求的结果数量
+            stop_event: 设置后在下一页开始前停止翻页
+        """
+        start, total = 0, None
+        while start < max_results and (stop_event is None or not stop_event.is_set()):
+            params = {
+                "search_query": search_query,
+                "sortBy": sort_by.value,
+                "sortOrder": sort_order.value,
+                "start": start,
+                "max_results": min(page_size, max_results - start),
+            }
+            feed = self.fetch_page(params, first_page=start == 0)
+            if not feed.entries:
+                break
+            if total is None:
+                total = int(feed.feed.get("opensearch_totalresults", 0))
+
+            page = []
+            for entry in feed.entries:
+                try:
+                    page.append(result_from_entry(entry))
+                except ValueError as e:
+                    logger.warning(f"跳过字段不完整的检索结果: {e}")
+            yield page
+
+            start += len(feed.entries)
+            if start >= total:
+                break
+
+
+_arxiv_client: Optional[ArxivClient] = None
+_arxiv_client_lock = threading.Lock()
+
+
+def get_arxiv_client() -> ArxivClient:
+    """返回进程内共享的arXiv客户端（首次使用时创建），所有检索会话共用同一个限速器和连接池"""
+    global _arxiv_client
+    with _arxiv_client_lock:
+        if _arxiv_client is None:
+            _arxiv_client = ArxivClient()
+        return _arxiv_client
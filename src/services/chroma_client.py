@@ -4,8 +4,7 @@ import chromadb
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
 from pathlib import Path
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
-from src.core.config import config
+from src.services.embedding_service import ServiceEmbeddingFunction, create_embedding_service
 
 
 class ChromaClient:
@@ -39,48 +38,10 @@ class ChromaClient:
             embedding_function=self.embedding_function
         )
 
-    def create_embedding_client(self) -> OpenAIEmbeddingFunction:
-        try:
-            model_config = config.get("chroma-embedding-model", {})
-            provider = model_config.get("model-provider")
-            model = model_config.get("model")
-            
-            # 检查是否配置了阅读模型
-            if not provider or not model:
-                return self.create_default_embedding_client()
-
-            provider_config = config.get(provider)
-
-            # 如果未提供参数，则使用配置中的默认值
-            api_key = provider_config.get("api_key")
-            base_url = provider_config.get("base_url")
-
-            return OpenAIEmbeddingFunction(
-                    model_name=model,
-                    api_key=api_key,
-                    api_base=base_url,
-                )
-            
-            
-        except Exception as e:
-            print(f"创建嵌入模型客户端失败: {e}，使用默认模型代替")
-            return self.create_default_embedding_client()
-
-    def create_default_embedding_client() -> OpenAIEmbeddingFunction:
-        default_model_config = config.get("default-embedding-model", {})
-        provider = default_model_config.get("model-provider", "siliconflow")
-        model = default_model_config.get("model", "Qwen/Qwen3-Embedding-8B")
-        provider_config = config.get(provider)
-
-        # 如果未提供参数，则使用配置中的默认值
-        api_key = provider_config.get("api_key")
-        base_url = provider_config.get("base_url")
+    def create_embedding_client(self) -> ServiceEmbeddingFunction:
+        """使用共享嵌入服务的嵌入函数，未配置chroma-embedding-model时使用默认嵌入模型"""
+        return ServiceEmbeddingFunction(create_embedding_service("chroma-embedding-model"))
 
-        return OpenAIEmbeddingFunction(
-                model_name=model,
-                api_key=api_key,
-                api_base=base_url,
-            )
     def add_documents(self, 
                      documents: List[str], 
                      metadatas: Optional[List[dict]] = None, 
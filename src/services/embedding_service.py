@@ -0,0 +1,251 @@
+import asyncio
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from openai import NOT_GIVEN, AsyncOpenAI
+
+from src.core.config import config
+from src.utils.log_utils import setup_logger
+from src.utils.token_utils import estimate_tokens
+
+logger = setup_logger(__name__)
+
+
+class EmbeddingService:
+    """进程内共享的动态微批嵌入服务
+
+    各处的嵌入请求（同步或异步，来自任意线程）提交到服务自己的后台事件循环，
+    在max_wait毫秒的窗口内合并成不超过max_batch_size条、max_batch_tokens个token的批次，
+    批内相同的文本只请求一次，并通过连接池复用HTTP连接。
+    """
+
+    def __init__(self,
+                 model: str,
+                 api_key: str,
+                 base_url: str,
+                 dimension: Optional[int] = None,
+                 max_batch_size: Optional[int] = None,
+                 max_batch_tokens: Optional[int] = None,
+                 max_wait: Optional[int] = None,
+                 max_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        """
+        初始化嵌入服务
+
+        参数:
+            model: 嵌入模型名称
+            api_key: API密钥
+            base_url: OpenAI兼容接口的基础URL
+            dimension: 请求的向量维度，None表示使用模型默认维度
+            max_batch_size: 单次请求的最大文本数，默认读取embedding_service.max_batch_size配置
+            max_batch_tokens: 单次请求的最大token数，默认读取embedding_service.max_batch_tokens配置
+            max_wait: 攒批窗口（毫秒），默认读取embedding_service.max_wait配置
+            max_concurrency: 同时进行的请求数上限，默认读取embedding_service.max_concurrency配置
+            timeout: 单次请求超时（秒），默认读取embedding_service.request_timeout配置
+        """
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
+        self.dimension = dimension or None
+        self.max_batch_size = max_batch_size or config.get_int("embedding_service.max_batch_size", 10)
+        self.max_batch_tokens = max_batch_tokens or config.get_int("embedding_service.max_batch_tokens", 8000)
+        wait = max_wait if max_wait is not None else config.get_int("embedding_service.max_wait", 20)
+        self.max_wait = wait / 1000
+        self.max_concurrency = max_concurrency or config.get_int("embedding_service.max_concurrency", 4)
+        self.timeout = timeout or config.get_float("embedding_service.request_timeout", 60)
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._carry: Optional[Tuple[str, asyncio.Future]] = None
+        # 统计：提交的文本数、去重后实际请求的文本数、请求次数
+        self.submitted = 0
+        self.embedded = 0
+        self.requests = 0
+
+    @property
+    def model_key(self) -> str:
+        """模型标识（服务地址 + 模型名），用作嵌入向量缓存键的一部分"""
+        return f"{httpx.URL(self.base_url).host}/{self.model}"
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """首次使用时启动后台事件循环线程"""
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+                thread = threading.Thread(target=self._run_loop, args=(ready,), name=f"embedding-{self.model}", daemon=True)
+                thread.start()
+                ready.wait()
+            return self._loop
+
+    def _run_loop(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_concurrency * 2,
+                                    max_keepalive_connections=self.max_concurrency),
+                timeout=self.timeout,
+            ),
+        )
+        loop.create_task(self._batch_loop())
+        self._loop = loop
+        ready.set()
+        loop.run_forever()
+
+    async def _submit(self, texts: List[str]) -> List[List[float]]:
+        """在服务事件循环中运行：把文本逐条放入队列并等待结果"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._queue.put_nowait((text, future))
+            futures.append(future)
+        self.submitted += len(texts)
+        return list(await asyncio.gather(*futures))
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """同步获取嵌入向量，可在任意线程中调用（不能在服务自己的事件循环中调用）"""
+        if not texts:
+            return []
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._submit(list(texts)), loop).result()
+
+    async def aembed(self, texts: Sequence[str]) -> List[List[float]]:
+        """异步获取嵌入向量，可在任意事件循环中调用"""
+        if not texts:
+            return []
+        loop = self._ensure_loop()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._submit(list(texts)), loop))
+
+    async def _next_item(self, timeout: Optional[float]) -> Optional[Tuple[str, asyncio.Future]]:
+        if self._carry is not None:
+            item, self._carry = self._carry, None
+            return item
+        if timeout is None:
+            return await self._queue.get()
+        if timeout <= 0:
+            return self._queue.get_nowait() if not self._queue.empty() else None
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _batch_loop(self) -> None:
+        """攒批：窗口到期、文本数或token数达到上限时发出一次请求"""
+        loop = asyncio.get_running_loop()
+        while True:
+            text, future = await self._next_item(None)
+            # 文本 -> 等待该文本结果的所有future（批内去重）
+            batch: Dict[str, List[asyncio.Future]] = {text: [future]}
+            tokens = estimate_tokens(text)
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                item = await self._next_item(deadline - loop.time())
+                if item is None:
+                    break
+                text, future = item
+                if text in batch:
+                    batch[text].append(future)
+                    continue
+                cost = estimate_tokens(text)
+                if tokens + cost > self.max_batch_tokens:
+                    # 超出token上限的文本留到下一批
+                    self._carry = item
+                    break
+                batch[text] = [future]
+                tokens += cost
+            await self._semaphore.acquire()
+            loop.create_task(self._send(batch))
+
+    async def _send(self, batch: Dict[str, List[asyncio.Future]]) -> None:
+        texts = list(batch)
+        try:
+            response = await self._client.embeddings.create(
+                model=self.model,
+                input=texts,
+                dimensions=self.dimension or NOT_GIVEN,
+                encoding_format="float",
+            )
+            vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            if len(vectors) != len(texts):
+                raise ValueError(f"嵌入结果数量不一致: 请求 {len(texts)} 条，返回 {len(vectors)} 条")
+            self.requests += 1
+            self.embedded += len(texts)
+            for text, vector in zip(texts, vectors):
+                for future in batch[text]:
+                    if not future.done():
+                        future.set_result(vector)
+        except Exception as e:
+            logger.error(f"嵌入请求失败（模型 {self.model}，{len(texts)} 条文本）: {e}")
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+        finally:
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {"submitted": self.submitted, "embedded": self.embedded, "requests": self.requests}
+
+
+class ServiceEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Chroma集合使用的嵌入函数，把嵌入请求转交给共享的EmbeddingService
+
+    Chroma同步调用__call__并阻塞等待结果，应只在工作线程中触发（如asyncio.to_thread中的collection.add）；
+    事件循环中的调用方使用aembed，等待期间不阻塞事件循环，并发请求也能合并成批。
+    """
+
+    def __init__(self, service: EmbeddingService):
+        self.service = service
+
+    def __call__(self, input: Documents) -> Embeddings:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            logger.warning(f"在事件循环中同步生成嵌入（{len(input)} 条文本）会阻塞事件循环，请改用aembed")
+        return [np.asarray(vector, dtype=np.float32) for vector in self.service.embed(list(input))]
+
+    async def aembed(self, input: Documents) -> Embeddings:
+        return [np.asarray(vector, dtype=np.float32) for vector in await self.service.aembed(list(input))]
+
+
+_services: Dict[Tuple[str, str, Optional[int]], EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model: str, api_key: str, base_url: str, dimension: Optional[int] = None) -> EmbeddingService:
+    """返回(服务地址, 模型, 维度)对应的共享嵌入服务，不存在时创建"""
+    key = (base_url.rstrip("/"), model, dimension or None)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = EmbeddingService(model=model, api_key=api_key, base_url=base_url, dimension=dimension)
+            _services[key] = service
+        return service
+
+
+def create_embedding_service(client_type: str, dimension: Optional[int] = None) -> EmbeddingService:
+    """按models.yaml中client_type的配置返回共享嵌入服务，未配置时使用默认嵌入模型"""
+    model_config = config.get(client_type, {}) or {}
+    if not model_config.get("model-provider") or not model_config.get("model"):
+        logger.warning(f"警告：未配置{client_type}模型，使用默认模型代替")
+        model_config = config.get("default-embedding-model", {}) or {}
+    provider_config = config.get(model_config.get("model-provider", "siliconflow")) or {}
+    return get_embedding_service(
+        model=model_config.get("model", "Qwen/Qwen3-Embedding-8B"),
+        api_key=provider_config.get("api_key"),
+        base_url=provider_config.get("base_url"),
+        dimension=dimension,
+    )
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.config import config
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+AsyncEmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def text_hash(text: str) -> str:
+    """文本的SHA-256哈希，作为嵌入向量的缓存键"""
+    return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+class EmbeddingStore:
+    """持久化的嵌入向量存储，进程内所有组件共享
+
+    - SQLite索引：(文本哈希, 模型, 请求维度) -> 向量所在的行号；
+    - 向量文件：每个(模型, 请求维度)一个只追加的float32文件，按行号用NumPy memmap读取。
+
+    追加时在SQLite的写事务内确定行号并写入向量文件，多个进程同时写入也不会冲突；
+    事务提交前进程退出时，文件末尾未登记的数据会在下次追加时被覆盖。
+    """
+
+    def __init__(self, store_dir: Optional[str] = None):
+        """
+        初始化嵌入向量存储
+
+        参数:
+            store_dir: 存储目录，默认为SAVE_DIR/embedding_store
+        """
+        self.store_dir = store_dir or os.path.join(config.get("SAVE_DIR"), "embedding_store")
+        self.db_path = os.path.join(self.store_dir, "index.db")
+        self._lock = threading.Lock()
+        self._memmaps: Dict[str, np.memmap] = {}
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS vector_files (
+                    model TEXT NOT NULL,
+                    dimension INTEGER NOT NULL,
+                    width INTEGER NOT NULL,
+                    rows INTEGER NOT NULL,
+                    path TEXT NOT NULL,
+                    PRIMARY KEY (model, dimension)
+                );
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    text_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    dimension INTEGER NOT NULL,
+                    row INTEGER NOT NULL,
+                    PRIMARY KEY (text_hash, model, dimension)
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _lookup(self, hashes: Sequence[str], model: str, dimension: int) -> Tuple[Dict[str, int], Optional[Tuple[int, int, str]]]:
+        """返回(命中的 文本哈希 -> 行号, (向量宽度, 已登记行数, 向量文件路径))"""
+        rows: Dict[str, int] = {}
+        with self._connect() as conn:
+            file_info = conn.execute(
+                "SELECT width, rows, path FROM vector_files WHERE model = ? AND dimension = ?", (model, dimension)
+            ).fetchone()
+            unique = list(dict.fromkeys(hashes))
+            # 分批查询，避免超过SQLite的参数个数上限
+            for i in range(0, len(unique), 500):
+                chunk = unique[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows.update(conn.execute(
+                    f"SELECT text_hash, row FROM embeddings WHERE model = ? AND dimension = ? AND text_hash IN ({placeholders})",
+                    (model, dimension, *chunk),
+                ).fetchall())
+        return rows, file_info
+
+    def _memmap(self, path: str, rows: int, width: int) -> np.memmap:
+        """只读打开向量文件，已打开的映射覆盖所需行数时直接复用"""
+        mm = self._memmaps.get(path)
+        if mm is None or mm.shape[0] < rows:
+            mm = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, width))
+            self._memmaps[path] = mm
+        return mm
+
+    def _append(self, hashes: List[str], vectors: np.ndarray, model: str, dimension: int) -> None:
+        """追加向量并登记索引"""
+        width = vectors.shape[1]
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                file_info = conn.execute(
+                    "SELECT width, rows, path FROM vector_files WHERE model = ? AND dimension = ?", (model, dimension)
+                ).fetchone()
+                if file_info is None:
+                    path = os.path.join(self.store_dir, f"{text_hash(model)[:16]}_{dimension}.f32")
+                    start = 0
+                    conn.execute("INSERT INTO vector_files (model, dimension, width, rows, path) VALUES (?, ?, ?, 0, ?)",
+                                 (model, dimension, width, path))
+                else:
+                    stored_width, start, path = file_info
+                    if stored_width != width:
+                        raise ValueError(f"向量维度不一致: 已存储 {stored_width}，本次 {width}")
+
+                mode = "r+b" if os.path.exists(path) else "wb"
+                with open(path, mode) as f:
+                    f.seek(start * width * 4)
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                    f.truncate()
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (text_hash, model, dimension, row) VALUES (?, ?, ?, ?)",
+                    [(h, model, dimension, start + i) for i, h in enumerate(hashes)],
+                )
+                conn.execute("UPDATE vector_files SET rows = ? WHERE model = ? AND dimension = ?",
+                             (start + len(hashes), model, dimension))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _plan(self, texts: Sequence[str], model: str, dimension: int) -> Tuple[List[str], Dict[str, int], List[str]]:
+        """返回(每条文本的哈希, 命中的行号, 去重后未命中的文本)"""
+        hashes = [text_hash(text) for text in texts]
+        rows, _ = self._lookup(hashes, model, dimension)
+        misses: Dict[str, str] = {}
+        for h, text in zip(hashes, texts):
+            if h not in rows and h not in misses:
+                misses[h] = text
+        return hashes, rows, list(misses.values())
+
+    def _store_misses(self, missing_texts: List[str], vectors: List[List[float]], model: str, dimension: int) -> None:
+        if not missing_texts:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.shape[0] != len(missing_texts):
+            raise ValueError(f"嵌入结果数量不一致: 请求 {len(missing_texts)} 条，返回 {matrix.shape[0]} 条")
+        self._append([text_hash(text) for text in missing_texts], matrix, model, dimension)
+        logger.info(f"新生成并缓存 {len(missing_texts)} 条嵌入向量（模型 {model}）")
+
+    def _assemble(self, hashes: List[str], model: str, dimension: int) -> np.ndarray:
+        """按行号从向量文件组装矩阵：行号连续时直接返回memmap切片，否则一次性按索引读取到新矩阵"""
+        rows, file_info = self._lookup(hashes, model, dimension)
+        if not hashes:
+            width = file_info[0] if file_info else 0
+            return np.empty((0, width), dtype=np.float32)
+        width, total_rows, path = file_info
+        with self._lock:
+            mm = self._memmap(path, total_rows, width)
+        index = np.fromiter((rows[h] for h in hashes), dtype=np.int64, count=len(hashes))
+        if index[-1] - index[0] == len(index) - 1 and np.all(np.diff(index) == 1):
+            return mm[index[0]:index[-1] + 1]
+        return np.take(mm, index, axis=0)
+
+    def get_or_embed(self, texts: Sequence[str], model: str, dimension: int, embed_fn: EmbedFn) -> np.ndarray:
+        """
+        返回文本对应的嵌入矩阵，只为缓存中没有的文本调用embed_fn
+
+        参数:
+            model: 嵌入模型标识，作为缓存键的一部分
+            dimension: 请求的向量维度，使用模型默认维度时传0
+            embed_fn: 为一组文本生成嵌入向量的函数
+
+        返回:
+            (len(texts), 向量宽度)的float32矩阵，行顺序与texts一致
+        """
+        hashes, rows, missing_texts = self._plan(texts, model, dimension)
+        if missing_texts:
+            self._store_misses(missing_texts, embed_fn(missing_texts), model, dimension)
+        return self._assemble(hashes, model, dimension)
+
+    async def aget_or_embed(self, texts: Sequence[str], model: str, dimension: int, embed_fn: AsyncEmbedFn) -> np.ndarray:
+        """get_or_embed的异步版本，embed_fn为异步函数，数据库和文件读写在线程中执行"""
+        hashes, rows, missing_texts = await asyncio.to_thread(self._plan, texts, model, dimension)
+        if missing_texts:
+            vectors = await embed_fn(missing_texts)
+            await asyncio.to_thread(self._store_misses, missing_texts, vectors, model, dimension)
+        return await asyncio.to_thread(self._assemble, hashes, model, dimension)
+
+
+_embedding_store: Optional[EmbeddingStore] = None
+_embedding_store_lock = threading.Lock()
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """返回进程内共享的嵌入向量存储，首次使用时创建（此时才建立存储目录和索引数据库）"""
+    global _embedding_store
+    with _embedding_store_lock:
+        if _embedding_store is None:
+            _embedding_store = EmbeddingStore()
+        return _embedding_store
@@ -0,0 +1,247 @@
+import asyncio
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiohttp
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from src.core.config import config
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 可重试的HTTP状态码：限流(429)和服务端临时故障
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# 文件名中不允许出现的字符（旧式arXiv ID中含有"/"，如 hep-th/9901001v1）
+UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+class PdfDownloadError(Exception):
+    """论文PDF下载失败"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code in RETRYABLE_STATUS
+
+
+class PdfStore:
+    """论文PDF下载与本地缓存服务
+
+    - 下载：aiohttp连接池保持长连接，信号量限制同时下载的数量，同一篇论文的并发请求只下载一次；
+    - 缓存：以paper_id（含版本号）作为缓存键保存在SAVE_DIR/pdf_cache下，arXiv同一版本的内容不会变化，
+      写入时先写临时文件再原子替换，避免读到不完整的文件；
+    - 淘汰：超过max_age_days未被访问的文件被删除，总大小超过max_size_mb时按最近访问时间从旧到新删除。
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 max_concurrency: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 max_age: Optional[float] = None,
+                 timeout: Optional[float] = None,
+                 num_retries: Optional[int] = None):
+        """
+        初始化PDF缓存服务
+
+        参数:
+            cache_dir: 缓存目录，默认为SAVE_DIR/pdf_cache
+            max_concurrency: 同时下载的最大数量，默认读取pdf_cache.max_concurrency配置
+            max_bytes: 缓存总大小上限（字节），默认读取pdf_cache.max_size_mb配置
+            max_age: 文件未被访问的最长保留时间（秒），默认读取pdf_cache.max_age_days配置
+            timeout: 单次下载超时（秒），默认读取pdf_cache.request_timeout配置
+            num_retries: 下载失败后的最大重试次数，默认读取pdf_cache.num_retries配置
+        """
+        self.cache_dir = cache_dir or os.path.join(config.get("SAVE_DIR"), "pdf_cache")
+        self.max_concurrency = max_concurrency or config.get_int("pdf_cache.max_concurrency", 4)
+        self.max_bytes = max_bytes if max_bytes is not None else config.get_int("pdf_cache.max_size_mb", 2048) * 1024 * 1024
+        self.max_age = max_age if max_age is not None else config.get_float("pdf_cache.max_age_days", 30) * 86400
+        self.timeout = timeout if timeout is not None else config.get_float("pdf_cache.request_timeout", 60)
+        self.num_retries = num_retries if num_retries is not None else config.get_int("pdf_cache.num_retries", 3)
+        self.evict_interval = 60
+        self._last_evict = 0.0
+        # aiohttp会话、信号量等与事件循环绑定，按事件循环分别创建
+        self._loop = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cache_key(paper_id: str) -> str:
+        """缓存键：规范化后的paper_id（含版本号）"""
+        return UNSAFE_CHARS.sub("_", paper_id)
+
+    def path_for(self, paper_id: str) -> str:
+        """论文PDF在缓存中的路径"""
+        return os.path.join(self.cache_dir, f"{self.cache_key(paper_id)}.pdf")
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._session is not None and not self._session.closed:
+            return
+        self._loop = loop
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._inflight = {}
+
+    async def get(self, paper: Dict) -> Optional[str]:
+        """
+        获取论文PDF的本地路径，缓存中没有时下载
+
+        参数:
+            paper: 检索结果中的论文字典，需包含paper_id和pdf_url
+
+        返回:
+            本地PDF文件路径，下载失败时返回None
+        """
+        paper_id = paper.get("paper_id")
+        pdf_url = paper.get("pdf_url")
+        if not paper_id or not pdf_url:
+            return None
+
+        path = self.path_for(paper_id)
+        if os.path.exists(path):
+            # 更新访问时间，淘汰时按最近访问时间排序
+            os.utime(path)
+            return path
+
+        self._bind_loop()
+        key = self.cache_key(paper_id)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._download(pdf_url, path))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        try:
+            # shield：某个调用方被取消时不影响其他等待同一篇论文的调用方
+            await asyncio.shield(task)
+        except Exception as e:
+            logger.warning(f"论文 {paper_id} 的PDF下载失败: {e}")
+            return None
+
+        if time.time() - self._last_evict > self.evict_interval:
+            await asyncio.to_thread(self.evict)
+        return path
+
+    async def get_many(self, papers: List[Dict]) -> Dict[str, Optional[str]]:
+        """并发获取多篇论文的PDF，返回 paper_id -> 本地路径（失败为None）"""
+        paths = await asyncio.gather(*[self.get(paper) for paper in papers])
+        return {paper.get("paper_id"): path for paper, path in zip(papers, paths)}
+
+    @staticmethod
+    def _should_retry(error: BaseException) -> bool:
+        if isinstance(error, PdfDownloadError):
+            return error.retryable
+        return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError, asyncio.TimeoutError))
+
+    async def _download(self, url: str, path: str) -> None:
+        async with self._semaphore:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(self.num_retries + 1),
+                wait=wait_random_exponential(multiplier=1, max=30),
+                retry=retry_if_exception(self._should_retry),
+                reraise=True,
+            ):
+                with attempt:
+                    await self._fetch_to_file(url, path)
+
+    async def _fetch_to_file(self, url: str, path: str) -> None:
+        tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            async with self._session.get(url) as response:
+                if response.status != 200:
+                    raise PdfDownloadError(f"HTTP {response.status}: {url}", response.status)
+                with open(tmp_path, "wb") as f:
+                    first_chunk = True
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        if first_chunk:
+                            # arXiv在PDF尚未生成时会返回HTML页面
+                            if not chunk.startswith(b"%PDF"):
+                                raise PdfDownloadError(f"响应内容不是PDF: {url}")
+                            first_chunk = False
+                        f.write(chunk)
+                if first_chunk:
+                    raise PdfDownloadError(f"响应内容为空: {url}")
+            os.replace(tmp_path, path)
+            logger.debug(f"PDF下载完成: {url} -> {path}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self) -> int:
+        """按访问时间和总大小淘汰缓存文件，返回删除的文件数量"""
+        self._last_evict = time.time()
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"PDF缓存淘汰了 {removed} 个文件，当前占用 {total / 1024 / 1024:.1f} MB")
+        return removed
+
+    async def close(self) -> None:
+        """关闭HTTP会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_pdf_store: Optional[PdfStore] = None
+_pdf_store_lock = threading.Lock()
+
+
+def get_pdf_store() -> PdfStore:
+    """返回进程内共享的PDF缓存服务，首次使用时创建（此时才建立缓存目录）"""
+    global _pdf_store
+    with _pdf_store_lock:
+        if _pdf_store is None:
+            _pdf_store = PdfStore()
+        return _pdf_store
+
+
+# 正在使用共享HTTP会话的运行数量，同一事件循环上可能同时有多个运行（如多个SSE请求）
+_active_runs = 0
+
+
+@asynccontextmanager
+async def pdf_store_session() -> AsyncIterator[None]:
+    """
+    登记一次运行对共享PDF下载会话的使用，最后一个运行结束时才关闭会话
+
+    会话仍按需创建（未使用全文模式的运行不会建立缓存目录），关闭后下次使用时重新创建。
+    """
+    global _active_runs
+    _active_runs += 1
+    try:
+        yield
+    finally:
+        _active_runs -= 1
+        if _active_runs == 0 and _pdf_store is not None:
+            await _pdf_store.close()
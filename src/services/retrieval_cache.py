@@ -0,0 +1,87 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.core.config import config
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+QueryFn = Callable[[str], Awaitable[List[Dict[str, Any]]]]
+CacheKey = Tuple[str, str, int, float]
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询：忽略大小写和多余空白"""
+    return " ".join(query.lower().split())
+
+
+class RetrievalCache:
+    """知识库检索结果的进程内LRU缓存
+
+    缓存键为(规范化查询, db_id, top_k, 相似度阈值)，临时知识库的db_id每次运行都不同，
+    因此同一次运行中各章节的重复查询共享结果。同一个键的并发查询只执行一次。
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        """
+        初始化检索缓存
+
+        参数:
+            max_size: 最多缓存的查询数，默认读取writing.retrieval_cache.max_size配置
+        """
+        self.max_size = max_size or config.get_int("writing.retrieval_cache.max_size", 1024)
+        self._entries: "OrderedDict[CacheKey, List[Dict[str, Any]]]" = OrderedDict()
+        self._pending: Dict[CacheKey, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_query(self,
+                           query: str,
+                           db_id: str,
+                           top_k: int,
+                           similarity_threshold: float,
+                           query_fn: QueryFn) -> List[Dict[str, Any]]:
+        """
+        返回单条查询的检索结果，缓存未命中时调用query_fn(query)
+
+        返回:
+            检索到的文档块列表（与知识库aquery的返回格式一致）
+        """
+        key = (normalize_query(query), db_id, top_k, similarity_threshold)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            results = await query_fn(query)
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免"Future exception was never retrieved"警告
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(key, None)
+        future.set_result(results)
+        self._entries[key] = results
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# 进程内共享的检索缓存
+retrieval_cache = RetrievalCache()
@@ -1,41 +1,64 @@
 from typing import List, Dict, Any
 from src.services.chroma_client import ChromaClient
+from src.services.retrieval_cache import retrieval_cache
 from src.knowledge.knowledge import knowledge_base
 from src.utils.log_utils import setup_logger
+import asyncio
 import traceback
 import json
 from src.core.config import config
 
 logger = setup_logger(__name__)
 
+
+async def query_knowledge_base(querys: List[str], db_id: str, top_k: int, similarity_threshold: float) -> List[Dict[str, Any]]:
+    """
+    逐条查询知识库（经过检索缓存），合并结果并按文档块去重
+
+    :return: 文档块列表，每个元素包含content、metadata、score
+    """
+    async def query_fn(query: str) -> List[Dict[str, Any]]:
+        return await knowledge_base.aquery(query, db_id=db_id, top_k=top_k, similarity_threshold=similarity_threshold)
+
+    results = await asyncio.gather(*[
+        retrieval_cache.get_or_query(query, db_id, top_k, similarity_threshold, query_fn) for query in querys if query
+    ])
+    chunks, seen = [], set()
+    for chunk in (chunk for result in results for chunk in result or []):
+        metadata = chunk.get("metadata") or {}
+        key = (metadata.get("file_id"), metadata.get("chunk_id")) if metadata.get("chunk_id") else chunk.get("content")
+        if key in seen:
+            continue
+        seen.add(key)
+        chunks.append(chunk)
+    return chunks
+
+
 async def retrieval_tool(querys: List[str]) -> List[List[Dict[str, Any]]]:
     """
     检索工具，从向量数据库中查询相关文档
-    
+
     :param querys: 查询文本列表
     :return: 包含文档的列表
     """
     retrieval_results = []
 
     try:
-        # 从临时知识库中检索文档
+        # 从临时知识库中检索文档（元数据中保存了论文的抽取结果）
         tmp_db_id = config.get("tmp_db_id")
-        tmpdb_results = await knowledge_base.aquery(querys, db_id=tmp_db_id, top_k=config.get_int("tmpdb_top_k"),similarity_threshold=config.get_float("tmpdb_similarity_threshold"))
-        # 提取documents列表
-        if tmpdb_results and 'metadatas' in tmpdb_results:
-            for result in tmpdb_results['metadatas']:
-                retrieval_results.append(json.dumps(result, indent=4, ensure_ascii=False))
+        tmpdb_results = await query_knowledge_base(querys, tmp_db_id, config.get_int("tmpdb_top_k"), config.get_float("tmpdb_similarity_threshold"))
+        for chunk in tmpdb_results:
+            retrieval_results.append(json.dumps(chunk.get("metadata") or {}, indent=4, ensure_ascii=False))
 
         # 从用户创建的知识库中检索文档
         db_id = config.get("current_db_id",default=None)
         if db_id is None:
             return retrieval_results
-            
-        db_results = await knowledge_base.aquery(querys, db_id=db_id, top_k=config.get_int("top_k"),similarity_threshold=config.get_float("similarity_threshold"))
-        if db_results and 'documents' in db_results:
-            for result, index in enumerate(db_results['documents']):
-                result = result + " \n来源文件：" + db_results['metadatas'][index]['source']
-                retrieval_results.append(result)
+
+        db_results = await query_knowledge_base(querys, db_id, config.get_int("top_k"), config.get_float("similarity_threshold"))
+        for chunk in db_results:
+            source = (chunk.get("metadata") or {}).get("source", "")
+            retrieval_results.append(chunk.get("content", "") + " \n来源文件：" + source)
 
         return retrieval_results
     except Exception as e:
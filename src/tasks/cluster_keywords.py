@@ -0,0 +1,118 @@
+import re
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, CountVectorizer
+
+from src.core.config import config
+
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9\-]+|[぀-ヿ㐀-䶿一-鿿]+")
+CJK_RUN = re.compile(r"[぀-ヿ㐀-䶿一-鿿]+")
+
+# 抽取结果中常见但没有区分度的中文词和虚词，包含它们的n-gram不作为关键词
+CJK_STOP_WORDS = (
+    "本文", "提出", "方法", "研究", "问题", "基于", "通过", "进行", "实现", "使用", "以及", "一种", "我们",
+    "能够", "可以", "现有", "相比", "显著", "有效", "提高", "提升", "结果", "表明", "实验", "论文",
+)
+CJK_STOP_CHARS = "的了和在是与及对等中为将其并或而从以到由于也上下"
+CJK_STOP_SPLIT = re.compile("|".join(CJK_STOP_WORDS) + f"|[{CJK_STOP_CHARS}]")
+EXTRA_STOP_WORDS = {"paper", "propose", "proposed", "method", "methods", "approach", "based", "using",
+                    "results", "show", "new", "novel", "problem", "existing", "model", "models"}
+
+
+def theme_text(paper: Dict[str, Any]) -> str:
+    """论文中用于提取主题关键词的文本：核心问题、方法和贡献"""
+    methodology = paper.get("key_methodology") or {}
+    parts = [
+        paper.get("core_problem") or "",
+        methodology.get("name") or "",
+        methodology.get("principle") or "",
+        methodology.get("novelty") or "",
+        " ".join(paper.get("contributions") or []),
+    ]
+    return "\n".join(part for part in parts if part)
+
+
+def analyze(text: str) -> Iterator[str]:
+    """分词：英文为单词及相邻单词组成的短语，中文为连续汉字的2~6字n-gram"""
+    previous = None
+    for match in WORD_PATTERN.finditer(text):
+        token = match.group()
+        if CJK_RUN.fullmatch(token):
+            previous = None
+            # 在停用词处切开，片段内的n-gram都不含停用词
+            for fragment in CJK_STOP_SPLIT.split(token):
+                for n in range(2, min(len(fragment), 6) + 1):
+                    for i in range(len(fragment) - n + 1):
+                        yield fragment[i:i + n]
+            continue
+        word = token.lower()
+        if word in ENGLISH_STOP_WORDS or word in EXTRA_STOP_WORDS:
+            previous = None
+            continue
+        yield word
+        if previous:
+            yield f"{previous} {word}"
+        previous = word
+
+
+def ctfidf_keywords(documents: Sequence[str], top_n: int = 5) -> List[List[str]]:
+    """
+    基于类别的TF-IDF（c-TF-IDF）：每个聚类的论文文本拼成一个类别文档，
+    权重 = 词在本类中的频率 × log(1 + 平均每类词数 / 词在所有类中的总频次)
+
+    返回:
+        每个类别的关键词列表（按权重降序，去掉被更高权重关键词包含的重复片段）
+    """
+    if not any(documents):
+        return [[] for _ in documents]
+    vectorizer = CountVectorizer(analyzer=analyze)
+    counts = vectorizer.fit_transform(documents).astype(np.float64).tocsr()
+    terms = vectorizer.get_feature_names_out()
+
+    row_sums = np.asarray(counts.sum(axis=1)).ravel()
+    term_totals = np.asarray(counts.sum(axis=0)).ravel()
+    average = counts.sum() / max(len(documents), 1)
+    idf = np.log1p(average / term_totals)
+    tf = counts.multiply(1 / np.maximum(row_sums, 1)[:, None]).tocsr()
+    weights = tf.multiply(idf).tocsr()
+
+    keywords = []
+    for i in range(weights.shape[0]):
+        start, end = weights.indptr[i], weights.indptr[i + 1]
+        row_terms, row_weights = weights.indices[start:end], weights.data[start:end]
+        order = np.argsort(-row_weights, kind="stable")
+        chosen: List[Tuple[str, float]] = []
+        for index in order[:top_n * 20]:
+            term, weight = terms[row_terms[index]], row_weights[index]
+            if any(term in kept for kept, _ in chosen):
+                continue
+            # 权重接近的更长短语（如"大语言模型"之于"语言模型"）替换其包含的片段
+            contained = [j for j, (kept, kept_weight) in enumerate(chosen) if kept in term]
+            if contained:
+                if all(weight >= 0.5 * chosen[j][1] for j in contained):
+                    chosen = [item for j, item in enumerate(chosen) if j not in contained] + [(term, weight)]
+                continue
+            chosen.append((term, weight))
+            if len(chosen) >= top_n:
+                break
+        keywords.append([term for term, _ in chosen])
+    return keywords
+
+
+def cluster_themes(clusters_papers: Sequence[Sequence[Dict[str, Any]]],
+                   top_n: int = None) -> List[Tuple[str, List[str]]]:
+    """
+    为一组聚类生成(主题描述, 关键词)，不调用LLM
+
+    主题描述由权重最高的前三个关键词组成。
+    """
+    top_n = top_n or config.get_int("clustering.keywords", 5)
+    documents = ["\n".join(theme_text(paper) for paper in papers) for papers in clusters_papers]
+    results = []
+    for keywords in ctfidf_keywords(documents, top_n):
+        if not keywords:
+            results.append(("未分类研究主题", ["research"]))
+        else:
+            results.append((" / ".join(keywords[:3]), keywords))
+    return results
@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA
+from sklearn.metrics import silhouette_score
+
+from src.core.config import config
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class ClusterSelection:
+    """聚类数量选择结果，包含选中k值对应的已拟合模型，无需再次拟合"""
+    k: int
+    labels: np.ndarray
+    model: Optional[object] = None
+    # 各k值的评估结果：k -> {"inertia": ..., "silhouette": ...}
+    scores: Dict[int, Dict[str, float]] = field(default_factory=dict)
+
+
+def reduce_dimensions(embeddings: np.ndarray, n_components: int, random_state: int = 42) -> np.ndarray:
+    """用PCA（随机SVD）把嵌入降到n_components维，维度或样本数不足时原样返回"""
+    n_components = min(n_components, embeddings.shape[0] - 1, embeddings.shape[1])
+    if n_components <= 0 or n_components >= embeddings.shape[1]:
+        return np.asarray(embeddings, dtype=np.float32)
+    pca = PCA(n_components=n_components, svd_solver="randomized", random_state=random_state)
+    return pca.fit_transform(embeddings).astype(np.float32)
+
+
+def fit_kmeans(features: np.ndarray, k: int, minibatch_threshold: int, n_init: int, random_state: int = 42):
+    """样本数达到minibatch_threshold时使用MiniBatchKMeans，否则使用KMeans"""
+    if len(features) >= minibatch_threshold:
+        model = MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=n_init,
+                                batch_size=min(len(features), 1024))
+    else:
+        model = KMeans(n_clusters=k, random_state=random_state, n_init=n_init)
+    model.fit(features)
+    return model
+
+
+def _evaluate(features: np.ndarray, k: int, sample: np.ndarray, minibatch_threshold: int, n_init: int, random_state: int):
+    model = fit_kmeans(features, k, minibatch_threshold, n_init, random_state)
+    labels = model.labels_
+    silhouette = float("nan")
+    sample_labels = labels[sample]
+    if 1 < len(np.unique(sample_labels)) < len(sample):
+        silhouette = float(silhouette_score(features[sample], sample_labels))
+    return k, model, float(model.inertia_), silhouette
+
+
+def elbow_k(inertias: List[float], max_clusters: int) -> int:
+    """肘部法则：惯性下降幅度最大处对应的k（inertias从k=1开始）"""
+    if len(inertias) >= 3:
+        differences = [inertias[i - 1] - inertias[i] for i in range(1, len(inertias))]
+        return min(differences.index(max(differences)) + 2, max_clusters)
+    return min(2, max_clusters)
+
+
+def select_clusters(embeddings: np.ndarray,
+                    max_k: Optional[int] = None,
+                    method: Optional[str] = None,
+                    pca_components: Optional[int] = None,
+                    sample_size: Optional[int] = None,
+                    minibatch_threshold: Optional[int] = None,
+                    n_init: Optional[int] = None,
+                    n_jobs: Optional[int] = None,
+                    random_state: int = 42) -> ClusterSelection:
+    """
+    选择聚类数量并返回对应的聚类结果
+
+    先用PCA降维，再并行拟合k=1..max_k的模型；轮廓系数只在随机抽样的子集上计算。
+    参数缺省时读取clustering配置。
+
+    参数:
+        method: "silhouette"（轮廓系数最大）或"elbow"（惯性下降幅度最大）
+
+    返回:
+        ClusterSelection，labels与embeddings的行一一对应
+    """
+    max_k = max_k or config.get_int("clustering.max_k", 5)
+    method = method or config.get("clustering.method", "silhouette")
+    pca_components = pca_components or config.get_int("clustering.pca_components", 50)
+    sample_size = sample_size or config.get_int("clustering.sample_size", 2000)
+    minibatch_threshold = minibatch_threshold or config.get_int("clustering.minibatch_threshold", 1000)
+    n_init = n_init or config.get_int("clustering.n_init", 10)
+    n_jobs = n_jobs or config.get_int("clustering.n_jobs", -1)
+
+    n_samples = len(embeddings)
+    max_clusters = min(max_k, n_samples - 1)
+    if n_samples <= 2 or max_clusters <= 1:
+        return ClusterSelection(k=1, labels=np.zeros(n_samples, dtype=int))
+
+    features = reduce_dimensions(embeddings, pca_components, random_state)
+    rng = np.random.default_rng(random_state)
+    sample = np.sort(rng.choice(n_samples, size=min(sample_size, n_samples), replace=False))
+
+    # 拟合本身由sklearn多线程执行且释放GIL，线程后端避免了复制特征矩阵
+    results = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(_evaluate)(features, k, sample, minibatch_threshold, n_init, random_state)
+        for k in range(1, max_clusters + 1)
+    )
+    models = {k: model for k, model, _, _ in results}
+    scores = {k: {"inertia": inertia, "silhouette": silhouette} for k, _, inertia, silhouette in results}
+
+    if method == "elbow":
+        k = elbow_k([scores[k]["inertia"] for k in sorted(scores)], max_clusters)
+    else:
+        candidates = {k: s["silhouette"] for k, s in scores.items() if k > 1 and not np.isnan(s["silhouette"])}
+        k = max(candidates, key=candidates.get) if candidates else elbow_k(
+            [scores[k]["inertia"] for k in sorted(scores)], max_clusters)
+
+    silhouettes = ", ".join(f"{i}:{s['silhouette']:.3f}" for i, s in sorted(scores.items()) if i > 1)
+    logger.info(f"聚类数量选择（{method}）: k={k}，各k值的轮廓系数 {silhouettes}")
+    model = models[k]
+    return ClusterSelection(k=k, labels=np.asarray(model.labels_), model=model, scores=scores)
@@ -0,0 +1,46 @@
+import re
+from collections import Counter
+from typing import List
+
+from src.tasks.cluster_keywords import analyze
+from src.utils.token_utils import estimate_tokens
+
+# 按空行或Markdown标题切分段落，标题和其后的正文分在同一段
+PARAGRAPH_SPLIT = re.compile(r"\n\s*\n|\n(?=#{1,6}\s)")
+
+
+def split_paragraphs(text: str) -> List[str]:
+    return [paragraph.strip() for paragraph in PARAGRAPH_SPLIT.split(text) if paragraph.strip()]
+
+
+def compress_context(text: str, query: str, max_tokens: int) -> str:
+    """
+    按与query的词汇重合度筛选文本中的段落，保留在max_tokens以内，不调用LLM
+
+    第一段（通常为总体概述）总是保留；其余段落按重合度（query词在段落中的出现次数，
+    按段落长度的平方根归一）从高到低加入，最后按原文顺序拼接。文本本身不超过预算时原样返回。
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    paragraphs = split_paragraphs(text)
+    if len(paragraphs) <= 1:
+        return text
+
+    query_terms = set(analyze(query))
+    scores = []
+    for paragraph in paragraphs[1:]:
+        counts = Counter(analyze(paragraph))
+        overlap = sum(count for term, count in counts.items() if term in query_terms)
+        scores.append(overlap / max(sum(counts.values()), 1) ** 0.5)
+
+    kept = {0}
+    used = estimate_tokens(paragraphs[0])
+    for index in sorted(range(1, len(paragraphs)), key=lambda i: -scores[i - 1]):
+        if scores[index - 1] <= 0:
+            break
+        cost = estimate_tokens(paragraphs[index])
+        if used + cost > max_tokens:
+            continue
+        kept.add(index)
+        used += cost
+    return "\n\n".join(paragraphs[i] for i in sorted(kept))
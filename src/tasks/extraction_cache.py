@@ -0,0 +1,106 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.core.config import config
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ExtractionCache:
+    """论文结构化抽取结果的SQLite持久化缓存
+
+    缓存键由paper_id（含版本号）、阅读模型标识和阅读提示词的哈希组成，
+    更换模型或修改提示词后键随之变化，旧记录自然失效，无需手动清理。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初始化抽取结果缓存
+
+        参数:
+            db_path: SQLite数据库文件路径，默认为SAVE_DIR/extraction_cache/extraction.db
+        """
+        if db_path is None:
+            db_path = os.path.join(config.get("SAVE_DIR"), "extraction_cache", "extraction.db")
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS extraction_cache (
+                    paper_id TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (paper_id, model, prompt_hash)
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, paper_id: str, model: str, prompt_hash: str) -> Optional[Dict]:
+        """查询单篇论文的抽取结果，未命中返回None"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM extraction_cache WHERE paper_id = ? AND model = ? AND prompt_hash = ?",
+                (paper_id, model, prompt_hash),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, paper_ids: List[str], model: str, prompt_hash: str) -> Dict[str, Dict]:
+        """批量查询抽取结果，返回命中的 paper_id -> 抽取结果"""
+        if not paper_ids:
+            return {}
+        placeholders = ",".join("?" * len(paper_ids))
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT paper_id, data FROM extraction_cache "
+                f"WHERE model = ? AND prompt_hash = ? AND paper_id IN ({placeholders})",
+                (model, prompt_hash, *paper_ids),
+            ).fetchall()
+        return {paper_id: json.loads(data) for paper_id, data in rows}
+
+    def put_many(self, model: str, prompt_hash: str, items: List[Tuple[str, Dict]]) -> None:
+        """
+        批量写入抽取结果
+
+        参数:
+            items: (paper_id, 校验通过的抽取结果字典) 列表
+        """
+        if not items:
+            return
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO extraction_cache (paper_id, model, prompt_hash, created_at, data)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [(paper_id, model, prompt_hash, now, json.dumps(data, ensure_ascii=False)) for paper_id, data in items],
+            )
+        logger.info(f"已缓存 {len(items)} 篇论文的抽取结果")
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """返回进程内共享的抽取结果缓存，首次使用时创建（此时才建立缓存数据库）；reading.cache.enabled为false时返回None"""
+    global _extraction_cache
+    if not config.get_bool("reading.cache.enabled", True):
+        return None
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            _extraction_cache = ExtractionCache()
+        return _extraction_cache
@@ -0,0 +1,223 @@
+import asyncio
+import math
+import multiprocessing
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from src.core.config import config
+from src.services.pdf_store import get_pdf_store
+from src.utils.log_utils import setup_logger
+from src.utils.token_utils import estimate_tokens
+
+logger = setup_logger(__name__)
+
+# 章节标题：编号标题（如"3.2 Experimental Setup"、"IV. RESULTS"）或常见的无编号标题
+NUMBERED_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*\.?|[IVX]+\.)\s+[A-Z][^.]{1,80}$")
+NAMED_HEADING = re.compile(
+    r"^(abstract|introduction|background|related work|preliminaries|method(?:s|ology)?|approach|"
+    r"experiments?|experimental (?:setup|results)|evaluation|results?(?: and discussion)?|discussion|"
+    r"limitations?|conclusions?(?: and future work)?|future work|references|bibliography|"
+    r"acknowledge?ments?|appendix(?: [a-z])?)$",
+    re.IGNORECASE,
+)
+# 这些章节之后的内容（参考文献、致谢、附录）对抽取没有价值
+STOP_HEADING = re.compile(r"^(?:\d+\.?\s+)?(references|bibliography|acknowledge?ments?)$", re.IGNORECASE)
+
+# ExtractedPaperData各字段对应的章节标题和正文关键词，用于给章节打分
+FIELD_KEYWORDS: Dict[str, Dict[str, List[str]]] = {
+    "core_problem": {
+        "heading": ["introduction", "motivation", "problem", "background"],
+        "body": ["challenge", "problem", "however", "despite", "address", "gap"],
+    },
+    "key_methodology": {
+        "heading": ["method", "approach", "model", "framework", "architecture", "proposed", "design"],
+        "body": ["we propose", "our method", "our approach", "architecture", "module", "algorithm"],
+    },
+    "datasets_used": {
+        "heading": ["dataset", "data", "benchmark", "experimental setup", "setup"],
+        "body": ["dataset", "benchmark", "corpus", "samples", "training set", "test set"],
+    },
+    "evaluation_metrics": {
+        "heading": ["evaluation", "metric", "setup"],
+        "body": ["metric", "accuracy", "f1", "precision", "recall", "bleu", "auc", "error rate"],
+    },
+    "main_results": {
+        "heading": ["result", "experiment", "evaluation", "comparison", "ablation"],
+        "body": ["outperform", "improve", "achieve", "table", "baseline", "state-of-the-art"],
+    },
+    "limitations": {
+        "heading": ["limitation", "discussion", "future work", "threats"],
+        "body": ["limitation", "fail", "future work", "drawback", "only consider", "restricted"],
+    },
+    "contributions": {
+        "heading": ["conclusion", "contribution", "summary"],
+        "body": ["contribution", "we present", "in this paper", "to the best of our knowledge"],
+    },
+}
+
+
+def split_sections(pdf_path: str) -> List[Dict[str, str]]:
+    """
+    按章节切分PDF正文
+
+    章节标题需同时满足：匹配标题模式、行较短、字号大于正文或为粗体。
+    没有识别到标题时按页切分。遇到参考文献等章节后停止。
+
+    返回:
+        [{"title": 章节标题, "text": 章节正文}]
+    """
+    lines = []
+    with fitz.open(pdf_path) as doc:
+        for page_number, page in enumerate(doc, start=1):
+            for block in page.get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    spans = [span for span in line["spans"] if span["text"].strip()]
+                    if not spans:
+                        continue
+                    text = " ".join(span["text"].strip() for span in spans)
+                    size = max(span["size"] for span in spans)
+                    bold = all(span["flags"] & 16 for span in spans)
+                    lines.append((page_number, text, round(size, 1), bold))
+    if not lines:
+        return []
+
+    # 出现次数最多的字号视为正文字号
+    body_size = Counter(size for _, text, size, _ in lines if len(text) > 40).most_common(1)
+    body_size = body_size[0][0] if body_size else Counter(size for _, _, size, _ in lines).most_common(1)[0][0]
+
+    sections = []
+    title, buffer = "Front Matter", []
+    for page_number, text, size, bold in lines:
+        is_heading = len(text) <= 90 and (size > body_size + 0.5 or bold) and \
+            (NUMBERED_HEADING.match(text) or NAMED_HEADING.match(text))
+        if is_heading:
+            if buffer:
+                sections.append({"title": title, "text": " ".join(buffer)})
+            if STOP_HEADING.match(text):
+                return sections
+            title, buffer = text, []
+        else:
+            buffer.append(text)
+    if buffer:
+        sections.append({"title": title, "text": " ".join(buffer)})
+
+    if len(sections) <= 1:
+        # 没有识别出章节结构时按页切分
+        pages: Dict[int, List[str]] = {}
+        for page_number, text, _, _ in lines:
+            pages.setdefault(page_number, []).append(text)
+        sections = [{"title": f"Page {number}", "text": " ".join(texts)} for number, texts in pages.items()]
+    return sections
+
+
+def score_section(section: Dict[str, str], field: str) -> float:
+    """章节对某个抽取字段的相关度：标题命中权重高，正文关键词按频率对数计分并按长度归一"""
+    keywords = FIELD_KEYWORDS[field]
+    title = section["title"].lower()
+    text = section["text"].lower()
+    score = 3.0 * sum(keyword in title for keyword in keywords["heading"])
+    hits = sum(text.count(keyword) for keyword in keywords["body"])
+    if hits:
+        score += math.log1p(hits) / math.log1p(len(text) / 1000 + 1)
+    return score
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """按估算的token数截断文本，尽量在句末截断"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    cut = text[:low]
+    sentence_end = cut.rfind(". ")
+    return cut[:sentence_end + 1] if sentence_end > len(cut) // 2 else cut
+
+
+def pack_sections(sections: List[Dict[str, str]], token_budget: int, section_tokens: int) -> str:
+    """
+    选取信息量最高的章节装入token预算
+
+    各字段轮流挑选得分最高且尚未入选的章节，保证每个字段都有对应内容；
+    单个章节最多占用section_tokens，输出按章节在原文中的顺序排列。
+    """
+    if not sections:
+        return ""
+    scores = {field: [score_section(section, field) for section in sections] for field in FIELD_KEYWORDS}
+    ranked = {field: sorted((i for i, score in enumerate(field_scores) if score > 0), key=lambda i: -field_scores[i])
+              for field, field_scores in scores.items()}
+
+    selected: Dict[int, str] = {}
+    remaining = token_budget
+    while remaining > 0 and any(ranked.values()):
+        for field in FIELD_KEYWORDS:
+            candidates = [i for i in ranked[field] if i not in selected]
+            ranked[field] = candidates
+            if not candidates or remaining <= 0:
+                continue
+            i = candidates[0]
+            header = f"## {sections[i]['title']}\n"
+            text = truncate_to_tokens(sections[i]["text"], min(section_tokens, remaining - estimate_tokens(header)))
+            if not text:
+                remaining = 0
+                break
+            selected[i] = header + text
+            remaining -= estimate_tokens(selected[i])
+    return "\n\n".join(selected[i] for i in sorted(selected))
+
+
+def extract_fulltext(pdf_path: str, token_budget: int, section_tokens: int) -> str:
+    """在子进程中运行：解析PDF并返回按预算挑选的章节文本（须为模块顶层函数，spawn方式的子进程按名称导入）"""
+    return pack_sections(split_sections(pdf_path), token_budget, section_tokens)
+
+
+class FulltextReader:
+    """全文阅读：下载（或读取缓存的）论文PDF，挑选与抽取字段最相关的章节，控制在每篇论文的token预算内
+
+    PDF解析在进程池中执行，不阻塞事件循环。
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+
+    def __init__(self, token_budget: Optional[int] = None, section_tokens: Optional[int] = None):
+        """
+        参数:
+            token_budget: 每篇论文正文摘录的token预算，默认读取reading.fulltext.token_budget配置
+            section_tokens: 单个章节最多占用的token数，默认读取reading.fulltext.section_tokens配置
+        """
+        self.token_budget = token_budget or config.get_int("reading.fulltext.token_budget", 3000)
+        self.section_tokens = section_tokens or config.get_int("reading.fulltext.section_tokens", 800)
+
+    @classmethod
+    def executor(cls) -> ProcessPoolExecutor:
+        """
+        进程内共享的PDF解析进程池
+
+        使用spawn方式启动子进程：创建进程池时主进程已有嵌入服务、知识库写入等后台线程，
+        fork会把这些线程持有的锁原样复制到子进程中，可能导致子进程死锁。
+        """
+        if cls._executor is None:
+            cls._executor = ProcessPoolExecutor(max_workers=config.get_int("reading.fulltext.max_workers", 4),
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return cls._executor
+
+    async def read(self, paper: Dict) -> Optional[str]:
+        """返回论文的正文摘录，PDF不可用或解析失败时返回None"""
+        pdf_path = await get_pdf_store().get(paper)
+        if pdf_path is None:
+            return None
+        loop = asyncio.get_running_loop()
+        try:
+            text = await loop.run_in_executor(self.executor(), extract_fulltext, pdf_path, self.token_budget, self.section_tokens)
+        except Exception as e:
+            logger.warning(f"论文 {paper.get('paper_id')} 的PDF解析失败: {e}")
+            return None
+        return text or None
@@ -0,0 +1,131 @@
+import asyncio
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.config import config
+from src.knowledge.knowledge import knowledge_base
+from src.services.embedding_service import EmbeddingService
+from src.services.embedding_store import get_embedding_store
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class KnowledgeBaseWriter:
+    """知识库微批写入器
+
+    文档逐条提交，后台任务每攒够batch_size条、或距离本批第一条超过flush_interval毫秒就写入一次，
+    单次写入的数量不超过嵌入模型提供商的批量上限，同时让嵌入与上游的阅读并行进行。
+
+    指定embedding_service时由写入器自己生成嵌入（经嵌入向量存储缓存）并随文档一起写入，
+    生成的向量按提交时的key保留，供后续阶段（如聚类）直接复用。
+    """
+
+    def __init__(self, db_id: str, batch_size: Optional[int] = None, flush_interval: Optional[int] = None,
+                 embedding_service: Optional[EmbeddingService] = None):
+        """
+        初始化写入器
+
+        参数:
+            db_id: 目标知识库ID
+            batch_size: 每批最多写入的文档数，默认读取reading.kb_writer.batch_size配置
+            flush_interval: 最长攒批时间（毫秒），默认读取reading.kb_writer.flush_interval配置
+            embedding_service: 与知识库集合相同模型的嵌入服务，为None时由知识库自行嵌入
+        """
+        self.db_id = db_id
+        self.embedding_service = embedding_service
+        self.vectors: Dict[Hashable, np.ndarray] = {}
+        self.batch_size = batch_size or config.get_int("reading.kb_writer.batch_size", 10)
+        interval = flush_interval if flush_interval is not None else config.get_int("reading.kb_writer.flush_interval", 500)
+        self.flush_interval = interval / 1000
+        # 有界队列：写入跟不上时阻塞提交方，限制内存中积压的文档数量
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=self.batch_size * 4)
+        self._task: Optional[asyncio.Task] = None
+        self._next_id = 0
+        self.written = 0
+        self.failed = 0
+
+    async def __aenter__(self) -> "KnowledgeBaseWriter":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def add(self, document: str, metadata: Dict[str, Any], key: Optional[Hashable] = None) -> None:
+        """提交一条文档，key用于之后通过embedding_matrix取回该文档的嵌入向量"""
+        await self._queue.put((document, metadata, key))
+
+    def embedding_matrix(self, keys: Sequence[Hashable]) -> Optional[np.ndarray]:
+        """按keys顺序返回已写入文档的float32嵌入矩阵，有任一文档没有向量时返回None"""
+        if not keys or any(key not in self.vectors for key in keys):
+            return None
+        return np.stack([self.vectors[key] for key in keys]).astype(np.float32, copy=False)
+
+    async def close(self) -> None:
+        """写入剩余的文档并停止后台任务"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        logger.info(f"知识库 {self.db_id} 共写入 {self.written} 条文档" + (f"，{self.failed} 条写入失败" if self.failed else ""))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        closed = False
+        while not closed:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch: List[Tuple[str, Dict, Optional[Hashable]]] = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    closed = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _embed(self, documents: List[str]) -> Optional[np.ndarray]:
+        try:
+            return await get_embedding_store().aget_or_embed(
+                documents, self.embedding_service.model_key, 0, self.embedding_service.aembed
+            )
+        except Exception as e:
+            # 嵌入失败时退回由知识库自行嵌入
+            logger.warning(f"生成知识库文档嵌入失败（{len(documents)} 条文档），改由知识库嵌入: {e}")
+            return None
+
+    async def _flush(self, batch: List[Tuple[str, Dict, Optional[Hashable]]]) -> None:
+        ids = [str(self._next_id + i) for i in range(len(batch))]
+        self._next_id += len(batch)
+        documents = [document for document, _, _ in batch]
+        data = {
+            "documents": documents,
+            "metadatas": [metadata for _, metadata, _ in batch],
+            "ids": ids,
+        }
+        if self.embedding_service is not None:
+            vectors = await self._embed(documents)
+            if vectors is not None:
+                data["embeddings"] = list(np.asarray(vectors, dtype=np.float32))
+                for (_, _, key), vector in zip(batch, data["embeddings"]):
+                    if key is not None:
+                        self.vectors[key] = vector
+        try:
+            await knowledge_base.add_processed_content(self.db_id, data)
+        except Exception as e:
+            # 单批写入失败不影响后续批次，只统计成功写入的文档
+            self.failed += len(batch)
+            logger.error(f"写入知识库 {self.db_id} 失败（{len(batch)} 条文档）: {e}")
+        else:
+            self.written += len(batch)
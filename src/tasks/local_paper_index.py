@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import arxiv
+
+from src.core.config import config
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class LocalPaperIndex:
+    """本地arXiv元数据索引，基于SQLite FTS5全文检索
+
+    通过批量导入arXiv元数据转储（JSONL，每行一篇论文，字段与Kaggle发布的
+    arxiv-metadata-oai-snapshot一致）构建索引，离线提供与arXiv API相同结构的检索结果。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初始化本地索引
+
+        参数:
+            db_path: 索引数据库路径，默认读取paper_search.local_index_path配置，
+                     未配置时为SAVE_DIR/local_index/arxiv_metadata.db
+        """
+        if db_path is None:
+            db_path = config.get("paper_search.local_index_path") or os.path.join(
+                config.get("SAVE_DIR"), "local_index", "arxiv_metadata.db"
+            )
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            self._create_schema(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection) -> None:
+        conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS papers (
+                rowid INTEGER PRIMARY KEY,
+                arxiv_id TEXT NOT NULL UNIQUE,
+                version TEXT NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                authors TEXT NOT NULL,
+                categories TEXT NOT NULL,
+                doi TEXT,
+                published TEXT,
+                published_key TEXT,
+                updated_key TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_papers_published ON papers (published_key);
+            CREATE INDEX IF NOT EXISTS idx_papers_updated ON papers (updated_key);
+            CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                title, summary, authors, categories,
+                content='papers', content_rowid='rowid'
+            );
+            CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+                INSERT INTO papers_fts (rowid, title, summary, authors, categories)
+                VALUES (new.rowid, new.title, new.summary, new.authors, new.categories);
+            END;
+            CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, summary, authors, categories)
+                VALUES ('delete', old.rowid, old.title, old.summary, old.authors, old.categories);
+            END;
+            CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, summary, authors, categories)
+                VALUES ('delete', old.rowid, old.title, old.summary, old.authors, old.categories);
+                INSERT INTO papers_fts (rowid, title, summary, authors, categories)
+                VALUES (new.rowid, new.title, new.summary, new.authors, new.categories);
+            END;
+            """
+        )
+
+    def ingest_jsonl(self, path: str, batch_size: int = 5000) -> int:
+        """
+        批量导入arXiv元数据转储文件，已存在的论文按新数据更新
+
+        参数:
+            path: JSONL文件路径
+            batch_size: 每个事务写入的记录数
+
+        返回:
+            成功导入的论文数量
+        """
+        total, skipped = 0, 0
+        batch = []
+        with self._connect() as conn, open(path, "r", encoding="utf-8") as f:
+            conn.execute("PRAGMA synchronous=OFF")
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    batch.append(self._parse_record(json.loads(line)))
+                except (ValueError, KeyError, TypeError, IndexError) as e:
+                    skipped += 1
+                    logger.debug(f"跳过无法解析的元数据记录: {e}")
+                    continue
+                if len(batch) >= batch_size:
+                    total += self._write_batch(conn, batch)
+                    batch = []
+                    logger.info(f"已导入 {total} 篇论文")
+            if batch:
+                total += self._write_batch(conn, batch)
+            conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('optimize')")
+
+        logger.info(f"元数据导入完成，共导入 {total} 篇论文，跳过 {skipped} 条记录")
+        return total
+
+    @staticmethod
+    def _write_batch(conn: sqlite3.Connection, batch: List[Tuple]) -> int:
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO papers (arxiv_id, version, title, summary, authors, categories, doi,
+                                    published, published_key, updated_key)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(arxiv_id) DO UPDATE SET
+                    version = excluded.version, title = excluded.title, summary = excluded.summary,
+                    authors = excluded.authors, categories = excluded.categories, doi = excluded.doi,
+                    published = excluded.published, published_key = excluded.published_key,
+                    updated_key = excluded.updated_key
+                """,
+                batch,
+            )
+        return len(batch)
+
+    @staticmethod
+    def _parse_record(record: Dict) -> Tuple:
+        """将一条元数据记录转换为papers表的一行"""
+        versions = record.get("versions") or []
+        version = versions[-1]["version"] if versions else "v1"
+        published = parsedate_to_datetime(versions[0]["created"]) if versions else None
+        updated = parsedate_to_datetime(versions[-1]["created"]) if versions else None
+        if published is None and record.get("update_date"):
+            published = updated = datetime.strptime(record["update_date"], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+        if record.get("authors_parsed"):
+            # authors_parsed中每项为[姓, 名, 后缀]
+            authors = [" ".join(part for part in (names[1], names[0], *names[2:]) if part)
+                       for names in record["authors_parsed"]]
+        else:
+            authors = [name.strip() for name in record.get("authors", "").replace(" and ", ", ").split(",") if name.strip()]
+
+        return (
+            record["id"],
+            version,
+            " ".join(record["title"].split()),
+            record.get("abstract", "").strip(),
+            json.dumps(authors, ensure_ascii=False),
+            record.get("categories", ""),
+            record.get("doi"),
+            published.isoformat() if published else None,
+            published.strftime("%Y%m%d%H%M") if published else None,
+            updated.strftime("%Y%m%d%H%M") if updated else None,
+        )
+
+    def search(self,
+               query: str,
+               max_results: int = 50,
+               sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+               sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending,
+               date_window: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        """
+        在本地索引中检索论文，语义与arXiv API的 all:"query" 短语检索一致
+
+        参数:
+            query: 检索短语
+            max_results: 最大返回结果数量
+            sort_by: 排序方式 (Relevance, LastUpdatedDate, SubmittedDate)
+            sort_order: 排序顺序 (Ascending, Descending)
+            date_window: arXiv格式的(开始, 结束)日期窗口，按首次提交时间过滤
+
+        返回:
+            论文信息字典列表，结构与PaperSearcher._parse_paper_result一致
+        """
+        match = '"' + query.replace('"', '""') + '"'
+        order = "DESC" if sort_order == arxiv.SortOrder.Descending else "ASC"
+        if sort_by == arxiv.SortCriterion.SubmittedDate:
+            order_by = f"p.published_key {order}"
+        elif sort_by == arxiv.SortCriterion.LastUpdatedDate:
+            order_by = f"p.updated_key {order}"
+        else:
+            # bm25分数越小越相关，降序相关度对应分数升序
+            order_by = "rank " + ("ASC" if order == "DESC" else "DESC")
+
+        sql = """
+            SELECT p.*, bm25(papers_fts, 10.0, 1.0, 1.0, 0.5) AS rank
+            FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid
+            WHERE papers_fts MATCH ?
+        """
+        params: List = [match]
+        if date_window:
+            sql += " AND p.published_key BETWEEN ? AND ?"
+            params.extend(date_window)
+        sql += f" ORDER BY {order_by} LIMIT ?"
+        params.append(max_results)
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._row_to_paper(row) for row in rows]
+
+    @staticmethod
+    def _row_to_paper(row: sqlite3.Row) -> Dict:
+        """将索引中的一行转换为与arXiv API检索结果相同结构的字典"""
+        paper_id = f"{row['arxiv_id']}{row['version']}"
+        categories = row["categories"].split()
+        published = datetime.fromisoformat(row["published"]) if row["published"] else None
+        return {
+            "paper_id": paper_id,
+            "title": row["title"],
+            "authors": json.loads(row["authors"]),
+            "summary": row["summary"],
+            "published": published.year if published else None,
+            "published_date": published.isoformat() if published else None,
+            "url": f"http://arxiv.org/abs/{paper_id}",
+            "pdf_url": f"http://arxiv.org/pdf/{paper_id}",
+            "primary_category": categories[0] if categories else None,
+            "categories": categories,
+            "doi": row["doi"],
+        }
+
+    def count(self) -> int:
+        """返回索引中的论文数量"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    """命令行入口：导入arXiv元数据转储文件构建本地索引"""
+    parser = argparse.ArgumentParser(description="导入arXiv元数据转储（JSONL）构建本地检索索引")
+    parser.add_argument("paths", nargs="+", help="JSONL元数据文件路径")
+    parser.add_argument("--db", default=None, help="索引数据库路径，默认使用配置中的路径")
+    parser.add_argument("--batch-size", type=int, default=5000, help="每个事务写入的记录数")
+    args = parser.parse_args(argv)
+
+    index = LocalPaperIndex(args.db)
+    for path in args.paths:
+        index.ingest_jsonl(path, batch_size=args.batch_size)
+    print(f"索引中共有 {index.count()} 篇论文: {index.db_path}")
+
+
+if __name__ == "__main__":
+    main()
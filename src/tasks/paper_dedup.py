@@ -0,0 +1,109 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from simhash import Simhash, SimhashIndex
+
+from src.core.config import config
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# arXiv论文ID末尾的版本号，如 2411.11607v2 中的 v2
+VERSION_PATTERN = re.compile(r"v(\d+)$")
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def split_version(paper_id: str) -> Tuple[str, int]:
+    """将arXiv论文ID拆分为(不含版本号的ID, 版本号)，没有版本号时版本记为0"""
+    match = VERSION_PATTERN.search(paper_id or "")
+    if match:
+        return paper_id[:match.start()], int(match.group(1))
+    return paper_id, 0
+
+
+class PaperDeduplicator:
+    """论文去重器：合并同一论文的多个arXiv版本，以及标题和摘要近似重复的论文
+
+    每组重复论文只保留最新的一篇作为代表，被合并论文的ID记录在代表论文的collapsed_ids字段中。
+    同一个实例可以多次调用add做增量去重（流式检索时使用）。
+    """
+
+    def __init__(self, distance: Optional[int] = None):
+        """
+        初始化去重器
+
+        参数:
+            distance: SimHash汉明距离阈值，不超过该距离视为近似重复，默认读取dedup.simhash_distance配置
+        """
+        self.distance = distance if distance is not None else config.get_int("dedup.simhash_distance", 4)
+        self._kept: Dict[str, Dict] = {}  # 不含版本号的ID -> 代表论文
+        self._index = SimhashIndex([], k=self.distance)
+        self.collapsed_count = 0
+
+    @staticmethod
+    def _text(paper: Dict) -> str:
+        """SimHash的输入文本：规范化空白后的标题和摘要
+
+        使用simhash默认的字符级4-gram特征，对摘要中个别词语的改动最不敏感
+        """
+        text = f"{paper.get('title', '')} {paper.get('summary', '')}".lower()
+        return " ".join(WORD_PATTERN.findall(text))
+
+    @staticmethod
+    def _recency(paper: Dict) -> Tuple[str, int]:
+        """论文新旧排序键：发表时间优先，其次版本号"""
+        return paper.get("published_date") or "", split_version(paper.get("paper_id", ""))[1]
+
+    def _collapse(self, representative: Dict, duplicate: Dict) -> None:
+        collapsed_ids = representative.setdefault("collapsed_ids", [])
+        collapsed_ids.append(duplicate["paper_id"])
+        collapsed_ids.extend(duplicate.get("collapsed_ids", []))
+        self.collapsed_count += 1
+
+    def add(self, papers: List[Dict]) -> List[Dict]:
+        """
+        增量去重：与已保留的论文以及本批论文互相比较
+
+        已保留的论文不会被替换（流式模式下可能已开始阅读），本批内部仍保留最新的一篇。
+
+        返回:
+            本批中新保留的论文列表，保持输入中的相对顺序
+        """
+        # 按新旧排序后依次处理，保证每组重复中先被保留的是最新的一篇
+        order = sorted(range(len(papers)), key=lambda i: self._recency(papers[i]), reverse=True)
+        kept_positions = []
+        for position in order:
+            paper = dict(papers[position])
+            base_id, _ = split_version(paper.get("paper_id", ""))
+
+            # 1. 同一论文的不同版本
+            representative = self._kept.get(base_id)
+            if representative is not None:
+                self._collapse(representative, paper)
+                continue
+
+            # 2. 标题和摘要近似重复的论文
+            text = self._text(paper)
+            simhash = Simhash(text) if text else None
+            if simhash is not None:
+                near_dups = self._index.get_near_dups(simhash)
+                if near_dups:
+                    representative = self._kept[near_dups[0]]
+                    self._collapse(representative, paper)
+                    # 记录别名，该论文的其他版本之后可直接按ID合并
+                    self._kept[base_id] = representative
+                    continue
+                self._index.add(base_id, simhash)
+
+            self._kept[base_id] = paper
+            kept_positions.append((position, paper))
+
+        kept_positions.sort(key=lambda item: item[0])
+        return [paper for _, paper in kept_positions]
+
+    def dedup(self, papers: List[Dict]) -> List[Dict]:
+        """对完整的检索结果去重，返回保留的论文列表"""
+        kept = self.add(papers)
+        if self.collapsed_count:
+            logger.info(f"论文去重完成：{len(papers)} 篇论文中合并了 {self.collapsed_count} 篇重复论文")
+        return kept
@@ -1,18 +1,35 @@
 import arxiv
+import asyncio
 import logging
-from typing import List, Dict, Optional, Union
+import math
+import threading
+from typing import AsyncIterator, Iterator, List, Dict, Optional, Tuple, Union
 from datetime import datetime, timedelta
 
+from src.core.config import config
+from src.tasks.local_paper_index import LocalPaperIndex
+from src.tasks.search_cache import SearchCache
+from src.services.arxiv_client import get_arxiv_client
 from src.utils.log_utils import setup_logger
 
 logger = setup_logger(__name__)
 
+# 流式检索中仍在后台运行的子查询任务
+_background_tasks = set()
+
 class PaperSearcher:
-    """论文搜索器，使用arxiv库搜索论文"""
+    """论文搜索器，使用arxiv库搜索论文，也可切换为本地元数据索引（paper_search.backend: local）"""
     
     def __init__(self):
         """初始化论文搜索器"""
-        pass
+        self.backend = config.get("paper_search.backend", "arxiv")
+        # 本地索引检索本身只需毫秒级，无需再经过结果缓存
+        self.local_index = LocalPaperIndex() if self.backend == "local" else None
+        if self.local_index is not None and self.local_index.count() == 0:
+            logger.warning(f"本地元数据索引为空（{self.local_index.db_path}），改用arXiv在线检索")
+            self.local_index = None
+        use_cache = self.local_index is None and config.get_bool("paper_search.cache.enabled", True)
+        self.cache = SearchCache() if use_cache else None
     
     async def search_papers(self, 
                       querys: List[str], 
@@ -37,45 +54,259 @@ class PaperSearcher:
         """
         # querys = ['artificial intelligence', 'AI', 'llm', 'machine learning', 'deep learning']
         try:
-            # 构建搜索查询
-            search_query = ""
-            for query in querys:
-                search_query += "all:%22"+query+"%22 OR "
-            search_query = search_query[:-4]
-            # 添加日期范围过滤
-            if start_date or end_date:
-                start_date_str = self._format_date(start_date) if start_date else "190001010000"
-                end_date_str = self._format_date(end_date) if end_date else datetime.now().strftime("%Y%m%d2359")
-                date_filter = f"submittedDate:[{start_date_str} TO {end_date_str}]"
-                search_query = f"{search_query} AND {date_filter}"
+            querys = [query.strip() for query in querys or [] if query and query.strip()]
+            if not querys:
+                logger.warning("查询条件为空，跳过论文搜索")
+                return []
 
-            logger.info(f"开始搜索论文: query='{search_query}', max_results={max_results}, sort_by={sort_by}")
+            # 日期范围过滤条件，所有子查询共用
+            date_window = self._date_window(start_date, end_date)
 
+            logger.info(f"开始搜索论文: querys={querys}, max_results={max_results}, sort_by={sort_by}")
 
-            logger.info(f"论文搜索查询条件: {search_query}")
+            # 优先从本地缓存读取，同一查询条件的重复请求不再访问arXiv
+            cache_key = SearchCache.make_key(querys, sort_by.value, sort_order.value)
+            if self.cache is not None:
+                cached = await asyncio.to_thread(self.cache.get, cache_key, date_window, max_results)
+                if cached is not None:
+                    logger.info(f"命中论文检索缓存，共 {len(cached)} 篇论文")
+                    return cached
+
+            # 每个查询词单独分页检索，在线程池中并发执行，避免阻塞事件循环
+            per_query = self._per_query_limit(max_results, len(querys))
+            semaphore = asyncio.Semaphore(config.get_int("paper_search.max_concurrency", 4))
+
+            async def fetch(query: str) -> List[Dict]:
+                async with semaphore:
+                    return await asyncio.to_thread(
+                        self._fetch_query, query, date_window, per_query, sort_by, sort_order
+                    )
+
+            results = await asyncio.gather(*[fetch(query) for query in querys], return_exceptions=True)
+
+            result_lists = []
+            for query, result in zip(querys, results):
+                if isinstance(result, Exception):
+                    logger.error(f"查询 '{query}' 检索失败: {str(result)}")
+                    continue
+                result_lists.append(result)
+            if not result_lists and results:
+                # 所有子查询都失败时向上抛出，与原来的单查询行为保持一致
+                raise results[0]
+
+            papers, complete = self._merge_for_cache(result_lists, per_query, max_results)
+
+            # 仅缓存所有子查询都成功的结果
+            if self.cache is not None and len(result_lists) == len(querys):
+                await asyncio.to_thread(self.cache.put, cache_key, date_window, max_results, complete, papers)
 
-            # 创建搜索对象
-            try:
-                search = arxiv.Search(
-                    query=search_query,
-                    max_results=max_results,
-                    sort_by=sort_by,
-                    sort_order=sort_order
-                )
-            except Exception as e:
-                logger.error(f"创建arxiv搜索对象失败: {str(e)}")
-                return []
-            
-            # logger.info(f"论文搜索结果为：{search.results()}")
-            # 执行搜索并解析结果
-            # 使用新方法格式化论文列表
-            papers = self.format_papers_list(search.results())
-            
             logger.info(f"论文搜索完成，共找到 {len(papers)} 篇论文")
             return papers
         except Exception as e:
             logger.error(f"论文搜索失败: {str(e)}")
             raise
+
+    async def stream_papers(self,
+                            querys: List[str],
+                            max_results: int = 50,
+                            sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+                            sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending,
+                            start_date: Optional[Union[str, datetime]] = None,
+                            end_date: Optional[Union[str, datetime]] = None) -> AsyncIterator[List[Dict]]:
+        """
+        流式搜索arXiv论文，每个子查询每下载完一页就产出该页中尚未出现过的论文
+
+        参数与search_papers相同。与search_papers不同，论文按到达顺序产出，
+        不做跨查询的相关度重排，累计产出数量达到max_results后停止。
+
+        返回:
+            异步生成器，每次产出一页论文信息字典列表
+        """
+        querys = [query.strip() for query in querys or [] if query and query.strip()]
+        if not querys:
+            logger.warning("查询条件为空，跳过论文搜索")
+            return
+
+        date_window = self._date_window(start_date, end_date)
+        logger.info(f"开始流式搜索论文: querys={querys}, max_results={max_results}, sort_by={sort_by}")
+
+        cache_key = SearchCache.make_key(querys, sort_by.value, sort_order.value)
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, cache_key, date_window, max_results)
+            if cached is not None:
+                logger.info(f"命中论文检索缓存，共 {len(cached)} 篇论文")
+                if cached:
+                    yield cached
+                return
+
+        per_query = self._per_query_limit(max_results, len(querys))
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop_event = threading.Event()
+        semaphore = asyncio.Semaphore(config.get_int("paper_search.max_concurrency", 4))
+
+        def produce(query_index: int, query: str) -> None:
+            # 工作线程中逐页检索，通过事件循环把每一页投递到队列，None表示该查询结束
+            try:
+                for page in self._iter_query_pages(query, date_window, per_query, sort_by, sort_order, stop_event):
+                    loop.call_soon_threadsafe(queue.put_nowait, (query_index, page))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (query_index, e))
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, (query_index, None))
+
+        async def run_producer(query_index: int, query: str) -> None:
+            async with semaphore:
+                if not stop_event.is_set():
+                    await asyncio.to_thread(produce, query_index, query)
+                    return
+            # 已提前结束，未启动的查询直接标记完成
+            queue.put_nowait((query_index, None))
+
+        for i, query in enumerate(querys):
+            # 保留任务引用，防止提前结束后仍在运行的任务被垃圾回收
+            task = asyncio.create_task(run_producer(i, query))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        result_lists: List[List[Dict]] = [[] for _ in querys]
+        seen = set()
+        emitted, finished, failed = 0, 0, 0
+        try:
+            while finished < len(querys) and emitted < max_results:
+                query_index, item = await queue.get()
+                if item is None:
+                    finished += 1
+                    continue
+                if isinstance(item, Exception):
+                    failed += 1
+                    logger.error(f"查询 '{querys[query_index]}' 检索失败: {str(item)}")
+                    continue
+                result_lists[query_index].extend(item)
+                new_papers = []
+                for paper in item:
+                    if paper["paper_id"] not in seen:
+                        seen.add(paper["paper_id"])
+                        new_papers.append(paper)
+                new_papers = new_papers[:max_results - emitted]
+                if new_papers:
+                    emitted += len(new_papers)
+                    yield new_papers
+        finally:
+            stop_event.set()
+
+        # 全部查询正常结束时写入缓存，缓存中保存按相关度合并后的结果，与search_papers一致
+        if self.cache is not None and finished == len(querys) and failed == 0:
+            papers, complete = self._merge_for_cache(result_lists, per_query, max_results)
+            await asyncio.to_thread(self.cache.put, cache_key, date_window, max_results, complete, papers)
+        elif failed == len(querys):
+            raise RuntimeError("所有查询条件均检索失败")
+
+        # 提前结束时不等待仍在下载当前页的线程，它们会在翻页前检查stop_event后退出
+        logger.info(f"流式论文搜索完成，共找到 {emitted} 篇论文")
+
+    def _date_window(self,
+                     start_date: Optional[Union[str, datetime]] = None,
+                     end_date: Optional[Union[str, datetime]] = None) -> Optional[Tuple[str, str]]:
+        """计算arXiv格式的(开始, 结束)日期窗口，未指定日期时返回None"""
+        if not start_date and not end_date:
+            return None
+        start_date_str = self._format_date(start_date) if start_date else "190001010000"
+        end_date_str = self._format_date(end_date) if end_date else datetime.now().strftime("%Y%m%d2359")
+        return start_date_str, end_date_str
+
+    def _fetch_query(self,
+                     query: str,
+                     date_window: Optional[Tuple[str, str]],
+                     max_results: int,
+                     sort_by: arxiv.SortCriterion,
+                     sort_order: arxiv.SortOrder) -> List[Dict]:
+        """
+        同步执行单个查询的分页检索（在工作线程中运行）
+
+        参数:
+            query: 单个查询词
+            date_window: arXiv格式的(开始, 结束)日期窗口，None表示不限日期
+            max_results: 该查询最多返回的结果数量
+
+        返回:
+            按相关度排序的论文信息字典列表
+        """
+        return [paper for page in self._iter_query_pages(query, date_window, max_results, sort_by, sort_order)
+                for paper in page]
+
+    def _iter_query_pages(self,
+                          query: str,
+                          date_window: Optional[Tuple[str, str]],
+                          max_results: int,
+                          sort_by: arxiv.SortCriterion,
+                          sort_order: arxiv.SortOrder,
+                          stop_event: Optional[threading.Event] = None) -> Iterator[List[Dict]]:
+        """
+        逐页检索单个查询，每下载完一页就产出该页解析后的论文（在工作线程中运行）
+
+        参数:
+            stop_event: 设置后在下一页开始前停止翻页，用于消费方提前结束时释放线程
+        """
+        if self.local_index is not None:
+            yield self.local_index.search(query, max_results, sort_by, sort_order, date_window)
+            return
+
+        search_query = f"all:%22{query}%22"
+        if date_window:
+            search_query = f"{search_query} AND submittedDate:[{date_window[0]} TO {date_window[1]}]"
+        logger.info(f"论文搜索查询条件: {search_query}")
+
+        page_size = min(max_results, config.get_int("paper_search.page_size", 100))
+        # 所有线程共用进程内的arXiv客户端，由其统一限速、退避和按页重试
+        for page in get_arxiv_client().iter_pages(search_query, max_results, page_size, sort_by, sort_order, stop_event):
+            yield self.format_papers_list(page)
+
+    def _per_query_limit(self, max_results: int, n_queries: int) -> int:
+        """
+        每个查询词检索的结果数上限：max_results × paper_search.per_query_overfetch / 查询词数
+
+        所有查询共用进程内每3秒一次的arXiv限速，每个查询都取满max_results时请求数和结果量都是原来的N倍。
+        按比例分摊后总请求量约为单个查询的overfetch倍；代价是查询之间重复较多时去重后可能不足max_results篇，
+        且某个查询排名靠后的结果不会被取回。本地索引检索没有限速，不做分摊。
+        """
+        if self.local_index is not None or n_queries <= 1:
+            return max_results
+        overfetch = config.get_float("paper_search.per_query_overfetch", 1.5)
+        return max(1, min(max_results, math.ceil(max_results * overfetch / n_queries)))
+
+    def _merge_for_cache(self, result_lists: List[List[Dict]], per_query: int, max_results: int) -> Tuple[List[Dict], bool]:
+        """
+        合并各查询的结果，并判断合并结果是否包含日期窗口内的全部论文
+
+        只有各子查询都未达到结果数上限（已取完）、且去重后的并集没有因max_results被截断时才算完整，
+        否则缓存不能用于更大的请求或子窗口过滤。
+
+        返回:
+            (截断到max_results的合并结果, 是否完整)
+        """
+        merged = self._merge_results(result_lists)
+        complete = all(len(result_list) < per_query for result_list in result_lists) and len(merged) <= max_results
+        return merged[:max_results], complete
+
+    def _merge_results(self, result_lists: List[List[Dict]], max_results: Optional[int] = None) -> List[Dict]:
+        """
+        按paper_id合并多个查询的结果并去重
+
+        排序规则：论文在各查询结果中的最好名次优先，名次相同时按查询顺序，
+        保证合并结果的顺序稳定且保留各查询的相关度排序。max_results为None时不截断。
+        """
+        best_rank: Dict[str, tuple] = {}
+        papers: Dict[str, Dict] = {}
+        for query_index, result_list in enumerate(result_lists):
+            for rank, paper in enumerate(result_list):
+                paper_id = paper["paper_id"]
+                key = (rank, query_index)
+                if paper_id not in best_rank or key < best_rank[paper_id]:
+                    best_rank[paper_id] = key
+                    papers[paper_id] = paper
+
+        merged = sorted(papers.values(), key=lambda paper: best_rank[paper["paper_id"]])
+        return merged[:max_results]
     
     async def search_by_topic(self, 
                        topic: str, 
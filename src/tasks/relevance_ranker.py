@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.config import config
+from src.services.embedding_service import create_embedding_service
+from src.services.embedding_store import get_embedding_store
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class RelevanceRanker:
+    """基于嵌入向量的论文相关度预排序，在LLM阅读前剔除与用户需求无关的论文"""
+
+    def __init__(self,
+                 top_n: Optional[int] = None,
+                 threshold: Optional[float] = None,
+                 min_keep: Optional[int] = None):
+        """
+        初始化相关度排序器
+
+        参数:
+            top_n: 最多保留的论文数量，0表示不限制，默认读取triage.top_n配置
+            threshold: 余弦相似度阈值，低于该值的论文被剔除，默认读取triage.similarity_threshold配置
+            min_keep: 所有论文都低于阈值时至少保留的论文数量，默认读取triage.min_keep配置
+        """
+        self.top_n = top_n if top_n is not None else config.get_int("triage.top_n", 30)
+        self.threshold = threshold if threshold is not None else config.get_float("triage.similarity_threshold", 0.3)
+        self.min_keep = min_keep if min_keep is not None else config.get_int("triage.min_keep", 5)
+        self.embedding_service = create_embedding_service("triage-embedding-model")
+        self._request_vector: Optional[np.ndarray] = None
+
+    @staticmethod
+    def paper_text(paper: Dict) -> str:
+        """用于相关度计算的论文文本：标题 + 摘要"""
+        return f"{paper.get('title', '')}\n{paper.get('summary', '')}".strip()
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """批量生成嵌入向量（已缓存的文本不再请求），返回L2归一化的矩阵"""
+        vectors = await get_embedding_store().aget_or_embed(
+            texts, self.embedding_service.model_key, 0, self.embedding_service.aembed
+        )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    async def score(self, user_request: str, papers: List[Dict]) -> np.ndarray:
+        """计算每篇论文与用户需求的余弦相似度，用户需求的向量只计算一次"""
+        if not papers:
+            return np.zeros(0, dtype=np.float32)
+        texts = [self.paper_text(paper) for paper in papers]
+        if self._request_vector is None:
+            vectors = await self.embed([user_request] + texts)
+            self._request_vector, paper_vectors = vectors[0], vectors[1:]
+        else:
+            paper_vectors = await self.embed(texts)
+        return paper_vectors @ self._request_vector
+
+    def select(self,
+               papers: List[Dict],
+               scores: np.ndarray,
+               limit: Optional[int] = None,
+               fallback: bool = True) -> Tuple[List[Dict], List[Dict]]:
+        """
+        按阈值和数量上限筛选论文
+
+        参数:
+            limit: 本次最多保留的数量，默认为top_n（0表示不限制）
+            fallback: 全部低于阈值时是否保留得分最高的min_keep篇（流式逐页筛选时关闭）
+
+        返回:
+            (保留的论文, 剔除的论文)，保留的论文保持原有顺序，每篇论文附带relevance_score字段
+        """
+        limit = self.top_n if limit is None else limit
+        order = np.argsort(-scores, kind="stable")
+        selected = [i for i in order if scores[i] >= self.threshold]
+        if not selected and fallback:
+            # 全部低于阈值时保留得分最高的几篇，避免阅读阶段无论文可读
+            selected = list(order[:self.min_keep])
+        if limit and limit > 0:
+            selected = selected[:limit]
+
+        selected_set = set(int(i) for i in selected)
+        kept, dropped = [], []
+        for i, paper in enumerate(papers):
+            paper["relevance_score"] = round(float(scores[i]), 4)
+            (kept if i in selected_set else dropped).append(paper)
+        return kept, dropped
+
+    async def rank(self, user_request: str, papers: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """对完整的论文列表打分并筛选，返回(保留的论文, 剔除的论文)"""
+        scores = await self.score(user_request, papers)
+        kept, dropped = self.select(papers, scores)
+        logger.info(f"相关度预筛选完成：保留 {len(kept)} 篇，剔除 {len(dropped)} 篇")
+        return kept, dropped
+
+
+def format_dropped_papers(dropped: List[Dict]) -> str:
+    """生成推送给前端的剔除论文说明"""
+    lines = [f"相关度预筛选剔除 {len(dropped)} 篇论文："]
+    for paper in sorted(dropped, key=lambda paper: paper.get("relevance_score", 0), reverse=True):
+        lines.append(f"- {paper.get('title', paper.get('paper_id'))}（相关度 {paper.get('relevance_score', 0):.2f}）")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,147 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.core.config import config
+from src.utils import hashstr
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 未指定日期范围时使用的窗口边界（与arXiv的YYYYMMDDTTTT格式一致，可直接按字符串比较）
+MIN_DATE = "190001010000"
+MAX_DATE = "999912312359"
+
+
+class SearchCache:
+    """arXiv检索结果的SQLite持久化缓存
+
+    缓存键由规范化后的查询词集合、排序方式组成，每条缓存记录保存检索时的日期窗口。
+    请求的日期窗口与缓存完全相同时直接复用；请求窗口落在某个缓存窗口内部、
+    且该缓存记录包含了窗口内的全部结果时，按published_date在本地过滤后返回。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttl: Optional[int] = None):
+        """
+        初始化检索缓存
+
+        参数:
+            db_path: SQLite数据库文件路径，默认为SAVE_DIR/search_cache/arxiv_search.db
+            ttl: 缓存有效期（秒），默认读取paper_search.cache.ttl配置
+        """
+        if db_path is None:
+            db_path = os.path.join(config.get("SAVE_DIR"), "search_cache", "arxiv_search.db")
+        self.db_path = db_path
+        self.ttl = ttl if ttl is not None else config.get_int("paper_search.cache.ttl", 86400)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    query_key TEXT NOT NULL,
+                    start_date TEXT NOT NULL,
+                    end_date TEXT NOT NULL,
+                    max_results INTEGER NOT NULL,
+                    complete INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    papers TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_key ON search_cache (query_key, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def make_key(querys: List[str], sort_by: str, sort_order: str) -> str:
+        """根据规范化的查询词集合和排序方式生成缓存键（与查询词顺序、大小写无关）"""
+        normalized = sorted({" ".join(query.lower().split()) for query in querys if query})
+        return hashstr(json.dumps([normalized, sort_by, sort_order], ensure_ascii=False))
+
+    @staticmethod
+    def normalize_window(window: Optional[Tuple[str, str]]) -> Tuple[str, str]:
+        """将日期窗口规范化为(start, end)，None表示不限日期"""
+        if window is None:
+            return MIN_DATE, MAX_DATE
+        return window
+
+    def get(self,
+            query_key: str,
+            window: Optional[Tuple[str, str]],
+            max_results: int) -> Optional[List[Dict]]:
+        """
+        查询缓存
+
+        参数:
+            query_key: make_key生成的缓存键
+            window: 由_format_date生成的(start, end)日期窗口，None表示不限日期
+            max_results: 本次请求的最大结果数量
+
+        返回:
+            命中时返回论文列表，否则返回None
+        """
+        start, end = self.normalize_window(window)
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT start_date, end_date, max_results, complete, papers FROM search_cache
+                WHERE query_key = ? AND created_at >= ? AND start_date <= ? AND end_date >= ?
+                ORDER BY created_at DESC
+                """,
+                (query_key, time.time() - self.ttl, start, end),
+            ).fetchall()
+
+        for cached_start, cached_end, cached_max_results, complete, papers_json in rows:
+            exact = cached_start == start and cached_end == end
+            if exact and (complete or cached_max_results >= max_results):
+                papers = json.loads(papers_json)
+                return papers[:max_results]
+            # 缓存窗口覆盖请求窗口时，只有缓存包含窗口内全部结果才能在本地过滤，
+            # 否则被截断的结果集会漏掉子窗口内排名靠后的论文
+            if not exact and complete:
+                papers = [paper for paper in json.loads(papers_json) if self._in_window(paper, start, end)]
+                return papers[:max_results]
+        return None
+
+    def put(self,
+            query_key: str,
+            window: Optional[Tuple[str, str]],
+            max_results: int,
+            complete: bool,
+            papers: List[Dict]) -> None:
+        """
+        写入缓存
+
+        参数:
+            complete: 结果是否包含日期窗口内的全部论文（各子查询均未达到结果数上限）
+        """
+        start, end = self.normalize_window(window)
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM search_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            conn.execute(
+                """
+                INSERT INTO search_cache (query_key, start_date, end_date, max_results, complete, created_at, papers)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (query_key, start, end, max_results, int(complete), time.time(), json.dumps(papers, ensure_ascii=False)),
+            )
+
+    @staticmethod
+    def _in_window(paper: Dict, start: str, end: str) -> bool:
+        """判断论文的发表时间是否落在日期窗口内"""
+        published_date = paper.get("published_date")
+        if not published_date:
+            return False
+        try:
+            published = datetime.fromisoformat(published_date).strftime("%Y%m%d%H%M")
+        except ValueError:
+            return False
+        return start <= published <= end
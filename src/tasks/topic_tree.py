@@ -0,0 +1,157 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.cluster import AgglomerativeClustering
+
+from src.core.config import config
+from src.tasks.cluster_selection import reduce_dimensions
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class TopicNode:
+    """主题树切分结果中的一个节点，indices为其包含的论文在输入中的下标"""
+    indices: List[int]
+    children: List["TopicNode"] = field(default_factory=list)
+
+
+def knn_graph(features: np.ndarray, n_neighbors: int, block_size: int = 1024) -> csr_matrix:
+    """
+    构建对称的kNN连通图（余弦相似度）
+
+    按行分块做矩阵乘法并用argpartition取每行的前k个邻居，内存占用为O(block_size * n)。
+    """
+    n_samples = len(features)
+    n_neighbors = min(n_neighbors, n_samples - 1)
+    normed = features / np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-12)
+    rows, cols = [], []
+    for start in range(0, n_samples, block_size):
+        block = normed[start:start + block_size] @ normed.T
+        block[np.arange(len(block)), np.arange(start, start + len(block))] = -np.inf
+        neighbors = np.argpartition(-block, n_neighbors - 1, axis=1)[:, :n_neighbors]
+        rows.append(np.repeat(np.arange(start, start + len(block)), n_neighbors))
+        cols.append(neighbors.ravel())
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    graph = csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n_samples, n_samples))
+    return graph.maximum(graph.T)
+
+
+def cut_topic_tree(children: np.ndarray,
+                   costs: Sequence[int],
+                   n_top: int,
+                   max_papers: int,
+                   max_tokens: int,
+                   min_papers: int) -> List[TopicNode]:
+    """
+    切分层次聚类树
+
+    先按合并顺序切出不超过n_top个顶层主题，再把每个顶层主题向下拆分，
+    直到每个叶子的论文数不超过max_papers、token数不超过max_tokens；
+    最后把树序相邻、论文数少于min_papers的叶子在预算内合并，避免碎片化。
+
+    参数:
+        children: AgglomerativeClustering.children_，第i行是第n+i个节点的两个子节点
+        costs: 每篇论文的token数
+    """
+    n_samples = len(costs)
+    sizes = np.ones(n_samples + len(children), dtype=np.int64)
+    tokens = np.zeros(n_samples + len(children), dtype=np.int64)
+    tokens[:n_samples] = costs
+    for i, (left, right) in enumerate(children):
+        sizes[n_samples + i] = sizes[left] + sizes[right]
+        tokens[n_samples + i] = tokens[left] + tokens[right]
+
+    def leaves_of(node: int) -> List[int]:
+        stack, result = [node], []
+        while stack:
+            current = stack.pop()
+            if current < n_samples:
+                result.append(current)
+            else:
+                stack.extend(reversed(children[current - n_samples]))
+        return result
+
+    def fits(size: int, token_count: int) -> bool:
+        return size <= max_papers and token_count <= max_tokens
+
+    # 顶层：每次拆开最后合并（距离最大）的节点，等价于按聚类数量切树
+    tops = [n_samples + len(children) - 1]
+    while len(tops) < n_top and any(node >= n_samples for node in tops):
+        node = max(tops)
+        tops.remove(node)
+        tops.extend(children[node - n_samples])
+    tops.sort(key=lambda node: min(leaves_of(node)))
+
+    result = []
+    for top in tops:
+        # 按树序（深度优先）拆分到预算以内，树序相邻的叶子主题相近
+        leaves, stack = [], [top]
+        while stack:
+            node = stack.pop()
+            if node < n_samples or fits(sizes[node], tokens[node]):
+                leaves.append((leaves_of(node), int(sizes[node]), int(tokens[node])))
+            else:
+                stack.extend(reversed(children[node - n_samples]))
+
+        merged = []
+        for indices, size, token_count in leaves:
+            if merged:
+                last_indices, last_size, last_tokens = merged[-1]
+                if (size < min_papers or last_size < min_papers) and fits(last_size + size, last_tokens + token_count):
+                    merged[-1] = (last_indices + indices, last_size + size, last_tokens + token_count)
+                    continue
+            merged.append((indices, size, token_count))
+
+        if len(merged) == 1:
+            result.append(TopicNode(indices=sorted(merged[0][0])))
+        else:
+            result.append(TopicNode(indices=sorted(leaves_of(top)),
+                                    children=[TopicNode(indices=sorted(indices)) for indices, _, _ in merged]))
+    return result
+
+
+def build_topic_tree(embeddings: np.ndarray,
+                     costs: Sequence[int],
+                     n_top: Optional[int] = None,
+                     max_papers: Optional[int] = None,
+                     max_tokens: Optional[int] = None,
+                     min_papers: Optional[int] = None,
+                     n_neighbors: Optional[int] = None,
+                     pca_components: Optional[int] = None) -> List[TopicNode]:
+    """
+    层次主题聚类：PCA降维后在kNN连通图约束下做Ward层次聚类，再按预算切分主题树
+
+    参数缺省时读取clustering和clustering.hierarchical配置。
+
+    返回:
+        顶层主题列表，超出预算的顶层主题带有children（叶子主题）
+    """
+    n_top = n_top or config.get_int("clustering.max_k", 5)
+    max_papers = max_papers or config.get_int("clustering.hierarchical.max_papers", 40)
+    max_tokens = max_tokens or config.get_int("clustering.hierarchical.max_tokens", 24000)
+    min_papers = min_papers or config.get_int("clustering.hierarchical.min_papers", 5)
+    n_neighbors = n_neighbors or config.get_int("clustering.hierarchical.n_neighbors", 15)
+    pca_components = pca_components or config.get_int("clustering.pca_components", 50)
+
+    n_samples = len(embeddings)
+    if n_samples <= 2:
+        return [TopicNode(indices=list(range(n_samples)))]
+
+    features = reduce_dimensions(embeddings, pca_components)
+    features = features / np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-12)
+    model = AgglomerativeClustering(
+        n_clusters=1,
+        linkage="ward",
+        connectivity=knn_graph(features, n_neighbors),
+        compute_full_tree=True,
+    ).fit(features)
+
+    tree = cut_topic_tree(model.children_, costs, n_top, max_papers, max_tokens, min_papers)
+    leaf_sizes = [len(leaf.indices) for top in tree for leaf in (top.children or [top])]
+    logger.info(f"层次聚类完成: {len(tree)} 个顶层主题，{len(leaf_sizes)} 个叶子主题，"
+                f"叶子论文数 {min(leaf_sizes)}~{max(leaf_sizes)}")
+    return tree
@@ -0,0 +1,188 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+
+from src.core.config import config
+from src.utils.log_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+# 视为临时故障、可以重试的HTTP状态码
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _iter_causes(error: BaseException):
+    """遍历异常及其引发链（模型客户端的异常可能被框架包装）"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    判断是否为模型服务的限流错误（429）
+
+    只按异常类型和HTTP状态码判断，不匹配错误信息文本：信息中的arXiv ID、URL、字节数等
+    可能恰好包含"429"，误判会使并发上限无故减半。
+    """
+    return any(isinstance(e, openai.RateLimitError) or getattr(e, "status_code", None) == 429
+               for e in _iter_causes(error))
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """判断是否为可重试的临时故障：限流、超时、连接错误、服务端错误"""
+    for e in _iter_causes(error):
+        if isinstance(e, (asyncio.TimeoutError, ConnectionError, openai.APIConnectionError, openai.APITimeoutError)):
+            return True
+        if getattr(e, "status_code", None) in TRANSIENT_STATUS:
+            return True
+    return is_rate_limit_error(error)
+
+
+class AdaptiveScheduler:
+    """自适应并发调度器，用于批量调用大模型
+
+    并发上限按AIMD（加性增、乘性减）自动调整：调用成功且延迟低于目标时上限缓慢增加，
+    遇到429限流时上限减半、延迟超过目标时小幅下降，从而逼近服务商允许的最大持续吞吐。
+    每次调用有超时限制，临时故障在退避后重新排到等待队列末尾重试。
+    """
+
+    def __init__(self,
+                 max_concurrency: Optional[int] = None,
+                 min_concurrency: Optional[int] = None,
+                 initial_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 latency_target: Optional[float] = None,
+                 name: str = "scheduler"):
+        """
+        初始化调度器，未指定的参数读取reading配置节
+
+        参数:
+            max_concurrency: 并发上限的最大值
+            min_concurrency: 并发上限的最小值
+            initial_concurrency: 初始并发上限
+            timeout: 单次调用超时（秒），0表示不限制
+            max_retries: 临时故障的最大重试次数
+            latency_target: 目标延迟（秒），超过后降低并发，0表示不按延迟调整
+            name: 日志中显示的名称
+        """
+        self.max_concurrency = max_concurrency or config.get_int("reading.max_concurrency", 16)
+        self.min_concurrency = min_concurrency or config.get_int("reading.min_concurrency", 1)
+        initial = initial_concurrency or config.get_int("reading.initial_concurrency", 4)
+        self.timeout = timeout if timeout is not None else config.get_float("reading.timeout", 180)
+        self.max_retries = max_retries if max_retries is not None else config.get_int("reading.max_retries", 3)
+        self.latency_target = latency_target if latency_target is not None else config.get_float("reading.latency_target", 60)
+        self.name = name
+
+        self.limit = float(min(max(initial, self.min_concurrency), self.max_concurrency))
+        self._active = 0
+        self._condition = asyncio.Condition()
+        self._last_decrease = 0.0
+
+        self.started_at = time.monotonic()
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.rate_limited = 0
+
+    @property
+    def throughput(self) -> float:
+        """吞吐量：每分钟完成的调用数"""
+        elapsed = time.monotonic() - self.started_at
+        return self.completed / elapsed * 60 if elapsed > 0 else 0.0
+
+    def stats(self) -> Dict:
+        """当前运行指标"""
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "rate_limited": self.rate_limited,
+            "concurrency": int(self.limit),
+            "elapsed": round(time.monotonic() - self.started_at, 1),
+            "throughput": round(self.throughput, 2),
+        }
+
+    async def _acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < int(self.limit))
+            self._active += 1
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def _increase(self) -> None:
+        # 加性增：每完成约limit个调用，上限加1
+        self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def _decrease(self, factor: float, started_at: float) -> None:
+        # 同一轮拥塞只降低一次：上次降低之前发出的调用反馈的信号不再重复计算
+        if started_at < self._last_decrease:
+            return
+        self.limit = max(self.min_concurrency, self.limit * factor)
+        self._last_decrease = time.monotonic()
+        logger.info(f"{self.name}: 并发上限调整为 {int(self.limit)}")
+
+    async def submit(self, func: Callable[[], Awaitable[T]], label: str = "") -> T:
+        """
+        在并发上限内执行一次调用，临时故障自动重试
+
+        参数:
+            func: 每次尝试时调用以生成新的协程
+            label: 日志中显示的调用标识
+
+        返回:
+            调用结果，重试耗尽或遇到非临时故障时抛出最后一次的异常
+        """
+        attempt = 0
+        while True:
+            await self._acquire()
+            started_at = time.monotonic()
+            try:
+                if self.timeout > 0:
+                    result = await asyncio.wait_for(func(), timeout=self.timeout)
+                else:
+                    result = await func()
+            except Exception as e:
+                latency = time.monotonic() - started_at
+                if is_rate_limit_error(e):
+                    self.rate_limited += 1
+                    self._decrease(0.5, started_at)
+                elif isinstance(e, asyncio.TimeoutError):
+                    self._decrease(0.75, started_at)
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    self.failed += 1
+                    logger.error(f"{self.name}: {label} 调用失败（已重试{attempt}次，耗时{latency:.1f}秒）: {e!r}")
+                    raise
+                attempt += 1
+                self.retried += 1
+                logger.warning(f"{self.name}: {label} 临时故障，第{attempt}次重试: {e!r}")
+            else:
+                latency = time.monotonic() - started_at
+                if self.latency_target > 0 and latency > self.latency_target:
+                    self._decrease(0.9, started_at)
+                else:
+                    self._increase()
+                self.completed += 1
+                return result
+            finally:
+                await self._release()
+
+            # 释放并发名额后退避，再重新排到等待队列末尾
+            await asyncio.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1.0))
+
+    def log_summary(self) -> None:
+        stats = self.stats()
+        logger.info(f"{self.name}: 完成 {stats['completed']} 个，失败 {stats['failed']} 个，重试 {stats['retried']} 次"
+                    f"（其中限流 {stats['rate_limited']} 次），耗时 {stats['elapsed']} 秒，"
+                    f"吞吐 {stats['throughput']} 个/分钟，最终并发上限 {stats['concurrency']}")
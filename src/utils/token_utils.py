@@ -0,0 +1,70 @@
+import re
+from typing import Callable, Generic, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# 中日韩字符，每个字符大约对应一个token
+CJK_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的token数量（不依赖具体模型的分词器）
+
+    中日韩字符按每字1个token计，其余字符按每4个字符1个token计，
+    对常见的BPE分词器是偏保守的估计。
+    """
+    if not text:
+        return 0
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def pack_by_budget(items: Sequence[T],
+                   cost: Callable[[T], int],
+                   token_budget: int,
+                   max_items: int) -> List[List[T]]:
+    """
+    按token预算将items顺序打包成若干批
+
+    参数:
+        cost: 计算单个元素占用token数的函数
+        token_budget: 每批的token上限，单个元素超过上限时单独成批
+        max_items: 每批的最大元素数量
+
+    返回:
+        保持原有顺序的批次列表
+    """
+    packer = BudgetPacker(cost, token_budget, max_items)
+    batches = [batch for item in items for batch in packer.add(item)]
+    return batches + packer.flush()
+
+
+class BudgetPacker(Generic[T]):
+    """
+    按token预算增量打包，用于元素陆续到达的场景：每加入一个元素返回已装满的批次
+
+    打包规则与pack_by_budget相同，但达到max_items的批次立即返回，不等待下一个元素。
+    """
+
+    def __init__(self, cost: Callable[[T], int], token_budget: int, max_items: int):
+        self.cost = cost
+        self.token_budget = token_budget
+        self.max_items = max_items
+        self.batch: List[T] = []
+        self.used = 0
+
+    def add(self, item: T) -> List[List[T]]:
+        full = []
+        item_cost = self.cost(item)
+        if self.batch and self.used + item_cost > self.token_budget:
+            full.extend(self.flush())
+        self.batch.append(item)
+        self.used += item_cost
+        if len(self.batch) >= self.max_items:
+            full.extend(self.flush())
+        return full
+
+    def flush(self) -> List[List[T]]:
+        """取出未装满的批次（没有时返回空列表）"""
+        batch, self.batch, self.used = self.batch, [], 0
+        return [batch] if batch else []
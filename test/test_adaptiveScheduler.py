@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from src.utils.adaptive_scheduler import AdaptiveScheduler, is_rate_limit_error
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_rate_limit_halves_concurrency_and_retries():
+    async def run():
+        scheduler = AdaptiveScheduler(max_concurrency=8, min_concurrency=1, initial_concurrency=8,
+                                      timeout=5, max_retries=2, latency_target=0)
+        calls = {"count": 0, "active": 0, "peak_after_429": 0}
+
+        async def call(i):
+            calls["count"] += 1
+            calls["active"] += 1
+            try:
+                await asyncio.sleep(0.01)
+                if calls["count"] <= 8:
+                    raise ProviderError(429)
+                calls["peak_after_429"] = max(calls["peak_after_429"], calls["active"])
+                return i
+            finally:
+                calls["active"] -= 1
+
+        results = await asyncio.gather(*[scheduler.submit(lambda i=i: call(i)) for i in range(8)])
+        return scheduler, results, calls
+
+    scheduler, results, calls = asyncio.run(run())
+
+    assert results == list(range(8))
+    assert scheduler.rate_limited == 8 and scheduler.retried == 8
+    # 同一轮限流只减半一次
+    assert calls["peak_after_429"] <= 4
+    assert scheduler.stats()["throughput"] > 0
+
+
+def test_non_transient_error_not_retried():
+    async def run():
+        scheduler = AdaptiveScheduler(initial_concurrency=2, timeout=5, max_retries=3, latency_target=0)
+
+        async def call():
+            raise ProviderError(400)
+
+        with pytest.raises(ProviderError):
+            await scheduler.submit(call)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert scheduler.failed == 1 and scheduler.retried == 0
+
+
+def test_timeout_is_retried():
+    async def run():
+        scheduler = AdaptiveScheduler(initial_concurrency=1, timeout=0.05, max_retries=1, latency_target=0)
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                await asyncio.sleep(1)
+            return "ok"
+
+        return await scheduler.submit(call), attempts
+
+    result, attempts = asyncio.run(run())
+    assert result == "ok" and len(attempts) == 2
+
+
+def test_rate_limit_classified_by_status_not_message():
+    assert is_rate_limit_error(ProviderError(429))
+    # 包装后的限流错误按引发链识别
+    try:
+        try:
+            raise ProviderError(429)
+        except ProviderError as e:
+            raise RuntimeError("模型调用失败") from e
+    except RuntimeError as wrapped:
+        assert is_rate_limit_error(wrapped)
+    # 信息中恰好含有"429"的其他错误不是限流
+    assert not is_rate_limit_error(ValueError("论文 2404.29001v1 的抽取结果校验失败"))
+    assert not is_rate_limit_error(ProviderError(500))
+    assert not is_rate_limit_error(ConnectionError("read 4290 bytes from https://arxiv.org/abs/2404.04290"))
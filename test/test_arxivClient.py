@@ -0,0 +1,132 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import feedparser
+import pytest
+
+from src.services.arxiv_client import ArxivAPIError, ArxivClient, TokenBucket, result_from_entry
+
+ENTRY = """
+  <entry>
+    <id>http://arxiv.org/abs/2411.1160{n}v1</id>
+    <updated>2024-11-18T14:29:22Z</updated>
+    <published>2024-11-18T14:29:22Z</published>
+    <title>Paper {n}</title>
+    <summary>Summary {n}</summary>
+    <author><name>Author {n}</name></author>
+    <link href="http://arxiv.org/abs/2411.1160{n}v1" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/2411.1160{n}v1" rel="related" type="application/pdf"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.RO" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.RO" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>"""
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">
+  <title>arXiv Query</title>
+  <opensearch:totalResults>{total}</opensearch:totalResults>
+  <opensearch:startIndex>{start}</opensearch:startIndex>
+  {entries}
+</feed>"""
+
+TOTAL = 3
+
+
+class StubArxivHandler(BaseHTTPRequestHandler):
+    """模拟arXiv API：前failures次请求返回503，之后按start/max_results分页返回结果"""
+
+    failures = 0
+    requests = []
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        type(self).requests.append((time.monotonic(), params))
+        if type(self).failures > 0:
+            type(self).failures -= 1
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        start = int(params["start"][0])
+        size = int(params["max_results"][0])
+        entries = "".join(ENTRY.format(n=n) for n in range(start, min(start + size, TOTAL)))
+        body = FEED.format(total=TOTAL, start=start, entries=entries).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubArxivHandler.failures = 0
+    StubArxivHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubArxivHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/query"
+    server.shutdown()
+    server.server_close()
+
+
+def test_pages_fetched_after_503_retry(stub_server):
+    StubArxivHandler.failures = 2
+    client = ArxivClient(base_url=stub_server, delay_seconds=0, num_retries=3, backoff_max=0.01)
+
+    pages = list(client.iter_pages("all:test", max_results=10, page_size=2))
+
+    assert [[result.title for result in page] for page in pages] == [["Paper 0", "Paper 1"], ["Paper 2"]]
+    # 2次503 + 2页
+    assert len(StubArxivHandler.requests) == 4
+    assert [params["start"][0] for _, params in StubArxivHandler.requests[2:]] == ["0", "2"]
+
+
+def test_gives_up_after_retries(stub_server):
+    StubArxivHandler.failures = 10
+    client = ArxivClient(base_url=stub_server, delay_seconds=0, num_retries=2, backoff_max=0.01)
+
+    with pytest.raises(ArxivAPIError):
+        list(client.iter_pages("all:test", max_results=10, page_size=2))
+    assert len(StubArxivHandler.requests) == 3
+
+
+def test_shared_client_spaces_requests_across_threads(stub_server):
+    client = ArxivClient(base_url=stub_server, delay_seconds=0.2, num_retries=0)
+    threads = [threading.Thread(target=lambda: list(client.iter_pages("all:test", max_results=1, page_size=1)))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    times = sorted(t for t, _ in StubArxivHandler.requests)
+    assert len(times) == 3
+    assert all(later - earlier >= 0.18 for earlier, later in zip(times, times[1:]))
+
+
+def test_token_bucket_defer():
+    bucket = TokenBucket(interval=0.05)
+    bucket.acquire()
+    bucket.defer(0.1)
+    assert bucket.acquire() >= 0.14
+
+
+def test_result_from_entry():
+    feed = feedparser.parse(FEED.format(total=1, start=0, entries=ENTRY.format(n=3)))
+    result = result_from_entry(feed.entries[0])
+
+    assert result.get_short_id() == "2411.11603v1"
+    assert result.title == "Paper 3"
+    assert [author.name for author in result.authors] == ["Author 3"]
+    assert result.published.isoformat() == "2024-11-18T14:29:22+00:00"
+    assert result.pdf_url == "http://arxiv.org/pdf/2411.11603v1"
+    assert result.primary_category == "cs.RO" and result.categories == ["cs.RO"]
+
+    with pytest.raises(ValueError):
+        result_from_entry(feedparser.FeedParserDict(title="no id"))
@@ -0,0 +1,41 @@
+import json
+from types import SimpleNamespace
+
+from src.agents.reading_agent import parse_batch_result
+
+BATCH = [{"paper_id": "2501.00001v2"}, {"paper_id": "2501.00002v1"}, {"paper_id": "2501.00003v1"}]
+
+
+def task_result(content):
+    """模拟批量阅读智能体的TaskResult，只保留最后一条消息"""
+    return SimpleNamespace(messages=[SimpleNamespace(content=content)])
+
+
+def item(paper_id, **fields):
+    return {"paper_id": paper_id, "core_problem": f"{paper_id}的核心问题", **fields}
+
+
+def test_parse_full_batch_list_and_wrapped():
+    papers = [item(paper["paper_id"]) for paper in BATCH]
+    for content in (json.dumps(papers), "```json\n" + json.dumps({"papers": papers}) + "\n```"):
+        parsed = parse_batch_result(task_result(content), BATCH)
+        assert sorted(parsed) == sorted(paper["paper_id"] for paper in BATCH)
+        assert parsed["2501.00002v1"].core_problem == "2501.00002v1的核心问题"
+
+
+def test_parse_partial_batch_keeps_valid_papers():
+    content = json.dumps([
+        item("2501.00001"),  # 省略版本号，按不含版本号的ID匹配
+        item("2501.00002v1", key_methodology="不是对象"),  # 校验失败
+        item("9999.99999v1"),  # 不在本批中
+        item("2501.00001v2", core_problem="重复的结果"),  # 同一论文的第二份结果被忽略
+        "不是字典",
+    ])
+    parsed = parse_batch_result(task_result(content), BATCH)
+    assert list(parsed) == ["2501.00001v2"]
+    assert parsed["2501.00001v2"].core_problem == "2501.00001的核心问题"
+
+
+def test_parse_malformed_batch_returns_empty():
+    for content in ("不是JSON", '[{"paper_id": "2501.00001v2", ', json.dumps({"result": []}), json.dumps("字符串"), None):
+        assert parse_batch_result(task_result(content), BATCH) == {}
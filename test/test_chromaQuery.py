@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+
+from src.knowledge.knowledge.implementations.chroma import ChromaKB
+
+
+class FakeEmbeddingFunction:
+    """记录异步嵌入的调用，向量的第一维是查询文本的序号"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def aembed(self, input):
+        self.calls.append(list(input))
+        await asyncio.sleep(0.05)
+        return [[float(text.removeprefix("查询"))] for text in input]
+
+
+class SlowCollection:
+    """模拟同步阻塞的collection.query"""
+
+    def __init__(self):
+        self.threads = set()
+
+    def query(self, query_embeddings, n_results, include):
+        self.threads.add(threading.get_ident())
+        time.sleep(0.2)
+        return {
+            "documents": [[f"查询{int(vector[0])}的文档块"] for vector in query_embeddings],
+            "metadatas": [[{"chunk_id": str(vector[0])}] for vector in query_embeddings],
+            "distances": [[0.1] for _ in query_embeddings],
+        }
+
+
+def test_concurrent_queries_do_not_block_event_loop():
+    kb = object.__new__(ChromaKB)
+    collection = SlowCollection()
+    kb.collections = {"kb": collection}
+    kb.databases_meta = {"kb": {"embed_info": None}}
+    embedding_function = FakeEmbeddingFunction()
+    kb._get_embedding_function = lambda embed_info: embedding_function
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.02)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.monotonic()
+        results = await asyncio.gather(*[kb.aquery("kb", f"查询{i}", top_k=1, similarity_threshold=0.0) for i in range(4)])
+        elapsed = time.monotonic() - started
+        beat.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(run())
+    assert [chunks[0]["content"] for chunks in results] == [f"查询{i}的文档块" for i in range(4)]
+    # 四次查询同时进行，事件循环在查询期间保持响应
+    assert elapsed < 0.6
+    assert ticks >= 5
+    assert threading.get_ident() not in collection.threads
+    # 查询文本经异步嵌入路径生成向量，不在collection.query中同步嵌入
+    assert sorted(embedding_function.calls) == [[f"查询{i}"] for i in range(4)]
@@ -0,0 +1,27 @@
+from src.tasks.cluster_keywords import analyze, cluster_themes
+
+
+def paper(problem, method, contributions):
+    return {"core_problem": problem, "key_methodology": {"name": method}, "contributions": contributions}
+
+
+def test_keywords_distinguish_clusters():
+    slam = [paper("激光雷达SLAM在动态场景中的定位漂移", "LiDAR SLAM with dynamic object removal", ["回环检测"]),
+            paper("视觉SLAM的回环检测", "Visual SLAM loop closure", ["回环检测与重定位"])]
+    llm = [paper("大语言模型的幻觉问题", "Retrieval-augmented generation", ["降低幻觉"]),
+           paper("大语言模型推理成本高", "Speculative decoding for LLM inference", ["推理加速"])]
+
+    (slam_theme, slam_keywords), (llm_theme, llm_keywords) = cluster_themes([slam, llm], top_n=5)
+    assert "slam" in slam_keywords
+    assert any("回环检测" in keyword for keyword in slam_keywords)
+    assert any("语言模型" in keyword for keyword in llm_keywords)
+    assert not set(slam_keywords) & set(llm_keywords)
+    assert slam_theme.startswith(slam_keywords[0])
+
+
+def test_analyzer_skips_stop_words_and_particles():
+    tokens = list(analyze("We propose a novel graph neural network 的方法"))
+    assert "propose" not in tokens and "novel" not in tokens
+    assert "graph neural" in tokens
+    assert not any("的" in token for token in tokens)
+    assert cluster_themes([[{}]])[0] == ("未分类研究主题", ["research"])
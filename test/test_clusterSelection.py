@@ -0,0 +1,26 @@
+import numpy as np
+
+from src.tasks.cluster_selection import select_clusters
+
+
+def blobs(n_clusters, per_cluster, dim=256, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim)) * 3
+    return np.vstack([center + rng.normal(size=(per_cluster, dim)) for center in centers]).astype(np.float32)
+
+
+def test_selects_cluster_count_and_reuses_fitted_model():
+    embeddings = blobs(4, 30)
+    selection = select_clusters(embeddings, max_k=8, method="silhouette", n_jobs=2)
+    assert selection.k == 4
+    assert len(selection.labels) == len(embeddings)
+    assert selection.model.n_clusters == 4
+    # 同一个簇内的论文分到同一类
+    assert all(len(set(selection.labels[i:i + 30])) == 1 for i in range(0, 120, 30))
+
+
+def test_minibatch_path_and_tiny_inputs():
+    selection = select_clusters(blobs(3, 400, dim=64), max_k=6, minibatch_threshold=500, sample_size=300)
+    assert selection.k == 3
+    assert type(selection.model).__name__ == "MiniBatchKMeans"
+    assert select_clusters(blobs(1, 2)).k == 1
@@ -0,0 +1,22 @@
+from src.tasks.context_compression import compress_context, split_paragraphs
+from src.utils.token_utils import estimate_tokens
+
+ANALYSIS = "\n\n".join([
+    "# 总体概述\n本次调研共涉及三个研究主题。",
+    "## 检索增强生成\n" + "检索增强生成通过外部知识库减少大模型的幻觉问题。" * 20,
+    "## 代码生成\n" + "代码生成模型在程序合成基准上的表现持续提升。" * 20,
+    "## 多模态理解\n" + "多模态模型联合建模图像与文本。" * 20,
+])
+
+
+def test_short_context_is_unchanged():
+    assert compress_context("简短的全局分析", "代码生成", 100) == "简短的全局分析"
+
+
+def test_keeps_overview_and_relevant_sections():
+    compressed = compress_context(ANALYSIS, "2.1 代码生成方法 (梳理代码生成模型的发展)", 500)
+    paragraphs = split_paragraphs(compressed)
+    assert paragraphs[0].startswith("# 总体概述")
+    assert any(p.startswith("## 代码生成") for p in paragraphs)
+    assert not any(p.startswith("## 多模态理解") for p in paragraphs)
+    assert estimate_tokens(compressed) <= 500 < estimate_tokens(ANALYSIS)
@@ -0,0 +1,61 @@
+import asyncio
+import re
+
+from src.agents.sub_analyse_agent.cluster_agent import PaperCluster
+from src.agents.sub_analyse_agent.deep_analyse_agent import DeepAnalyseAgent
+from src.core.prompts import deep_analyse_reduce_prompt
+
+CLUSTER = PaperCluster(cluster_id=1, papers=[{"paper_id": "2501.00001v1"}], theme_description="主题", keywords=["关键词"])
+
+
+def make_agent(threshold: int, merged: str, fail_on: str = None):
+    """构造不连接大模型的DeepAnalyseAgent，ask按合并提示中的材料数记录每轮合并的规模"""
+    agent = object.__new__(DeepAnalyseAgent)
+    agent.map_reduce_threshold = threshold
+    agent.batch_tokens = threshold
+    agent.max_batch_papers = 20
+    agent.semaphore = asyncio.Semaphore(4)
+    agent.merges = []
+
+    async def ask(prompt, system_message=None):
+        if system_message != deep_analyse_reduce_prompt:
+            return "a" * 120 + " 批次" + re.search(r"第 (\d+)/", prompt).group(1)
+        if fail_on is not None and fail_on in prompt:
+            raise RuntimeError("合并失败")
+        agent.merges.append(prompt.count("份分析\n"))
+        return merged
+
+    agent.ask = ask
+    return agent
+
+
+def test_single_partial_is_returned_without_llm():
+    agent = make_agent(threshold=100, merged="合并")
+    assert asyncio.run(agent.reduce_analyses(CLUSTER, ["唯一一份分析"])) == "唯一一份分析"
+    assert agent.merges == []
+
+
+def test_reduce_groups_by_budget():
+    # 每份约30 token，预算100：第一层按3份一组合并为2份，第二层合并为1份
+    agent = make_agent(threshold=100, merged="m" * 40)
+    result = asyncio.run(agent.reduce_analyses(CLUSTER, ["p" * 120] * 6))
+    assert result == "m" * 40
+    assert agent.merges == [3, 3, 2]
+
+
+def test_reduce_falls_back_to_pairs_when_partials_fill_budget():
+    # 每份都超过预算时两两合并，合并结果仍超预算，共两层
+    agent = make_agent(threshold=100, merged="m" * 480)
+    asyncio.run(agent.reduce_analyses(CLUSTER, ["p" * 480] * 4))
+    assert agent.merges == [2, 2, 2]
+
+
+def test_failed_merge_marks_cluster_as_failed():
+    agent = make_agent(threshold=10, merged="合并", fail_on="批次3")
+    cluster = PaperCluster(cluster_id=2, papers=[{"paper_id": f"2501.0000{i}v1", "summary": "s" * 80} for i in range(4)],
+                           theme_description="主题", keywords=["关键词"])
+    result = asyncio.run(agent.deep_analyze_cluster(cluster))
+    assert result.deep_analyse.startswith("分析失败")
+    assert result.paper_count == 4
+    # 只有包含第3批的合并失败，另一组合并照常完成
+    assert agent.merges == [2]
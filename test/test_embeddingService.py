@@ -0,0 +1,82 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from src.services.embedding_service import EmbeddingService, ServiceEmbeddingFunction
+
+
+class StubEmbeddingHandler(BaseHTTPRequestHandler):
+    """模拟OpenAI兼容的/embeddings接口，记录每次请求的输入"""
+
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StubEmbeddingHandler.requests.append(body["input"])
+        data = [{"object": "embedding", "index": i, "embedding": [float(len(text)), float(i)]}
+                for i, text in enumerate(body["input"])]
+        payload = json.dumps({"object": "list", "data": data, "model": body["model"],
+                              "usage": {"prompt_tokens": 0, "total_tokens": 0}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    StubEmbeddingHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubEmbeddingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+
+
+def test_concurrent_requests_are_coalesced_and_deduplicated(base_url):
+    service = EmbeddingService("stub-model", "key", base_url, max_batch_size=10, max_wait=200)
+
+    async def run():
+        return await asyncio.gather(
+            service.aembed(["a", "bb"]),
+            service.aembed(["bb", "ccc"]),
+            asyncio.to_thread(service.embed, ["a"]),
+        )
+
+    first, second, third = asyncio.run(run())
+    assert len(StubEmbeddingHandler.requests) == 1
+    assert sorted(StubEmbeddingHandler.requests[0]) == ["a", "bb", "ccc"]
+    assert [vector[0] for vector in first] == [1.0, 2.0]
+    assert [vector[0] for vector in second] == [2.0, 3.0]
+    assert third[0] == first[0]
+
+
+def test_batches_respect_size_and_token_limits(base_url):
+    service = EmbeddingService("stub-model", "key", base_url, max_batch_size=2, max_batch_tokens=100, max_wait=50)
+    long_text = "x" * 300  # 约75个token
+
+    vectors = service.embed(["a", "b", "c", long_text, long_text + "y"])
+    assert [vector[0] for vector in vectors] == [1.0, 1.0, 1.0, 300.0, 301.0]
+    assert all(len(batch) <= 2 for batch in StubEmbeddingHandler.requests)
+    assert [long_text, long_text + "y"] not in StubEmbeddingHandler.requests
+
+
+def test_embedding_function_aembed_coalesces_concurrent_queries(base_url):
+    function = ServiceEmbeddingFunction(EmbeddingService("stub-model", "key", base_url, max_batch_size=10, max_wait=200))
+
+    async def run():
+        return await asyncio.gather(*[function.aembed([f"查询{i}"]) for i in range(3)])
+
+    results = asyncio.run(run())
+    # 事件循环中并发的查询嵌入合并为一次请求
+    assert len(StubEmbeddingHandler.requests) == 1
+    assert [vectors[0][0] for vectors in results] == [3.0, 3.0, 3.0]
+    assert results[0][0].dtype == np.float32
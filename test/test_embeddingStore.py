@@ -0,0 +1,48 @@
+import numpy as np
+
+from src.services.embedding_store import EmbeddingStore
+
+
+class CountingEmbedder:
+    """按文本长度生成确定的向量，并记录实际请求嵌入的文本"""
+
+    def __init__(self):
+        self.requested = []
+
+    def __call__(self, texts):
+        self.requested.extend(texts)
+        return [[float(len(text)), float(i), 1.0] for i, text in enumerate(texts)]
+
+
+def test_reuses_vectors_across_instances(tmp_path):
+    embed = CountingEmbedder()
+    store = EmbeddingStore(str(tmp_path))
+    first = np.array(store.get_or_embed(["a", "bb", "a"], "test/model", 3, embed))
+    assert embed.requested == ["a", "bb"]
+    assert first.shape == (3, 3)
+    np.testing.assert_array_equal(first[0], first[2])
+
+    # 新实例（相当于新进程）直接读取已持久化的向量
+    reopened = EmbeddingStore(str(tmp_path))
+    second = reopened.get_or_embed(["bb", "a", "ccc"], "test/model", 3, embed)
+    assert embed.requested == ["a", "bb", "ccc"]
+    np.testing.assert_array_equal(second[0], first[1])
+    np.testing.assert_array_equal(second[1], first[0])
+
+
+def test_model_and_dimension_are_separate_keys(tmp_path):
+    embed = CountingEmbedder()
+    store = EmbeddingStore(str(tmp_path))
+    store.get_or_embed(["a"], "test/model", 3, embed)
+    store.get_or_embed(["a"], "test/other", 3, embed)
+    store.get_or_embed(["a"], "test/model", 0, embed)
+    assert embed.requested == ["a", "a", "a"]
+
+
+def test_contiguous_rows_return_memmap_view(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    texts = [f"paper {i}" for i in range(5)]
+    store.get_or_embed(texts, "test/model", 3, CountingEmbedder())
+    matrix = store.get_or_embed(texts[1:4], "test/model", 3, CountingEmbedder())
+    assert isinstance(matrix, np.memmap)
+    assert matrix.shape == (3, 3)
@@ -0,0 +1,14 @@
+from src.tasks.extraction_cache import ExtractionCache
+
+data = {"core_problem": "ROS2性能评估", "datasets_used": [], "main_results": "适用于自动驾驶"}
+
+
+def test_entries_keyed_by_model_and_prompt(tmp_path):
+    cache = ExtractionCache(db_path=str(tmp_path / "extraction.db"))
+    cache.put_many("siliconflow/Qwen/Qwen3-32B", "prompt-v1", [("2411.11607v2", data)])
+
+    assert cache.get("2411.11607v2", "siliconflow/Qwen/Qwen3-32B", "prompt-v1") == data
+    # 版本号、模型或提示词变化都不会命中旧记录
+    assert cache.get("2411.11607v1", "siliconflow/Qwen/Qwen3-32B", "prompt-v1") is None
+    assert cache.get("2411.11607v2", "ark/doubao", "prompt-v1") is None
+    assert cache.get("2411.11607v2", "siliconflow/Qwen/Qwen3-32B", "prompt-v2") is None
@@ -0,0 +1,57 @@
+import fitz
+
+from src.tasks.fulltext_reader import FulltextReader, extract_fulltext, split_sections
+from src.utils.token_utils import estimate_tokens
+
+SECTIONS = [
+    ("1 Introduction", "Despite progress, the problem of X remains a challenge. We address this gap."),
+    ("2 Method", "We propose an architecture with a novel module and algorithm."),
+    ("3 Experiments", "We use the ImageNet dataset and benchmark with accuracy and F1 metric."),
+    ("4 Results", "Our method outperforms the baseline and achieves state-of-the-art in Table 2."),
+    ("5 Limitations", "A limitation is that we only consider English; future work will extend this."),
+    ("References", "[1] Someone. Something. 2020."),
+]
+
+
+def make_pdf(path):
+    doc = fitz.open()
+    page, y = doc.new_page(), 50
+    for heading, body in [("Abstract", "We study a thing.")] + SECTIONS:
+        for text, size, font in [(heading, 12, "hebo")] + [(body, 10, "helv")] * 6:
+            if y > 780:
+                page, y = doc.new_page(), 50
+            page.insert_text((50, y), text, fontsize=size, fontname=font)
+            y += size + 6
+    doc.save(path)
+
+
+def test_split_sections_stops_at_references(tmp_path):
+    path = str(tmp_path / "paper.pdf")
+    make_pdf(path)
+
+    titles = [section["title"] for section in split_sections(path)]
+    assert titles == ["Abstract", "1 Introduction", "2 Method", "3 Experiments", "4 Results", "5 Limitations"]
+
+
+def test_packed_sections_fit_budget(tmp_path):
+    path = str(tmp_path / "paper.pdf")
+    make_pdf(path)
+
+    text = extract_fulltext(path, token_budget=200, section_tokens=60)
+    assert estimate_tokens(text) <= 200
+    assert "## 2 Method" in text and "Someone" not in text
+
+
+def test_executor_parses_in_spawned_process(tmp_path, monkeypatch):
+    path = str(tmp_path / "paper.pdf")
+    make_pdf(path)
+    monkeypatch.setattr(FulltextReader, "_executor", None)
+
+    executor = FulltextReader.executor()
+    try:
+        # 不fork带有后台线程的主进程
+        assert executor._mp_context.get_start_method() == "spawn"
+        text = executor.submit(extract_fulltext, path, 200, 60).result(timeout=60)
+    finally:
+        executor.shutdown()
+    assert "## 2 Method" in text
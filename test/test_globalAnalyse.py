@@ -0,0 +1,90 @@
+import asyncio
+
+from src.agents.sub_analyse_agent.deep_analyse_agent import DeepAnalyseResult
+from src.agents.sub_analyse_agent.global_analyse_agent import GlobalanalyseAgent, Synthesis
+
+
+def make_agent(fan_in: int, fail_theme: str = None):
+    """构造不连接大模型的GlobalanalyseAgent，merge_pair记录每次合并的两份材料"""
+    agent = object.__new__(GlobalanalyseAgent)
+    agent.fan_in = fan_in
+    agent.merges = []
+
+    async def merge_pair(left, right):
+        await asyncio.sleep(0.01)
+        agent.merges.append((left.themes, right.themes))
+        if fail_theme in left.themes + right.themes:
+            raise RuntimeError("阶段性综合失败")
+        return Synthesis(left.themes + right.themes, left.paper_count + right.paper_count, "综合")
+
+    agent.merge_pair = merge_pair
+    return agent
+
+
+def deep_result(index: int, failed: bool = False) -> DeepAnalyseResult:
+    return DeepAnalyseResult(cluster_id=index, theme=f"主题{index}", keywords=[], paper_count=index + 1,
+                             deep_analyse="分析失败: 超时" if failed else "分析", papers=[])
+
+
+async def run_reduce(agent, count: int, failed=()):
+    async def deep(index):
+        await asyncio.sleep(0.005 * index)
+        return deep_result(index, index in failed)
+
+    tasks = [asyncio.create_task(deep(index)) for index in range(count)]
+    pushed = []
+
+    async def on_synthesis(synthesis):
+        pushed.append(synthesis)
+
+    results, syntheses = await agent.progressive_reduce(tasks, on_synthesis)
+    return results, syntheses, pushed
+
+
+def covered_themes(syntheses):
+    return sorted(theme for synthesis in syntheses for theme in synthesis.themes)
+
+
+def test_reduce_stops_at_fan_in():
+    agent = make_agent(fan_in=3)
+    results, syntheses, pushed = asyncio.run(run_reduce(agent, 8))
+    assert [result.cluster_id for result in results] == list(range(8))
+    assert len(syntheses) <= 3
+    # 每份材料恰好出现在一份剩余综合中，论文数守恒
+    assert covered_themes(syntheses) == sorted(f"主题{i}" for i in range(8))
+    assert sum(synthesis.paper_count for synthesis in syntheses) == sum(range(1, 9))
+    # n份材料合并到不超过fan_in份，每次合并减少一份
+    assert len(agent.merges) == 8 - len(syntheses) == len(pushed)
+    # 合并结果继续参与合并，形成多层
+    assert any(len(left) > 1 or len(right) > 1 for left, right in agent.merges)
+
+
+def test_no_merge_within_fan_in():
+    agent = make_agent(fan_in=4)
+    _, syntheses, pushed = asyncio.run(run_reduce(agent, 4))
+    assert agent.merges == [] and pushed == []
+    assert [synthesis.themes for synthesis in syntheses] == [[f"主题{i}"] for i in range(4)]
+
+
+def test_single_deep_analysis_is_passed_through():
+    agent = make_agent(fan_in=1)
+    results, syntheses, _ = asyncio.run(run_reduce(agent, 1))
+    assert agent.merges == []
+    assert len(results) == 1 and [synthesis.themes for synthesis in syntheses] == [["主题0"]]
+
+
+def test_failed_synthesis_keeps_both_sources():
+    agent = make_agent(fan_in=2, fail_theme="主题1")
+    _, syntheses, pushed = asyncio.run(run_reduce(agent, 6))
+    # 失败的合并不上报，两份原材料原样保留，不再参与合并
+    assert ["主题0"] in [synthesis.themes for synthesis in syntheses]
+    assert ["主题1"] in [synthesis.themes for synthesis in syntheses]
+    assert all("主题1" not in synthesis.themes for synthesis in pushed)
+    assert covered_themes(syntheses) == sorted(f"主题{i}" for i in range(6))
+
+
+def test_failed_deep_analysis_is_not_merged():
+    agent = make_agent(fan_in=1)
+    results, syntheses, _ = asyncio.run(run_reduce(agent, 4, failed={2}))
+    assert results[2].deep_analyse.startswith("分析失败")
+    assert covered_themes(syntheses) == ["主题0", "主题1", "主题3"]
@@ -0,0 +1,112 @@
+import asyncio
+
+import numpy as np
+
+from src.tasks import kb_writer
+from src.tasks.kb_writer import KnowledgeBaseWriter
+
+
+class FakeKnowledgeBase:
+    """记录每次写入的批次，fail_batches中的批次序号写入失败"""
+
+    def __init__(self, fail_batches=()):
+        self.batches = []
+        self.fail_batches = set(fail_batches)
+
+    async def add_processed_content(self, db_id, data):
+        self.batches.append(data)
+        if len(self.batches) - 1 in self.fail_batches:
+            raise RuntimeError("写入失败")
+
+
+class FakeEmbeddingService:
+    model_key = "fake-embedding"
+
+    async def aembed(self, documents):
+        return [[float(len(document)), 1.0] for document in documents]
+
+
+class FakeEmbeddingStore:
+    async def aget_or_embed(self, documents, model_key, dimensions, embed):
+        return await embed(documents)
+
+
+def run_writer(monkeypatch, scenario, fail_batches=(), **kwargs):
+    knowledge_base = FakeKnowledgeBase(fail_batches)
+    monkeypatch.setattr(kb_writer, "knowledge_base", knowledge_base)
+    monkeypatch.setattr(kb_writer, "get_embedding_store", FakeEmbeddingStore)
+
+    async def run():
+        writer = KnowledgeBaseWriter("tmp_kb", **kwargs)
+        async with writer:
+            await scenario(writer, knowledge_base)
+        return writer
+
+    return asyncio.run(run()), knowledge_base
+
+
+def batch_sizes(knowledge_base):
+    return [len(batch["documents"]) for batch in knowledge_base.batches]
+
+
+def test_flush_when_batch_is_full(monkeypatch):
+    async def scenario(writer, knowledge_base):
+        for i in range(3):
+            await writer.add(f"文档{i}", {"index": i})
+        await asyncio.sleep(0.05)
+        # 攒够batch_size条立即写入，不等待flush_interval
+        assert batch_sizes(knowledge_base) == [3]
+
+    writer, knowledge_base = run_writer(monkeypatch, scenario, batch_size=3, flush_interval=60000)
+    assert writer.written == 3
+
+
+def test_flush_after_interval(monkeypatch):
+    async def scenario(writer, knowledge_base):
+        await writer.add("文档0", {})
+        await writer.add("文档1", {})
+        await asyncio.sleep(0.2)
+        assert batch_sizes(knowledge_base) == [2]
+        await writer.add("文档2", {})
+
+    writer, knowledge_base = run_writer(monkeypatch, scenario, batch_size=10, flush_interval=50)
+    assert batch_sizes(knowledge_base) == [2, 1]
+
+
+def test_close_drains_queue(monkeypatch):
+    async def scenario(writer, knowledge_base):
+        for i in range(7):
+            await writer.add(f"文档{i}", {"index": i})
+
+    writer, knowledge_base = run_writer(monkeypatch, scenario, batch_size=3, flush_interval=60000)
+    assert batch_sizes(knowledge_base) == [3, 3, 1]
+    assert [metadata["index"] for batch in knowledge_base.batches for metadata in batch["metadatas"]] == list(range(7))
+    assert [i for batch in knowledge_base.batches for i in batch["ids"]] == [str(i) for i in range(7)]
+
+
+def test_failed_batch_not_counted(monkeypatch):
+    async def scenario(writer, knowledge_base):
+        for i in range(5):
+            await writer.add(f"文档{i}", {})
+
+    writer, knowledge_base = run_writer(monkeypatch, scenario, fail_batches={0}, batch_size=2, flush_interval=60000)
+    assert batch_sizes(knowledge_base) == [2, 2, 1]
+    assert writer.written == 3 and writer.failed == 2
+
+
+def test_embedding_matrix_follows_key_order(monkeypatch):
+    documents = {"a": "x", "b": "xxx", "c": "xx"}
+
+    async def scenario(writer, knowledge_base):
+        for key, document in documents.items():
+            await writer.add(document, {}, key=key)
+        await writer.add("无key文档", {})
+
+    writer, knowledge_base = run_writer(monkeypatch, scenario, batch_size=2, flush_interval=60000,
+                                        embedding_service=FakeEmbeddingService())
+    assert all("embeddings" in batch for batch in knowledge_base.batches)
+    matrix = writer.embedding_matrix(["c", "a", "b"])
+    assert matrix.dtype == np.float32
+    assert matrix[:, 0].tolist() == [2.0, 1.0, 3.0]
+    assert writer.embedding_matrix(["a", "missing"]) is None
+    assert writer.embedding_matrix([]) is None
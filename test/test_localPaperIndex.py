@@ -0,0 +1,108 @@
+import json
+
+import arxiv
+
+from src.core.config import config
+from src.tasks.local_paper_index import LocalPaperIndex
+from src.tasks.paper_search import PaperSearcher
+
+RECORDS = [
+    {
+        "id": "2401.00001", "title": "Large  Language Model Agents\n for Driving",
+        "abstract": "  We study large language model agents.  ", "authors": "Alice Smith and Bob Lee",
+        "authors_parsed": [["Smith", "Alice", ""], ["Lee", "Bob", ""]],
+        "categories": "cs.CL cs.RO", "doi": "10.1000/xyz",
+        "versions": [{"version": "v1", "created": "Mon, 1 Jan 2024 10:00:00 GMT"},
+                     {"version": "v2", "created": "Fri, 1 Mar 2024 10:00:00 GMT"}],
+    },
+    {
+        "id": "2306.00002", "title": "Survey of Language Model Planning",
+        "abstract": "Planning with a large language model.", "authors": "Carol Wu",
+        "categories": "cs.AI", "versions": [{"version": "v1", "created": "Thu, 1 Jun 2023 10:00:00 GMT"}],
+    },
+    {
+        "id": "2205.00003", "title": "Graph Neural Networks",
+        "abstract": "Message passing on graphs.", "authors": "Dan Park",
+        "categories": "cs.LG", "versions": [{"version": "v1", "created": "Sun, 1 May 2022 10:00:00 GMT"}],
+    },
+]
+
+
+def build_index(tmp_path):
+    path = tmp_path / "metadata.jsonl"
+    lines = [json.dumps(record) for record in RECORDS] + ["", "not json"]
+    path.write_text("\n".join(lines), encoding="utf-8")
+    index = LocalPaperIndex(str(tmp_path / "index.db"))
+    assert index.ingest_jsonl(str(path), batch_size=2) == 3
+    return index
+
+
+def test_ingest_then_search_returns_arxiv_shaped_results(tmp_path):
+    index = build_index(tmp_path)
+    assert index.count() == 3
+
+    results = index.search("large language model")
+    assert {paper["paper_id"] for paper in results} == {"2401.00001v2", "2306.00002v1"}
+    paper = next(paper for paper in results if paper["paper_id"] == "2401.00001v2")
+    assert paper == {
+        "paper_id": "2401.00001v2",
+        "title": "Large Language Model Agents for Driving",
+        "authors": ["Alice Smith", "Bob Lee"],
+        "summary": "We study large language model agents.",
+        "published": 2024,
+        "published_date": "2024-01-01T10:00:00+00:00",
+        "url": "http://arxiv.org/abs/2401.00001v2",
+        "pdf_url": "http://arxiv.org/pdf/2401.00001v2",
+        "primary_category": "cs.CL",
+        "categories": ["cs.CL", "cs.RO"],
+        "doi": "10.1000/xyz",
+    }
+    # 与PaperSearcher._parse_paper_result的字段一致
+    assert set(paper) == {"paper_id", "title", "authors", "summary", "published", "published_date",
+                          "url", "pdf_url", "primary_category", "categories", "doi"}
+    # 短语检索：词序不同不匹配
+    assert index.search("model language large") == []
+
+
+def test_date_window_and_sort_order(tmp_path):
+    index = build_index(tmp_path)
+
+    in_2023 = index.search("language model", date_window=("202301010000", "202312312359"))
+    assert [paper["paper_id"] for paper in in_2023] == ["2306.00002v1"]
+
+    newest_first = index.search("language model", sort_by=arxiv.SortCriterion.SubmittedDate,
+                                sort_order=arxiv.SortOrder.Descending)
+    assert [paper["paper_id"] for paper in newest_first] == ["2401.00001v2", "2306.00002v1"]
+    oldest_first = index.search("language model", sort_by=arxiv.SortCriterion.SubmittedDate,
+                                sort_order=arxiv.SortOrder.Ascending)
+    assert [paper["paper_id"] for paper in oldest_first] == ["2306.00002v1", "2401.00001v2"]
+    # 标题命中的权重更高
+    by_relevance = index.search("language model planning")
+    assert [paper["paper_id"] for paper in by_relevance] == ["2306.00002v1"]
+    assert len(index.search("language model", max_results=1)) == 1
+
+
+def test_reingest_updates_existing_papers(tmp_path):
+    index = build_index(tmp_path)
+    path = tmp_path / "update.jsonl"
+    path.write_text(json.dumps(dict(RECORDS[2], title="Graph Transformers")), encoding="utf-8")
+    index.ingest_jsonl(str(path))
+
+    assert index.count() == 3
+    assert index.search("graph neural networks") == []
+    assert [paper["title"] for paper in index.search("graph transformers")] == ["Graph Transformers"]
+
+
+def test_empty_index_falls_back_to_arxiv(tmp_path, monkeypatch):
+    settings = {"paper_search.backend": "local", "paper_search.local_index_path": str(tmp_path / "empty.db"),
+                "paper_search.cache.enabled": False}
+    original_get = config.get
+    monkeypatch.setattr(config, "get", lambda key, default=None: settings.get(key, original_get(key, default)))
+    monkeypatch.setattr(config, "get_bool", lambda key, default=False: settings.get(key, default))
+
+    searcher = PaperSearcher()
+    assert searcher.local_index is None
+
+    build_index(tmp_path)
+    settings["paper_search.local_index_path"] = str(tmp_path / "index.db")
+    assert PaperSearcher().local_index is not None
@@ -0,0 +1,44 @@
+from src.tasks.paper_dedup import PaperDeduplicator, split_version
+
+summary = (
+    "Automated driving is currently a prominent area of scientific work. In the future, highly automated "
+    "driving and new Advanced Driver Assistance Systems will become reality. The Robot Operating System 2 "
+    "(ROS2) is commonly used to connect components in an automated driving system. In this paper, a thorough "
+    "performance evaluation of ROS2 is conducted, both in terms of timeliness and error rate. The results "
+    "show that ROS2 is a suitable framework for automated driving systems."
+)
+
+papers = [
+    {"paper_id": "2411.11607v1", "title": "Performance evaluation of ROS2", "summary": summary,
+     "published_date": "2024-11-18T14:29:22+00:00"},
+    {"paper_id": "2307.06258v1", "title": "Connected Dependability Cage Approach for Safe Automated Driving",
+     "summary": "A safety concept combining onboard runtime monitoring with a remote command control center.",
+     "published_date": "2023-07-12T15:55:48+00:00"},
+    {"paper_id": "2411.11607v2", "title": "Performance evaluation of ROS2", "summary": summary,
+     "published_date": "2024-11-18T14:29:22+00:00"},
+    {"paper_id": "2502.00001v1", "title": "Performance evaluation of ROS2",
+     "summary": summary.replace("thorough", "comprehensive"), "published_date": "2025-02-01T08:00:00+00:00"},
+]
+
+
+def test_split_version():
+    assert split_version("2411.11607v2") == ("2411.11607", 2)
+    assert split_version("hep-th/9901001") == ("hep-th/9901001", 0)
+
+
+def test_versions_and_near_duplicates_collapse_to_newest():
+    deduplicator = PaperDeduplicator()
+    kept = deduplicator.dedup(papers)
+
+    assert [paper["paper_id"] for paper in kept] == ["2307.06258v1", "2502.00001v1"]
+    assert sorted(kept[1]["collapsed_ids"]) == ["2411.11607v1", "2411.11607v2"]
+    assert deduplicator.collapsed_count == 2
+
+
+def test_incremental_add_keeps_already_dispatched_paper():
+    deduplicator = PaperDeduplicator()
+    first = deduplicator.add(papers[:1])
+    second = deduplicator.add(papers[2:3])
+
+    assert [paper["paper_id"] for paper in first] == ["2411.11607v1"]
+    assert second == []
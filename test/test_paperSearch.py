@@ -0,0 +1,162 @@
+import asyncio
+import threading
+
+from src.tasks.paper_search import PaperSearcher
+from src.tasks.search_cache import SearchCache
+
+
+def paper(paper_id: str, published_date: str = "2024-06-01T00:00:00+00:00"):
+    return {"paper_id": paper_id, "title": paper_id, "published_date": published_date}
+
+
+# 每个查询词在arXiv上的全部结果（按相关度排序）
+RESULTS = {
+    "llm agents": [paper("a1"), paper("a2", "2023-06-01T00:00:00+00:00"), paper("shared")],
+    "tool use": [paper("shared"), paper("b1", "2023-06-01T00:00:00+00:00"), paper("b2")],
+}
+
+
+def make_searcher(tmp_path, results=RESULTS, split=False):
+    searcher = PaperSearcher.__new__(PaperSearcher)
+    searcher.backend = "arxiv"
+    searcher.local_index = None
+    searcher.cache = SearchCache(db_path=str(tmp_path / "cache.db"), ttl=60)
+    searcher.calls = []
+
+    def fetch(query, date_window, max_results, sort_by, sort_order):
+        searcher.calls.append((query, max_results))
+        papers = results[query]
+        if date_window is not None:
+            papers = [p for p in papers if SearchCache._in_window(p, *date_window)]
+        return papers[:max_results]
+
+    searcher._fetch_query = fetch
+    if not split:
+        # 不分摊结果数，单独检验缓存完整性的判断
+        searcher._per_query_limit = lambda max_results, n_queries: max_results
+    return searcher
+
+
+def test_merge_results_orders_by_best_rank_and_dedups():
+    searcher = PaperSearcher.__new__(PaperSearcher)
+    merged = searcher._merge_results([
+        [paper("a"), paper("shared"), paper("c")],
+        [paper("shared"), paper("d")],
+    ])
+    # shared在第二个查询中排第一，名次相同时第一个查询优先
+    assert [p["paper_id"] for p in merged] == ["a", "shared", "d", "c"]
+    assert [p["paper_id"] for p in searcher._merge_results([[paper("a"), paper("b")]], 1)] == ["a"]
+    assert searcher._merge_results([]) == []
+
+
+def test_max_results_split_across_queries(tmp_path):
+    searcher = make_searcher(tmp_path, split=True)
+    papers = asyncio.run(searcher.search_papers(["llm agents", "tool use"], max_results=2))
+    # 两个查询各取 ceil(2 × 1.5 / 2) = 2 篇，而不是各取满max_results
+    assert sorted(searcher.calls) == [("llm agents", 2), ("tool use", 2)]
+    assert [p["paper_id"] for p in papers] == ["a1", "shared"]
+    assert searcher._per_query_limit(50, 1) == 50
+    assert searcher._per_query_limit(50, 4) == 19
+    assert searcher._per_query_limit(1, 8) == 1
+
+
+def test_truncated_union_is_not_cached_as_complete(tmp_path):
+    searcher = make_searcher(tmp_path)
+    start, end = "2023-01-01", "2024-12-31"
+
+    async def run():
+        # 每个查询都只有3篇（未达到上限4），但去重后的并集有5篇，被截断到4篇
+        first = await searcher.search_papers(["llm agents", "tool use"], max_results=4, start_date=start, end_date=end)
+        assert len(first) == 4
+        calls = len(searcher.calls)
+
+        # 更大的请求不能由被截断的缓存回答
+        larger = await searcher.search_papers(["llm agents", "tool use"], max_results=10, start_date=start, end_date=end)
+        assert {p["paper_id"] for p in larger} == {"a1", "a2", "shared", "b1", "b2"}
+        assert len(searcher.calls) > calls
+
+    asyncio.run(run())
+
+
+def test_truncated_union_is_not_filtered_for_sub_window(tmp_path):
+    searcher = make_searcher(tmp_path)
+
+    async def run():
+        await searcher.search_papers(["llm agents", "tool use"], max_results=4, start_date="2023-01-01", end_date="2024-12-31")
+        calls = len(searcher.calls)
+        # 截断时b1（2023年）被丢弃，子窗口请求必须重新检索，不能在被截断的缓存上过滤
+        sub_window = await searcher.search_papers(["llm agents", "tool use"], max_results=4,
+                                                  start_date="2023-01-01", end_date="2023-12-31")
+        assert {p["paper_id"] for p in sub_window} == {"a2", "b1"}
+        assert len(searcher.calls) > calls
+
+    asyncio.run(run())
+
+
+def test_complete_union_serves_larger_and_sub_window_requests(tmp_path):
+    searcher = make_searcher(tmp_path)
+
+    async def run():
+        await searcher.search_papers(["llm agents", "tool use"], max_results=10, start_date="2023-01-01", end_date="2024-12-31")
+        calls = len(searcher.calls)
+        sub_window = await searcher.search_papers(["llm agents", "tool use"], max_results=10,
+                                                  start_date="2023-01-01", end_date="2023-12-31")
+        assert {p["paper_id"] for p in sub_window} == {"a2", "b1"}
+        assert len(searcher.calls) == calls
+
+    asyncio.run(run())
+
+
+def make_stream_searcher(tmp_path, pages):
+    """pages: 查询词 -> 逐页的论文ID列表；返回值中的事件设置前不会开始下载对应查询的第二页"""
+    searcher = make_searcher(tmp_path)
+    searcher.cache = None
+    second_page = threading.Event()
+
+    def iter_pages(query, date_window, max_results, sort_by, sort_order, stop_event=None):
+        for number, ids in enumerate(pages[query]):
+            if number == 1 and not second_page.wait(timeout=5):
+                raise TimeoutError("第一页未被提前产出")
+            yield [paper(paper_id) for paper_id in ids]
+
+    searcher._iter_query_pages = iter_pages
+    return searcher, second_page
+
+
+async def collect(stream, on_page=None):
+    pages = []
+    async for page in stream:
+        pages.append([p["paper_id"] for p in page])
+        if on_page is not None:
+            on_page()
+    return pages
+
+
+def test_stream_yields_first_page_before_later_pages_download(tmp_path):
+    searcher, second_page = make_stream_searcher(tmp_path, {"llm agents": [["a1", "a2"], ["a3"]]})
+
+    async def run():
+        stream = searcher.stream_papers(["llm agents"], max_results=10)
+        # 第二页要等消费方收到第一页后才能下载，没有提前产出时这里会超时
+        first = await asyncio.wait_for(stream.__anext__(), timeout=2)
+        second_page.set()
+        return [[p["paper_id"] for p in first]] + await collect(stream)
+
+    assert asyncio.run(run()) == [["a1", "a2"], ["a3"]]
+
+
+def test_stream_dedups_across_pages_and_queries(tmp_path):
+    searcher, second_page = make_stream_searcher(tmp_path, {
+        "llm agents": [["a1", "shared"], ["a1", "a2"]],
+        "tool use": [["shared", "b1"], ["b2", "a2"]],
+    })
+    pages = asyncio.run(collect(searcher.stream_papers(["llm agents", "tool use"], max_results=10), second_page.set))
+    ids = [paper_id for page in pages for paper_id in page]
+    assert sorted(ids) == ["a1", "a2", "b1", "b2", "shared"]
+    assert all(pages)
+
+
+def test_stream_stops_at_max_results(tmp_path):
+    searcher, second_page = make_stream_searcher(tmp_path, {"llm agents": [["a1", "a2"], ["a3", "a4"]]})
+    pages = asyncio.run(collect(searcher.stream_papers(["llm agents"], max_results=3), second_page.set))
+    assert pages == [["a1", "a2"], ["a3"]]
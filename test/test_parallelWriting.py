@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+from autogen_agentchat.messages import TextMessage
+
+from src.agents.sub_writing_agent import parallel_writing_node as node
+
+
+class HangingGroup:
+    """写出一稿后，下一轮调用一直没有返回的写作小组"""
+
+    def reset(self):
+        pass
+
+    async def run_stream(self, task):
+        yield TextMessage(content=task, source="user")
+        yield TextMessage(content="第一稿", source="writing_agent")
+        await asyncio.sleep(60)
+
+
+def test_hanging_turn_is_bounded_by_budget_timeout(monkeypatch):
+    get_float = node.config.get_float
+    monkeypatch.setattr(node.config, "get_float",
+                        lambda key, default=0.0: 0.2 if key == "writing.budget.timeout" else get_float(key, default))
+    monkeypatch.setattr(node, "create_writing_group", lambda retrieve_first=None: HangingGroup())
+
+    async def run():
+        state = {"state_queue": asyncio.Queue(), "global_analysis": "全局分析", "user_request": "综述",
+                 "sections": ["1. 引言"], "retrieved_docs": [[]]}
+        started = time.monotonic()
+        state = await node.parallel_writing_node(state)
+        elapsed = time.monotonic() - started
+        events = []
+        while not state["state_queue"].empty():
+            events.append(state["state_queue"].get_nowait())
+        return state, elapsed, events
+
+    state, elapsed, events = asyncio.run(run())
+    assert elapsed < 5
+    # 超时后保留最新一稿，本节正常结束
+    assert state["writted_sections"][0].content == "第一稿"
+    assert [event.state for event in events][-1] == "completed"
+    assert any("超过" in (event.data or "") for event in events)
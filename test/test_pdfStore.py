@@ -0,0 +1,119 @@
+import asyncio
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.services import pdf_store
+from src.services.pdf_store import PdfStore, pdf_store_session
+
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 4096 + b"\n%%EOF\n"
+
+
+class StubPdfHandler(BaseHTTPRequestHandler):
+    """模拟arXiv PDF下载：/pdf/* 返回PDF，/html/* 返回尚未生成PDF时的HTML页面"""
+
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(self.path)
+        # 放慢响应，让并发请求在下载完成前到达
+        time.sleep(0.1)
+        body = PDF_BYTES if self.path.startswith("/pdf/") else b"<html>PDF is being generated</html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubPdfHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubPdfHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_paper(base_url, paper_id, kind="pdf"):
+    return {"paper_id": paper_id, "pdf_url": f"{base_url}/{kind}/{paper_id}"}
+
+
+def test_concurrent_requests_download_once_then_hit_cache(stub_server, tmp_path):
+    async def run():
+        store = PdfStore(cache_dir=str(tmp_path), max_concurrency=2, num_retries=0)
+        paper = make_paper(stub_server, "2411.11607v2")
+        paths = await asyncio.gather(*[store.get(paper) for _ in range(5)])
+        again = await store.get(paper)
+        await store.close()
+        return paths, again
+
+    paths, again = asyncio.run(run())
+
+    assert len(set(paths)) == 1 and again == paths[0]
+    assert paths[0].endswith("2411.11607v2.pdf")
+    with open(paths[0], "rb") as f:
+        assert f.read() == PDF_BYTES
+    assert StubPdfHandler.requests == ["/pdf/2411.11607v2"]
+
+
+def test_non_pdf_response_not_cached(stub_server, tmp_path):
+    async def run():
+        store = PdfStore(cache_dir=str(tmp_path), num_retries=0)
+        result = await store.get(make_paper(stub_server, "hep-th/9901001v1", kind="html"))
+        await store.close()
+        return result
+
+    assert asyncio.run(run()) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_evict_by_size_and_age(stub_server, tmp_path):
+    async def run():
+        store = PdfStore(cache_dir=str(tmp_path), num_retries=0)
+        result = await store.get_many([make_paper(stub_server, f"2401.0000{i}v1") for i in range(3)])
+        await store.close()
+        return store, result
+
+    store, result = asyncio.run(run())
+    now = time.time()
+    for age, paper_id in zip((40 * 86400, 20, 10), ("2401.00000v1", "2401.00001v1", "2401.00002v1")):
+        os.utime(result[paper_id], (now - age, now - age))
+
+    store.max_age = 30 * 86400
+    store.max_bytes = len(PDF_BYTES) * 1
+    assert store.evict() == 2
+    assert os.listdir(tmp_path) == ["2401.00002v1.pdf"]
+
+
+def test_session_closed_after_last_concurrent_run(stub_server, tmp_path, monkeypatch):
+    store = PdfStore(cache_dir=str(tmp_path))
+    monkeypatch.setattr(pdf_store, "_pdf_store", store)
+
+    async def run():
+        first_done = asyncio.Event()
+
+        async def first_run():
+            async with pdf_store_session():
+                assert await store.get(make_paper(stub_server, "2401.00001v1"))
+            first_done.set()
+
+        async def second_run():
+            async with pdf_store_session():
+                await first_done.wait()
+                # 第一个运行结束后会话仍可用
+                assert not store._session.closed
+                return await store.get(make_paper(stub_server, "2401.00002v1"))
+
+        _, path = await asyncio.gather(first_run(), second_run())
+        assert path is not None and os.path.exists(path)
+        assert store._session is None
+
+    asyncio.run(run())
@@ -0,0 +1,81 @@
+import asyncio
+
+from src.agents import reading_agent
+from src.agents.reading_agent import ReadingCollector, read_papers
+
+PAPERS = [{"paper_id": f"2501.0000{i}v1", "title": f"论文{i}", "summary": "摘要"} for i in range(4)]
+
+
+class SlowFulltextReader:
+    """第一篇论文的PDF下载很慢，其余论文立即返回正文"""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def read(self, paper):
+        if paper["paper_id"] == PAPERS[0]["paper_id"]:
+            await asyncio.sleep(0.2)
+        self.events.append(("excerpt", paper["paper_id"]))
+        return f"{paper['title']}的正文"
+
+
+def pipeline_config(monkeypatch, events, batch: bool):
+    values = {"reading.fulltext.enabled": True, "reading.batch.enabled": batch,
+              "reading.batch.max_papers": 2, "reading.batch.token_budget": 100000}
+    get_bool, get_int = reading_agent.config.get_bool, reading_agent.config.get_int
+    monkeypatch.setattr(reading_agent.config, "get_bool", lambda key, default=False: values.get(key, get_bool(key, default)))
+    monkeypatch.setattr(reading_agent.config, "get_int", lambda key, default=0: values.get(key, get_int(key, default)))
+    monkeypatch.setattr(reading_agent, "get_extraction_cache", lambda: None)
+    monkeypatch.setattr(reading_agent, "FulltextReader", lambda: SlowFulltextReader(events))
+
+
+def test_fulltext_read_starts_before_slow_download_finishes(monkeypatch):
+    events = []
+    pipeline_config(monkeypatch, events, batch=False)
+
+    async def fake_read(scheduler, index, paper, payload, state_queue, collector):
+        assert payload["full_text_excerpt"] == f"{paper['title']}的正文"
+        events.append(("read", paper["paper_id"]))
+
+    monkeypatch.setattr(reading_agent, "read_and_collect", fake_read)
+    asyncio.run(read_papers(None, PAPERS, asyncio.Queue(), ReadingCollector(None, asyncio.Queue())))
+
+    slow_excerpt = events.index(("excerpt", PAPERS[0]["paper_id"]))
+    # 其余论文的阅读不等待第一篇论文的下载
+    assert all(events.index(("read", paper["paper_id"])) < slow_excerpt for paper in PAPERS[1:])
+    assert ("read", PAPERS[0]["paper_id"]) in events
+
+
+def test_fulltext_batches_sent_as_soon_as_full(monkeypatch):
+    events = []
+    pipeline_config(monkeypatch, events, batch=True)
+
+    async def fake_batch(scheduler, batch, state_queue, collector):
+        events.append(("batch", [paper["paper_id"] for _, paper, _ in batch]))
+
+    monkeypatch.setattr(reading_agent, "read_batch", fake_batch)
+    asyncio.run(read_papers(None, PAPERS, asyncio.Queue(), ReadingCollector(None, asyncio.Queue())))
+
+    batches = [event for event in events if event[0] == "batch"]
+    assert sorted(paper_id for _, ids in batches for paper_id in ids) == sorted(paper["paper_id"] for paper in PAPERS)
+    # 先准备好的两篇装满一批后立即发送，早于慢论文的下载完成
+    assert events.index(batches[0]) < events.index(("excerpt", PAPERS[0]["paper_id"]))
+    assert PAPERS[0]["paper_id"] in batches[-1][1]
+
+
+def test_bookkeeping_fields_not_sent_to_llm(monkeypatch):
+    events = []
+    pipeline_config(monkeypatch, events, batch=False)
+    payloads = {}
+
+    async def fake_read(scheduler, index, paper, payload, state_queue, collector):
+        payloads[paper["paper_id"]] = (paper, payload)
+
+    monkeypatch.setattr(reading_agent, "read_and_collect", fake_read)
+    papers = [{**paper, "collapsed_ids": ["2501.00000v0"], "relevance_score": 0.42} for paper in PAPERS]
+    asyncio.run(read_papers(None, papers, asyncio.Queue(), ReadingCollector(None, asyncio.Queue())))
+
+    for paper, payload in payloads.values():
+        assert "collapsed_ids" in paper and "relevance_score" in paper
+        assert "collapsed_ids" not in payload and "relevance_score" not in payload
+        assert "full_text_excerpt" in payload
@@ -0,0 +1,50 @@
+import numpy as np
+
+from src.tasks.relevance_ranker import RelevanceRanker
+
+
+def papers(count: int):
+    return [{"paper_id": f"p{i}"} for i in range(count)]
+
+
+def ids(selected):
+    return [paper["paper_id"] for paper in selected]
+
+
+def test_select_by_threshold_keeps_original_order():
+    ranker = RelevanceRanker(top_n=0, threshold=0.5, min_keep=2)
+    kept, dropped = ranker.select(papers(4), np.array([0.6, 0.2, 0.9, 0.5]))
+    assert ids(kept) == ["p0", "p2", "p3"]
+    assert ids(dropped) == ["p1"]
+    assert [paper["relevance_score"] for paper in kept] == [0.6, 0.9, 0.5]
+
+
+def test_select_top_n_takes_highest_scores():
+    ranker = RelevanceRanker(top_n=2, threshold=0.0, min_keep=1)
+    kept, dropped = ranker.select(papers(4), np.array([0.3, 0.8, 0.1, 0.7]))
+    assert ids(kept) == ["p1", "p3"]
+    assert ids(dropped) == ["p0", "p2"]
+    # 显式limit覆盖top_n
+    kept, _ = ranker.select(papers(4), np.array([0.3, 0.8, 0.1, 0.7]), limit=1)
+    assert ids(kept) == ["p1"]
+
+
+def test_select_ties_prefer_earlier_papers():
+    ranker = RelevanceRanker(top_n=2, threshold=0.0, min_keep=1)
+    kept, _ = ranker.select(papers(4), np.array([0.5, 0.7, 0.7, 0.7]))
+    assert ids(kept) == ["p1", "p2"]
+
+
+def test_select_fallback_when_all_below_threshold():
+    ranker = RelevanceRanker(top_n=0, threshold=0.9, min_keep=2)
+    scores = np.array([0.1, 0.4, 0.3])
+    kept, dropped = ranker.select(papers(3), scores)
+    assert ids(kept) == ["p1", "p2"] and ids(dropped) == ["p0"]
+    # 流式逐页筛选时不兜底
+    kept, dropped = ranker.select(papers(3), scores, fallback=False)
+    assert kept == [] and len(dropped) == 3
+
+
+def test_select_empty_input():
+    ranker = RelevanceRanker(top_n=5, threshold=0.3, min_keep=2)
+    assert ranker.select([], np.zeros(0, dtype=np.float32)) == ([], [])
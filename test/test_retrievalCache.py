@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from src.agents.sub_writing_agent.retrieval_prefetch_node import section_queries
+from src.services.retrieval_cache import RetrievalCache
+
+
+def test_concurrent_and_repeated_queries_hit_once():
+    cache = RetrievalCache(max_size=2)
+    calls = []
+
+    async def query_fn(query):
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        return [{"content": query, "metadata": {}, "score": 1.0}]
+
+    async def run():
+        results = await asyncio.gather(
+            cache.get_or_query("Graph  Neural Networks", "db", 2, 0.05, query_fn),
+            cache.get_or_query("graph neural networks", "db", 2, 0.05, query_fn),
+        )
+        assert results[0] == results[1]
+        await cache.get_or_query("graph neural networks", "db", 2, 0.05, query_fn)
+        # db_id或top_k不同时是不同的键
+        await cache.get_or_query("graph neural networks", "other", 2, 0.05, query_fn)
+        await cache.get_or_query("graph neural networks", "db", 5, 0.05, query_fn)
+
+    asyncio.run(run())
+    assert len(calls) == 3
+    assert cache.stats() == {"hits": 2, "misses": 3, "size": 2}
+
+
+def test_failed_query_is_not_cached():
+    cache = RetrievalCache(max_size=4)
+
+    async def failing(query):
+        raise RuntimeError("knowledge base unavailable")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_query("query", "db", 2, 0.05, failing))
+    assert cache.stats()["size"] == 0
+
+
+def test_section_queries():
+    assert section_queries("1.2 技术发展历程 (概述该技术从起源到现在的发展过程)") == [
+        "技术发展历程", "技术发展历程 概述该技术从起源到现在的发展过程"]
+    assert section_queries("2 结论") == ["结论"]
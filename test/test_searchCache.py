@@ -0,0 +1,44 @@
+from src.tasks.search_cache import SearchCache
+
+papers = [
+    {"paper_id": "2403.00001v1", "title": "A", "published_date": "2024-03-01T10:00:00+00:00"},
+    {"paper_id": "2303.00002v2", "title": "B", "published_date": "2023-03-01T10:00:00+00:00"},
+]
+
+
+def test_exact_window_hit(tmp_path):
+    cache = SearchCache(db_path=str(tmp_path / "cache.db"), ttl=60)
+    key = SearchCache.make_key(["LLM", "autonomous driving"], "relevance", "descending")
+    window = ("202301010000", "202412312359")
+    cache.put(key, window, 50, False, papers)
+
+    # 查询词顺序和大小写不影响缓存键
+    same_key = SearchCache.make_key(["Autonomous  Driving", "llm"], "relevance", "descending")
+    assert cache.get(same_key, window, 50) == papers
+    # 缓存的结果数量不足以满足更大的请求
+    assert cache.get(key, window, 100) is None
+
+
+def test_sub_window_filtered_locally(tmp_path):
+    cache = SearchCache(db_path=str(tmp_path / "cache.db"), ttl=60)
+    key = SearchCache.make_key(["LLM"], "relevance", "descending")
+    cache.put(key, ("202301010000", "202412312359"), 50, True, papers)
+
+    result = cache.get(key, ("202401010000", "202412310000"), 50)
+    assert [paper["paper_id"] for paper in result] == ["2403.00001v1"]
+
+
+def test_truncated_entry_not_reused_for_sub_window(tmp_path):
+    cache = SearchCache(db_path=str(tmp_path / "cache.db"), ttl=60)
+    key = SearchCache.make_key(["LLM"], "relevance", "descending")
+    cache.put(key, ("202301010000", "202412312359"), 2, False, papers)
+
+    assert cache.get(key, ("202401010000", "202412310000"), 2) is None
+
+
+def test_expired_entry_ignored(tmp_path):
+    cache = SearchCache(db_path=str(tmp_path / "cache.db"), ttl=0)
+    key = SearchCache.make_key(["LLM"], "relevance", "descending")
+    cache.put(key, None, 50, True, papers)
+
+    assert cache.get(key, None, 50) is None
@@ -0,0 +1,22 @@
+from src.utils.token_utils import BudgetPacker, estimate_tokens, pack_by_budget
+
+
+def test_estimate_tokens_counts_cjk_per_char():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("自动驾驶") == 4
+    assert estimate_tokens("a" * 40) == 10
+
+
+def test_pack_by_budget_keeps_order_and_limits():
+    batches = pack_by_budget([3, 3, 3, 9, 1, 1, 1], cost=lambda x: x, token_budget=7, max_items=2)
+    assert batches == [[3, 3], [3], [9], [1, 1], [1]]
+
+
+def test_budget_packer_matches_pack_by_budget():
+    items = [3, 3, 3, 9, 1, 1, 1]
+    packer = BudgetPacker(cost=lambda x: x, token_budget=7, max_items=2)
+    emitted = [packer.add(item) for item in items]
+    # 装满max_items的批次在加入最后一个元素时立即返回
+    assert emitted[1] == [[3, 3]]
+    assert [batch for batches in emitted for batch in batches] + packer.flush() == pack_by_budget(items, lambda x: x, 7, 2)
+    assert packer.flush() == []
@@ -0,0 +1,29 @@
+import numpy as np
+
+from src.tasks.topic_tree import build_topic_tree, knn_graph
+
+
+def test_knn_graph_is_symmetric_without_self_loops():
+    features = np.random.default_rng(0).normal(size=(50, 8))
+    graph = knn_graph(features, n_neighbors=5, block_size=16)
+    assert (graph != graph.T).nnz == 0
+    assert graph.diagonal().sum() == 0
+    assert (graph.getnnz(axis=1) >= 5).all()
+
+
+def test_leaves_respect_paper_and_token_budgets():
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(4, 128)) * 2
+    embeddings = np.vstack([center + rng.normal(size=(60, 128)) for center in centers])
+    costs = rng.integers(100, 400, size=len(embeddings))
+
+    tree = build_topic_tree(embeddings, costs, n_top=4, max_papers=25, max_tokens=5000,
+                            min_papers=3, n_neighbors=10, pca_components=20)
+    leaves = [leaf for top in tree for leaf in (top.children or [top])]
+    assert len(tree) == 4
+    assert all(len(leaf.indices) <= 25 and costs[leaf.indices].sum() <= 5000 for leaf in leaves)
+    # 每篇论文恰好属于一个叶子主题，顶层主题包含其所有叶子的论文
+    assert sorted(i for leaf in leaves for i in leaf.indices) == list(range(len(embeddings)))
+    for top in tree:
+        if top.children:
+            assert sorted(i for leaf in top.children for i in leaf.indices) == top.indices
@@ -0,0 +1,77 @@
+import asyncio
+
+from autogen_agentchat.messages import TextMessage
+
+from src.agents.sub_writing_agent import writing_budget
+from src.agents.sub_writing_agent.writing_budget import (
+    MinImprovementTermination,
+    SectionBudgetUsage,
+    create_budget_termination,
+)
+
+
+def draft(content: str, source: str = "writing_agent") -> TextMessage:
+    return TextMessage(content=content, source=source)
+
+
+def test_min_improvement_stops_when_drafts_converge():
+    condition = MinImprovementTermination(min_change=0.05)
+    first = "大语言模型在代码生成任务上取得了显著进展。" * 20
+
+    async def run():
+        assert await condition([draft(first)]) is None
+        assert await condition([draft("审查意见：需要补充实验数据", source="review_agent")]) is None
+        # 大幅修改不终止
+        assert await condition([draft("检索增强生成方法综述。" * 20)]) is None
+        assert not condition.terminated
+        # 只改动少量字符时终止
+        stop = await condition([draft("检索增强生成方法综述。" * 19 + "检索增强生成方法概述。")])
+        assert stop is not None and condition.terminated
+        await condition.reset()
+        assert not condition.terminated
+
+    asyncio.run(run())
+
+
+def test_section_budget_usage_summary():
+    usage = SectionBudgetUsage()
+    usage.record(draft("任务", source="user"))
+    usage.record(draft("初稿"))
+    usage.finish("Maximum number of messages 2 reached")
+    assert usage.messages == 2 and usage.drafts == 1
+    assert "Maximum number of messages" in usage.summary()
+
+
+def budget_config(monkeypatch, **values):
+    """只保留传入的预算项，其余项设为0（不限制）"""
+    limits = {"max_messages": 0, "max_tokens": 0, "timeout": 0, "min_improvement": 0, **values}
+    lookup = lambda key, default=None: limits.get(key.rsplit(".", 1)[-1], default)
+    monkeypatch.setattr(writing_budget.config, "get_int", lookup)
+    monkeypatch.setattr(writing_budget.config, "get_float", lookup)
+
+
+def test_budget_zero_max_messages_is_unlimited(monkeypatch):
+    budget_config(monkeypatch, max_tokens=60000)
+    condition = create_budget_termination()
+
+    async def run():
+        for index in range(20):
+            assert await condition([draft(f"第{index}稿", source="review_agent")]) is None
+
+    asyncio.run(run())
+
+
+def test_budget_max_messages_limit(monkeypatch):
+    budget_config(monkeypatch, max_messages=3)
+    condition = create_budget_termination()
+
+    async def run():
+        assert await condition([draft("任务", source="user"), draft("初稿")]) is None
+        assert await condition([draft("审查意见", source="review_agent")]) is not None
+
+    asyncio.run(run())
+
+
+def test_budget_all_disabled(monkeypatch):
+    budget_config(monkeypatch)
+    assert create_budget_termination() is None
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Sequence
+
+from autogen_agentchat.agents import BaseChatAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
+from autogen_agentchat.messages import BaseChatMessage, TextMessage
+from autogen_agentchat.teams import SelectorGroupChat
+from autogen_core import CancellationToken
+
+from src.agents.sub_writing_agent.writing_chatGroup import protocol_max_messages, protocol_selector
+
+
+class ScriptedAgent(BaseChatAgent):
+    """按顺序返回预设回复的智能体"""
+
+    def __init__(self, name: str, replies: Sequence[str]):
+        super().__init__(name, description=name)
+        self.replies = list(replies)
+
+    @property
+    def produced_message_types(self):
+        return (TextMessage,)
+
+    async def on_messages(self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken) -> Response:
+        return Response(chat_message=TextMessage(content=self.replies.pop(0), source=self.name))
+
+    async def on_reset(self, cancellation_token: CancellationToken) -> None:
+        pass
+
+
+def run_protocol(review_replies: Sequence[str], max_rewrites: int, retrieve_first: bool = True):
+    agents = [
+        ScriptedAgent("writing_agent", [f"草稿{i}" for i in range(max_rewrites + 1)]),
+        ScriptedAgent("retrieval_agent", ["检索结果"]),
+        ScriptedAgent("review_agent", review_replies),
+    ]
+    team = SelectorGroupChat(
+        agents,
+        model_client=None,
+        termination_condition=TextMentionTermination("APPROVE") | MaxMessageTermination(protocol_max_messages(max_rewrites, retrieve_first)),
+        selector_func=protocol_selector(retrieve_first),
+    )
+    result = asyncio.run(team.run(task="写作任务"))
+    return [message.source for message in result.messages]
+
+
+def test_protocol_stops_on_approve():
+    assert run_protocol(["需要修改", "APPROVE"], max_rewrites=2) == [
+        "user", "retrieval_agent", "writing_agent", "review_agent", "writing_agent", "review_agent"]
+
+
+def test_protocol_stops_after_last_rewrite():
+    assert run_protocol(["需要修改", "需要修改"], max_rewrites=2) == [
+        "user", "retrieval_agent", "writing_agent", "review_agent", "writing_agent", "review_agent", "writing_agent"]
+
+
+def test_protocol_without_retrieval():
+    assert run_protocol(["APPROVE"], max_rewrites=1, retrieve_first=False) == [
+        "user", "writing_agent", "review_agent"]